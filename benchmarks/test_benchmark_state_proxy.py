@@ -0,0 +1,113 @@
+"""Benchmark tests for reading large list vars of a state through MutableProxy."""
+
+from __future__ import annotations
+
+import time
+from typing import Dict, List
+
+import pytest
+
+from reflex.state import BaseState
+
+NUM_ITEMS = 100_000
+
+
+class LargeListState(BaseState):
+    """A state with large list vars."""
+
+    numbers: List[int] = []
+    rows: List[Dict[str, int]] = []
+
+
+@pytest.fixture
+def large_list_state() -> LargeListState:
+    """A state with 100k element list vars.
+
+    Returns:
+        The state instance.
+    """
+    state = LargeListState(_reflex_internal_init=True)  # type: ignore
+    state.numbers = list(range(NUM_ITEMS))
+    state.rows = [{"value": i} for i in range(NUM_ITEMS)]
+    state._clean()
+    return state
+
+
+@pytest.mark.benchmark(
+    group="Iterate over a 100k element list var",
+    timer=time.perf_counter,
+    min_rounds=5,
+)
+def test_iterate_list_of_ints(benchmark, large_list_state):
+    """Test summing the items of a list var of ints.
+
+    Args:
+        benchmark: The benchmark fixture.
+        large_list_state: The state with the list vars.
+    """
+
+    def benchmark_fn():
+        return sum(n for n in large_list_state.numbers)
+
+    assert benchmark(benchmark_fn) == sum(range(NUM_ITEMS))
+
+
+@pytest.mark.benchmark(
+    group="Iterate over a 100k element list var",
+    timer=time.perf_counter,
+    min_rounds=5,
+)
+def test_iterate_list_of_dicts(benchmark, large_list_state):
+    """Test summing a key of the items of a list var of dicts.
+
+    Args:
+        benchmark: The benchmark fixture.
+        large_list_state: The state with the list vars.
+    """
+
+    def benchmark_fn():
+        return sum(row["value"] for row in large_list_state.rows)
+
+    assert benchmark(benchmark_fn) == sum(range(NUM_ITEMS))
+
+
+@pytest.mark.benchmark(
+    group="Iterate over a 100k element list var",
+    timer=time.perf_counter,
+    min_rounds=5,
+)
+def test_index_list_of_dicts(benchmark, large_list_state):
+    """Test summing a key of the items of a list var of dicts accessed by index.
+
+    Args:
+        benchmark: The benchmark fixture.
+        large_list_state: The state with the list vars.
+    """
+
+    def benchmark_fn():
+        return sum(
+            large_list_state.rows[i]["value"] for i in range(len(large_list_state.rows))
+        )
+
+    assert benchmark(benchmark_fn) == sum(range(NUM_ITEMS))
+
+
+@pytest.mark.benchmark(
+    group="Iterate over a 100k element list var",
+    timer=time.perf_counter,
+    min_rounds=5,
+)
+def test_update_list_of_dicts(benchmark, large_list_state):
+    """Test updating each item of a list var of dicts.
+
+    Args:
+        benchmark: The benchmark fixture.
+        large_list_state: The state with the list vars.
+    """
+
+    def benchmark_fn():
+        for row in large_list_state.rows:
+            row["value"] += 1
+
+    benchmark(benchmark_fn)
+    assert "rows" in large_list_state.dirty_vars
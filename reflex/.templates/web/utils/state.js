@@ -2,6 +2,7 @@
 import axios from "axios";
 import io from "socket.io-client";
 import JSON5 from "json5";
+import { decode as decodeMsgpack } from "@msgpack/msgpack";
 import env from "/env.json";
 import Cookies from "universal-cookie";
 import { useEffect, useRef, useState } from "react";
@@ -19,6 +20,7 @@ import throttle from "/utils/helpers/throttle";
 // Endpoint URLs.
 const EVENTURL = env.EVENT;
 const UPLOADURL = env.UPLOAD;
+const UPLOADCHUNKEDURL = env.UPLOAD_CHUNKED;
 
 // These hostnames indicate that the backend and frontend are reachable via the same domain.
 const SAME_DOMAIN_HOSTNAMES = ["localhost", "0.0.0.0", "::", "0:0:0:0:0:0:0:0"];
@@ -43,6 +45,12 @@ const event_queue = [];
 // Pending upload promises, by id
 const upload_controllers = {};
 
+// Number of chunks of a file uploaded in parallel.
+const UPLOAD_CHUNK_CONCURRENCY = 4;
+
+// Number of attempts to upload a chunk before giving up (the upload can be resumed later).
+const UPLOAD_CHUNK_ATTEMPTS = 3;
+
 /**
  * Generate a UUID (Used for session tokens).
  * Taken from: https://stackoverflow.com/questions/105034/how-do-i-create-a-guid-uuid
@@ -120,13 +128,57 @@ export const isStateful = () => {
   return event_queue.some(event => event.name.startsWith("reflex___state"));
 }
 
+/**
+ * Apply JSON patch operations (add, replace and remove) to a list or dict var.
+ * The value is copied once, so the var still changes identity for React.
+ * @param value The current value of the var.
+ * @param patch The operations to apply, in order.
+ * @returns The patched value.
+ */
+export const applyPatch = (value, patch) => {
+  const patched = Array.isArray(value) ? [...value] : { ...value };
+  for (const operation of patch) {
+    const key = operation.path
+      .slice(1)
+      .replaceAll("~1", "/")
+      .replaceAll("~0", "~");
+    if (!Array.isArray(patched)) {
+      if (operation.op === "remove") {
+        delete patched[key];
+      } else {
+        // Define an own property, so keys like "__proto__" never change the prototype.
+        Object.defineProperty(patched, key, {
+          value: operation.value,
+          writable: true,
+          enumerable: true,
+          configurable: true,
+        });
+      }
+    } else if (operation.op === "remove") {
+      patched.splice(Number(key), 1);
+    } else if (operation.op === "replace") {
+      patched[Number(key)] = operation.value;
+    } else if (key === "-") {
+      patched.push(operation.value);
+    } else {
+      patched.splice(Number(key), 0, operation.value);
+    }
+  }
+  return patched;
+};
+
 /**
  * Apply a delta to the state.
  * @param state The state to apply the delta to.
  * @param delta The delta to apply.
  */
 export const applyDelta = (state, delta) => {
-  return { ...state, ...delta };
+  const { $patch: patches, ...values } = delta;
+  const new_state = { ...state, ...values };
+  for (const var_name in patches) {
+    new_state[var_name] = applyPatch(state[var_name], patches[var_name]);
+  }
+  return new_state;
 };
 
 /**
@@ -255,29 +307,51 @@ export const applyEvent = async (event, socket) => {
     return false;
   }
 
-  // Update token and router data (if missing).
-  event.token = getToken();
-  if (
-    event.router_data === undefined ||
-    Object.keys(event.router_data).length === 0
-  ) {
-    event.router_data = (({ pathname, query, asPath }) => ({
-      pathname,
-      query,
-      asPath,
-    }))(Router);
-  }
-
   // Send the event to the server.
-  if (socket) {
-    socket.emit(
-      "event",
-      JSON.stringify(event, (k, v) => (v === undefined ? null : v))
-    );
-    return true;
-  }
+  return emitEvents([event], socket);
+};
+
+/**
+ * Whether an event is handled by the backend via Websocket.
+ * @param event The event to check.
+ *
+ * @returns True if the event is sent over the websocket.
+ */
+const isBackendEvent = (event) =>
+  !event.handler && !event.name.startsWith("_");
 
-  return false;
+/**
+ * Send backend events to the server via Websocket, in a single message.
+ * @param events The events to send.
+ * @param socket The socket object to send the events on.
+ *
+ * @returns True if the events were sent.
+ */
+const emitEvents = (events, socket) => {
+  if (!socket) {
+    return false;
+  }
+  for (const event of events) {
+    // Update token and router data (if missing).
+    event.token = getToken();
+    if (
+      event.router_data === undefined ||
+      Object.keys(event.router_data).length === 0
+    ) {
+      event.router_data = (({ pathname, query, asPath }) => ({
+        pathname,
+        query,
+        asPath,
+      }))(Router);
+    }
+  }
+  socket.emit(
+    "event",
+    JSON.stringify(events.length === 1 ? events[0] : events, (k, v) =>
+      v === undefined ? null : v
+    )
+  );
+  return true;
 };
 
 /**
@@ -302,7 +376,8 @@ export const applyRestEvent = async (event, socket) => {
       event.payload.files,
       event.payload.upload_id,
       event.payload.on_upload_progress,
-      socket
+      socket,
+      event.payload.chunk_size
     );
     return false;
   }
@@ -344,6 +419,13 @@ export const processEvent = async (socket) => {
   // Process events with handlers via REST and all others via websockets.
   if (event.handler) {
     eventSent = await applyRestEvent(event, socket);
+  } else if (isBackendEvent(event)) {
+    // Send the following backend events along, so the backend processes them in one go.
+    const events = [event];
+    while (event_queue.length > 0 && isBackendEvent(event_queue[0])) {
+      events.push(event_queue.shift());
+    }
+    eventSent = emitEvents(events, socket);
   } else {
     eventSent = await applyEvent(event, socket);
   }
@@ -379,6 +461,8 @@ export const connect = async (
     path: endpoint["pathname"],
     transports: transports,
     autoUnref: false,
+    // Updates are sent as binary MessagePack frames when the backend supports it.
+    auth: { encodings: ["msgpack"] },
   });
 
   function checkVisibility() {
@@ -417,7 +501,8 @@ export const connect = async (
 
   // On each received message, queue the updates and events.
   socket.current.on("event", (message) => {
-    const update = JSON5.parse(message);
+    const update =
+      typeof message === "string" ? JSON5.parse(message) : decodeMsgpack(message);
     for (const substate in update.delta) {
       dispatch[substate](update.delta[substate]);
     }
@@ -431,6 +516,160 @@ export const connect = async (
   document.addEventListener("visibilitychange", checkVisibility);
 };
 
+/**
+ * Get a function applying the state updates streamed in an upload response.
+ *
+ * @param socket the websocket connection
+ *
+ * @returns The onDownloadProgress handler of the upload request.
+ */
+const streamUploadUpdates = (socket) => {
+  let resp_idx = 0;
+  return (progressEvent) => {
+    // handle any delta / event streamed from the upload event handler
+    const chunks = progressEvent.event.target.responseText.trim().split("\n");
+    chunks.slice(resp_idx).map((chunk) => {
+      try {
+        socket._callbacks.$event.map((f) => {
+          f(chunk);
+        });
+        resp_idx += 1;
+      } catch (e) {
+        if (progressEvent.progress === 1) {
+          // Chunk may be incomplete, so only report errors when full response is available.
+          console.log("Error parsing chunk", chunk, e);
+        }
+        return;
+      }
+    });
+  };
+};
+
+/**
+ * Get the SHA-256 hex digest of some data, if the browser supports it.
+ *
+ * @param data The data to hash.
+ *
+ * @returns The hex digest, or null in insecure contexts without crypto.subtle.
+ */
+const sha256Hex = async (data) => {
+  if (typeof window === "undefined" || !window.crypto?.subtle) {
+    return null;
+  }
+  const digest = await window.crypto.subtle.digest("SHA-256", data);
+  return Array.from(new Uint8Array(digest))
+    .map((b) => b.toString(16).padStart(2, "0"))
+    .join("");
+};
+
+/**
+ * Upload files to the server in chunks, then process them with the handler.
+ *
+ * Chunks already received by the server (from an interrupted upload of the same
+ * files) are skipped, and the chunks of a file are uploaded in parallel.
+ *
+ * @param handler The handler to use.
+ * @param files The files to upload.
+ * @param chunk_size The size of the chunks in bytes.
+ * @param on_upload_progress The function to call on upload progress.
+ * @param socket the websocket connection
+ * @param controller The AbortController of the upload.
+ *
+ * @returns The response from posting to the commit endpoint.
+ */
+const uploadFilesChunked = async (
+  handler,
+  files,
+  chunk_size,
+  on_upload_progress,
+  socket,
+  controller
+) => {
+  const url = getBackendURL(UPLOADCHUNKEDURL);
+  const headers = {
+    "Reflex-Client-Token": getToken(),
+    "Reflex-Event-Handler": handler,
+  };
+  const total = files.reduce((size, file) => size + file.size, 0);
+  let loaded = 0;
+  const reportProgress = () => {
+    if (on_upload_progress) {
+      on_upload_progress({ loaded, total, progress: total ? loaded / total : 1 });
+    }
+  };
+
+  const file_ids = [];
+  for (const file of files) {
+    const filename = file.path || file.name;
+    // The same file uploaded again with the same handler resumes the upload.
+    const file_id = [handler, filename, file.size, file.lastModified].join(":");
+    const init = await axios.post(
+      `${url}/init`,
+      { file_id, filename, size: file.size, content_type: file.type || null },
+      { headers, signal: controller.signal }
+    );
+    const received = init.data.chunks;
+
+    const pending = [];
+    for (let offset = 0; offset < file.size; offset += chunk_size) {
+      const length = Math.min(chunk_size, file.size - offset);
+      if (received[offset] === length) {
+        loaded += length;
+      } else {
+        pending.push([offset, length]);
+      }
+    }
+    reportProgress();
+
+    const uploadChunks = async () => {
+      while (pending.length > 0) {
+        const [offset, length] = pending.shift();
+        const chunk = file.slice(offset, offset + length);
+        const chunk_headers = {
+          ...headers,
+          "Content-Type": "application/octet-stream",
+        };
+        const checksum = await sha256Hex(await chunk.arrayBuffer());
+        if (checksum) {
+          chunk_headers["Reflex-Chunk-Checksum"] = checksum;
+        }
+        for (let attempt = 1; ; attempt++) {
+          try {
+            await axios.put(url, chunk, {
+              headers: chunk_headers,
+              params: { file_id, offset },
+              signal: controller.signal,
+            });
+            break;
+          } catch (error) {
+            if (attempt >= UPLOAD_CHUNK_ATTEMPTS || controller.signal.aborted) {
+              throw error;
+            }
+            await new Promise((resolve) => setTimeout(resolve, 500 * attempt));
+          }
+        }
+        loaded += length;
+        reportProgress();
+      }
+    };
+    await Promise.all(
+      Array.from({ length: UPLOAD_CHUNK_CONCURRENCY }, uploadChunks)
+    );
+    file_ids.push(file_id);
+  }
+
+  // Process the assembled files with the handler.
+  return await axios.post(
+    `${url}/commit`,
+    { file_ids },
+    {
+      headers,
+      signal: controller.signal,
+      onDownloadProgress: streamUploadUpdates(socket),
+    }
+  );
+};
+
 /**
  * Upload files to the server.
  *
@@ -439,6 +678,7 @@ export const connect = async (
  * @param upload_id The upload id to use.
  * @param on_upload_progress The function to call on upload progress.
  * @param socket the websocket connection
+ * @param chunk_size Upload the files in resumable chunks of this many bytes (optional).
  *
  * @returns The response from posting to the UPLOADURL endpoint.
  */
@@ -447,7 +687,8 @@ export const uploadFiles = async (
   files,
   upload_id,
   on_upload_progress,
-  socket
+  socket,
+  chunk_size = null
 ) => {
   // return if there's no file to upload
   if (files === undefined || files.length === 0) {
@@ -459,26 +700,6 @@ export const uploadFiles = async (
     return false;
   }
 
-  let resp_idx = 0;
-  const eventHandler = (progressEvent) => {
-    // handle any delta / event streamed from the upload event handler
-    const chunks = progressEvent.event.target.responseText.trim().split("\n");
-    chunks.slice(resp_idx).map((chunk) => {
-      try {
-        socket._callbacks.$event.map((f) => {
-          f(chunk);
-        });
-        resp_idx += 1;
-      } catch (e) {
-        if (progressEvent.progress === 1) {
-          // Chunk may be incomplete, so only report errors when full response is available.
-          console.log("Error parsing chunk", chunk, e);
-        }
-        return;
-      }
-    });
-  };
-
   const controller = new AbortController();
   const config = {
     headers: {
@@ -486,22 +707,34 @@ export const uploadFiles = async (
       "Reflex-Event-Handler": handler,
     },
     signal: controller.signal,
-    onDownloadProgress: eventHandler,
+    onDownloadProgress: streamUploadUpdates(socket),
   };
   if (on_upload_progress) {
     config["onUploadProgress"] = on_upload_progress;
   }
-  const formdata = new FormData();
-
-  // Add the token and handler to the file name.
-  files.forEach((file) => {
-    formdata.append("files", file, file.path || file.name);
-  });
 
   // Send the file to the server.
   upload_controllers[upload_id] = controller;
 
   try {
+    if (chunk_size) {
+      return await uploadFilesChunked(
+        handler,
+        files,
+        chunk_size,
+        on_upload_progress,
+        socket,
+        controller
+      );
+    }
+
+    const formdata = new FormData();
+
+    // Add the token and handler to the file name.
+    files.forEach((file) => {
+      formdata.append("files", file, file.path || file.name);
+    });
+
     return await axios.post(getBackendURL(UPLOADURL), formdata, config);
   } catch (error) {
     if (error.response) {
@@ -7,16 +7,23 @@ import concurrent.futures
 import contextlib
 import copy
 import functools
+import hashlib
 import inspect
 import io
+import json
 import multiprocessing
 import os
 import platform
+import shutil
 import sys
+import tempfile
+import time
 import traceback
+import uuid
 from datetime import datetime
 from pathlib import Path
 from typing import (
+    IO,
     Any,
     AsyncIterator,
     Callable,
@@ -25,6 +32,7 @@ from typing import (
     List,
     Optional,
     Set,
+    Tuple,
     Type,
     Union,
     get_args,
@@ -37,6 +45,8 @@ from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from rich.progress import MofNCompleteColumn, Progress, TimeElapsedColumn
 from socketio import ASGIApp, AsyncNamespace, AsyncServer
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
 from starlette_admin.contrib.sqla.admin import Admin
 from starlette_admin.contrib.sqla.view import ModelView
 
@@ -79,6 +89,8 @@ from reflex.state import (
     RouterData,
     State,
     StateManager,
+    StateManagerMemory,
+    StateManagerSQLite,
     StateUpdate,
     _substate_key,
     code_uses_state_contexts,
@@ -86,6 +98,7 @@ from reflex.state import (
 from reflex.utils import codespaces, console, exceptions, format, prerequisites, types
 from reflex.utils.exec import is_prod_mode, is_testing_env, should_skip_compile
 from reflex.utils.imports import ImportVar
+from reflex.vars import _shutdown_process_pool
 
 # Define custom types.
 ComponentCallable = Callable[[], Component]
@@ -320,8 +333,16 @@ class App(MiddlewareMixin, LifespanMixin, Base):
 
         config = get_config()
 
+        # Set the state options read from the config on the state tree.
+        self.state._init_state_options()
+
         # Set up the state manager.
         self._state_manager = StateManager.create(state=self.state)
+        # Stop the worker processes of the computed vars with the app.
+        self.register_lifespan_task(_shutdown_process_pool)
+        if isinstance(self._state_manager, (StateManagerMemory, StateManagerSQLite)):
+            # Evict the states of expired clients for the lifespan of the app.
+            self.register_lifespan_task(self._state_manager._sweep_states)
 
         # Set up the Socket.IO AsyncServer.
         if not self.sio:
@@ -384,6 +405,12 @@ class App(MiddlewareMixin, LifespanMixin, Base):
         if Upload.is_used:
             self.api.post(str(constants.Endpoint.UPLOAD))(upload(self))
 
+            # To upload files in chunks.
+            upload_chunked = str(constants.Endpoint.UPLOAD_CHUNKED)
+            self.api.post(f"{upload_chunked}/init")(upload_chunked_init(self))
+            self.api.put(upload_chunked)(upload_chunked_chunk(self))
+            self.api.post(f"{upload_chunked}/commit")(upload_chunked_commit(self))
+
             # To access uploaded files.
             self.api.mount(
                 str(constants.Endpoint.UPLOAD),
@@ -1091,6 +1118,7 @@ class App(MiddlewareMixin, LifespanMixin, Base):
         async with self.state_manager.modify_state(token) as state:
             # No other event handler can modify the state while in this context.
             yield state
+            await state._resolve_deferred_computed_vars()
             delta = state.get_delta()
             if delta:
                 # When the state is modified reset dirty status and emit the delta to the frontend.
@@ -1240,13 +1268,17 @@ class App(MiddlewareMixin, LifespanMixin, Base):
 
 
 async def process(
-    app: App, event: Event, sid: str, headers: Dict, client_ip: str
+    app: App, event: Event | List[Event], sid: str, headers: Dict, client_ip: str
 ) -> AsyncIterator[StateUpdate]:
-    """Process an event.
+    """Process an event, or a batch of events sent in a single message.
+
+    Consecutive events of a batch targeting the same substate are processed while
+    holding the state lock once, and their updates are merged into as few updates as
+    possible.
 
     Args:
         app: The app to process the event for.
-        event: The event to process.
+        event: The event, or list of events, to process.
         sid: The Socket.IO session id.
         headers: The client headers.
         client_ip: The client_ip.
@@ -1259,48 +1291,34 @@ async def process(
     """
     from reflex.utils import telemetry
 
+    events = event if isinstance(event, list) else [event]
+    # The update waiting to be merged with the first update of the next event.
+    pending: StateUpdate | None = None
     try:
-        # Add request data to the state.
-        router_data = event.router_data
-        router_data.update(
-            {
-                constants.RouteVar.QUERY: format.format_query_params(event.router_data),
-                constants.RouteVar.CLIENT_TOKEN: event.token,
-                constants.RouteVar.SESSION_ID: sid,
-                constants.RouteVar.HEADERS: headers,
-                constants.RouteVar.CLIENT_IP: client_ip,
-            }
-        )
-        # Get the state for the session exclusively.
-        async with app.state_manager.modify_state(event.substate_token) as state:
-            # re-assign only when the value is different
-            if state.router_data != router_data:
-                # assignment will recurse into substates and force recalculation of
-                # dependent ComputedVar (dynamic route variables)
-                state.router_data = router_data
-                state.router = RouterData(router_data)
-
-            # Preprocess the event.
-            update = await app._preprocess(state, event)
-
-            # If there was an update, yield it.
-            if update is not None:
-                yield update
-
-            # Only process the event if there is no update.
-            else:
-                if app._process_background(state, event) is not None:
-                    # `final=True` allows the frontend send more events immediately.
-                    yield StateUpdate(final=True)
-                    return
-
-                # Process the event synchronously.
-                async for update in state._process(event):
-                    # Postprocess the event.
-                    update = await app._postprocess(state, event, update)
-
-                    # Yield the update.
-                    yield update
+        for group in _group_events_by_substate(events):
+            # Get the state for the session exclusively.
+            async with app.state_manager.modify_state(group[0].substate_token) as state:
+                for event in group:
+                    is_last = event is events[-1]
+                    async for update in _process_event(
+                        app, state, event, sid, headers, client_ip
+                    ):
+                        if pending is not None:
+                            merged = _merge_state_updates(pending, update)
+                            if merged is None:
+                                yield pending
+                            else:
+                                update = merged
+                            pending = None
+                        if is_last:
+                            yield update
+                        else:
+                            # Intermediate events of a batch never end the processing.
+                            update.final = False
+                            pending = update
+        if pending is not None:
+            pending.final = True
+            yield pending
     except Exception as ex:
         telemetry.send_error(ex, context="backend")
 
@@ -1308,6 +1326,123 @@ async def process(
         raise
 
 
+def _group_events_by_substate(events: List[Event]) -> List[List[Event]]:
+    """Split a batch of events into runs of consecutive events with the same substate.
+
+    Args:
+        events: The events to group.
+
+    Returns:
+        The groups of events, in order.
+    """
+    groups = []
+    for event in events:
+        if groups and groups[-1][0].substate_token == event.substate_token:
+            groups[-1].append(event)
+        else:
+            groups.append([event])
+    return groups
+
+
+async def _process_event(
+    app: App,
+    state: BaseState,
+    event: Event,
+    sid: str,
+    headers: Dict,
+    client_ip: str,
+) -> AsyncIterator[StateUpdate]:
+    """Process an event in a state which is already locked.
+
+    Args:
+        app: The app to process the event for.
+        state: The state of the session.
+        event: The event to process.
+        sid: The Socket.IO session id.
+        headers: The client headers.
+        client_ip: The client_ip.
+
+    Yields:
+        The state updates after processing the event.
+    """
+    # Add request data to the state.
+    router_data = event.router_data
+    router_data.update(
+        {
+            constants.RouteVar.QUERY: format.format_query_params(event.router_data),
+            constants.RouteVar.CLIENT_TOKEN: event.token,
+            constants.RouteVar.SESSION_ID: sid,
+            constants.RouteVar.HEADERS: headers,
+            constants.RouteVar.CLIENT_IP: client_ip,
+        }
+    )
+    # re-assign only when the value is different
+    if state.router_data != router_data:
+        # assignment will recurse into substates and force recalculation of
+        # dependent ComputedVar (dynamic route variables)
+        state.router_data = router_data
+        state.router = RouterData(router_data)
+
+    # Preprocess the event.
+    update = await app._preprocess(state, event)
+
+    # If there was an update, yield it.
+    if update is not None:
+        yield update
+
+    # Only process the event if there is no update.
+    else:
+        if app._process_background(state, event) is not None:
+            # `final=True` allows the frontend send more events immediately.
+            yield StateUpdate(final=True)
+            return
+
+        # Process the event synchronously.
+        async for update in state._process(event):
+            # Postprocess the event.
+            update = await app._postprocess(state, event, update)
+
+            # Yield the update.
+            yield update
+
+
+def _merge_state_updates(first: StateUpdate, second: StateUpdate) -> StateUpdate | None:
+    """Merge two consecutive state updates into one.
+
+    Values of the second update replace those of the first one, and the patches of a
+    var sent by both are concatenated.
+
+    Args:
+        first: The update sent first.
+        second: The update sent next.
+
+    Returns:
+        The merged update, or None if the second update patches a var whose value is
+        sent by the first one, so they must be applied one after the other.
+    """
+    patch_key = constants.CompileVars.DELTA_PATCH
+    delta = {substate: dict(subdelta) for substate, subdelta in first.delta.items()}
+    for substate, subdelta in second.delta.items():
+        merged = delta.setdefault(substate, {})
+        values = {var: value for var, value in subdelta.items() if var != patch_key}
+        patches = subdelta.get(patch_key, {})
+        if any(var in merged for var in patches):
+            return None
+        merged_patches = dict(merged.pop(patch_key, {}))
+        for var in values:
+            merged_patches.pop(var, None)
+        for var, patch in patches.items():
+            merged_patches[var] = merged_patches.get(var, []) + patch
+        merged.update(values)
+        if merged_patches:
+            merged[patch_key] = merged_patches
+    return StateUpdate(
+        delta=delta,
+        events=first.events + second.events,
+        final=second.final,
+    )
+
+
 async def ping() -> str:
     """Test API endpoint.
 
@@ -1317,6 +1452,148 @@ async def ping() -> str:
     return "pong"
 
 
+# Uploaded files are copied by chunks of this many bytes.
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+async def _copy_upload_file(file: UploadFile, max_memory_size: int | None) -> IO[bytes]:
+    """Copy an uploaded file, so it outlives the request.
+
+    Args:
+        file: The uploaded file.
+        max_memory_size: The number of bytes of the copy to keep in memory before
+            spooling it to a temporary file on disk (None to keep all of it in memory).
+
+    Returns:
+        The copy, positioned at its start.
+    """
+    if max_memory_size is None:
+        content_copy = io.BytesIO()
+    elif max_memory_size > 0:
+        content_copy = tempfile.SpooledTemporaryFile(max_size=max_memory_size)
+    else:
+        content_copy = tempfile.TemporaryFile()
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        content_copy.write(chunk)
+    content_copy.seek(0)
+    return content_copy  # type: ignore
+
+
+async def _get_upload_handler_param(
+    app: App, token: str | None, handler: str | None
+) -> str:
+    """Get the name of the upload handler parameter receiving the files.
+
+    Args:
+        app: The app to upload the files for.
+        token: The client token.
+        handler: The full name of the upload handler.
+
+    Returns:
+        The name of the parameter annotated as List[rx.UploadFile].
+
+    Raises:
+        UploadValueError: if there are no args with supported annotation.
+        UploadTypeError: if a background task is used as the handler.
+        HTTPException: when the request does not include token / handler headers.
+    """
+    from reflex.utils.exceptions import UploadTypeError, UploadValueError
+
+    if not token or not handler:
+        raise HTTPException(
+            status_code=400,
+            detail="Missing reflex-client-token or reflex-event-handler header.",
+        )
+
+    # Get the state for the session.
+    substate_token = _substate_key(token, handler.rpartition(".")[0])
+    state = await app.state_manager.get_state(substate_token)
+
+    # get the current session ID
+    # get the current state(parent state/substate)
+    path = handler.split(".")[:-1]
+    current_state = state.get_substate(path)
+
+    # get handler function
+    func = getattr(type(current_state), handler.split(".")[-1])
+
+    # check if there exists any handler args with annotation, List[UploadFile]
+    if isinstance(func, EventHandler):
+        if func.is_background:
+            raise UploadTypeError(
+                f"@rx.background is not supported for upload handler `{handler}`.",
+            )
+        func = func.fn
+    if isinstance(func, functools.partial):
+        func = func.func
+    for k, v in get_type_hints(func).items():
+        if types.is_generic_alias(v) and types._issubclass(
+            get_args(v)[0],
+            UploadFile,
+        ):
+            return k
+
+    raise UploadValueError(
+        f"`{handler}` handler should have a parameter annotated as "
+        "List[rx.UploadFile]"
+    )
+
+
+def _process_upload(
+    app: App,
+    token: str,
+    handler: str,
+    param: str,
+    files: List[UploadFile],
+    cleanup: Callable[[], None] | None = None,
+) -> StreamingResponse:
+    """Process the upload event for the uploaded files.
+
+    Args:
+        app: The app to upload the files for.
+        token: The client token.
+        handler: The full name of the upload handler.
+        param: The name of the handler parameter receiving the files.
+        files: The uploaded files, closed once the handler has finished.
+        cleanup: A function called (in a worker thread) once the handler has finished.
+
+    Returns:
+        StreamingResponse yielding newline-delimited JSON of StateUpdate
+        emitted by the upload handler.
+    """
+    event = Event(
+        token=token,
+        name=handler,
+        payload={param: files},
+    )
+
+    async def _ndjson_updates():
+        """Process the upload event, generating ndjson updates.
+
+        Yields:
+            Each state update as JSON followed by a new line.
+        """
+        try:
+            # Process the event.
+            async with app.state_manager.modify_state(event.substate_token) as state:
+                async for update in state._process(event):
+                    # Postprocess the event.
+                    update = await app._postprocess(state, event, update)
+                    yield update.json() + "\n"
+        finally:
+            # Remove the files spooled to disk.
+            for file in files:
+                file.file.close()
+            if cleanup is not None:
+                await run_in_threadpool(cleanup)
+
+    # Stream updates to client
+    return StreamingResponse(
+        _ndjson_updates(),
+        media_type="application/x-ndjson",
+    )
+
+
 def upload(app: App):
     """Upload a file.
 
@@ -1337,69 +1614,26 @@ def upload(app: App):
         Returns:
             StreamingResponse yielding newline-delimited JSON of StateUpdate
             emitted by the upload handler.
-
-        Raises:
-            UploadValueError: if there are no args with supported annotation.
-            UploadTypeError: if a background task is used as the handler.
-            HTTPException: when the request does not include token / handler headers.
         """
-        from reflex.utils.exceptions import UploadTypeError, UploadValueError
-
         token = request.headers.get("reflex-client-token")
         handler = request.headers.get("reflex-event-handler")
-
-        if not token or not handler:
-            raise HTTPException(
-                status_code=400,
-                detail="Missing reflex-client-token or reflex-event-handler header.",
-            )
-
-        # Get the state for the session.
-        substate_token = _substate_key(token, handler.rpartition(".")[0])
-        state = await app.state_manager.get_state(substate_token)
-
-        # get the current session ID
-        # get the current state(parent state/substate)
-        path = handler.split(".")[:-1]
-        current_state = state.get_substate(path)
-        handler_upload_param = ()
-
-        # get handler function
-        func = getattr(type(current_state), handler.split(".")[-1])
-
-        # check if there exists any handler args with annotation, List[UploadFile]
-        if isinstance(func, EventHandler):
-            if func.is_background:
-                raise UploadTypeError(
-                    f"@rx.background is not supported for upload handler `{handler}`.",
-                )
-            func = func.fn
-        if isinstance(func, functools.partial):
-            func = func.func
-        for k, v in get_type_hints(func).items():
-            if types.is_generic_alias(v) and types._issubclass(
-                get_args(v)[0],
-                UploadFile,
-            ):
-                handler_upload_param = (k, v)
-                break
-
-        if not handler_upload_param:
-            raise UploadValueError(
-                f"`{handler}` handler should have a parameter annotated as "
-                "List[rx.UploadFile]"
-            )
+        param = await _get_upload_handler_param(app, token, handler)
 
         # Make a copy of the files as they are closed after the request.
         # This behaviour changed from fastapi 0.103.0 to 0.103.1 as the
         # AsyncExitStack was removed from the request scope and is now
         # part of the routing function which closes this before the
         # event is handled.
+        # The files of the request share the memory limit, the rest is spooled to disk.
+        memory_left = get_config().upload_max_memory_size
         file_copies = []
         for file in files:
-            content_copy = io.BytesIO()
-            content_copy.write(await file.read())
-            content_copy.seek(0)
+            content_copy = await _copy_upload_file(file, memory_left)
+            if memory_left is not None:
+                size = content_copy.seek(0, os.SEEK_END)
+                content_copy.seek(0)
+                if size <= memory_left:
+                    memory_left -= size
             file_copies.append(
                 UploadFile(
                     file=content_copy,
@@ -1409,32 +1643,354 @@ def upload(app: App):
                 )
             )
 
-        event = Event(
-            token=token,
-            name=handler,
-            payload={handler_upload_param[0]: file_copies},
+        return _process_upload(app, token, handler, param, file_copies)  # type: ignore
+
+    return upload_file
+
+
+# Chunked uploads are stored until they are committed in a sibling of the upload dir
+# with this suffix, outside of the upload dir which is served publicly.
+CHUNKED_UPLOADS_DIR_SUFFIX = "_chunked"
+
+# Chunked uploads which were not committed are removed after this many seconds.
+CHUNKED_UPLOAD_EXPIRATION = 24 * 60 * 60
+
+
+def _get_chunked_uploads_dir() -> Path:
+    """Get the directory storing the files uploaded in chunks until they are committed.
+
+    Returns:
+        The directory of the chunked uploads.
+    """
+    upload_dir = get_upload_dir().resolve()
+    return upload_dir.with_name(f".{upload_dir.name}{CHUNKED_UPLOADS_DIR_SUFFIX}")
+
+
+def _get_chunked_upload_dir(token: str | None, file_id: str) -> Path:
+    """Get the directory storing the chunks of a file uploaded in chunks.
+
+    The directory name is derived from the client token, so a client cannot access
+    the uploads of another client.
+
+    Args:
+        token: The client token.
+        file_id: The id given to the file by the client.
+
+    Returns:
+        The directory of the chunked upload.
+
+    Raises:
+        HTTPException: when the request does not include the token header.
+    """
+    if not token:
+        raise HTTPException(
+            status_code=400, detail="Missing reflex-client-token header."
         )
+    key = hashlib.sha256(f"{token}\0{file_id}".encode()).hexdigest()
+    return _get_chunked_uploads_dir() / key
 
-        async def _ndjson_updates():
-            """Process the upload event, generating ndjson updates.
 
-            Yields:
-                Each state update as JSON followed by a new line.
-            """
-            # Process the event.
-            async with app.state_manager.modify_state(event.substate_token) as state:
-                async for update in state._process(event):
-                    # Postprocess the event.
-                    update = await app._postprocess(state, event, update)
-                    yield update.json() + "\n"
+def _get_chunked_upload_parts(upload_dir: Path) -> Dict[int, Path]:
+    """Get the chunks of a file received so far.
+
+    Args:
+        upload_dir: The directory of the chunked upload.
+
+    Returns:
+        A mapping of chunk offset to the file holding the chunk.
+    """
+    return {int(part.stem): part for part in upload_dir.glob("*.part")}
+
+
+def _remove_expired_chunked_uploads():
+    """Remove the chunked uploads which were not committed in time."""
+    expired = time.time() - CHUNKED_UPLOAD_EXPIRATION
+    chunked_uploads_dir = _get_chunked_uploads_dir()
+    if not chunked_uploads_dir.is_dir():
+        return
+    for upload_dir in chunked_uploads_dir.iterdir():
+        with contextlib.suppress(OSError):
+            if upload_dir.stat().st_mtime < expired:
+                shutil.rmtree(upload_dir)
+
+
+def _init_chunked_upload(upload_dir: Path, meta: Dict[str, Any]) -> Dict[int, int]:
+    """Create or resume the directory of a chunked upload.
+
+    Args:
+        upload_dir: The directory of the chunked upload.
+        meta: The description of the uploaded file.
+
+    Returns:
+        The size of the chunks already received, by offset.
+    """
+    meta_path = upload_dir / "meta.json"
+    if meta_path.exists() and json.loads(meta_path.read_text()) != meta:
+        # Another file was uploaded with this id, start over.
+        shutil.rmtree(upload_dir)
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    meta_path.write_text(json.dumps(meta))
+    return {
+        offset: part.stat().st_size
+        for offset, part in _get_chunked_upload_parts(upload_dir).items()
+    }
+
+
+def _read_chunked_upload_meta(upload_dir: Path) -> Dict[str, Any]:
+    """Read the description of the file of a chunked upload.
+
+    Args:
+        upload_dir: The directory of the chunked upload.
+
+    Returns:
+        The description given when the upload was started.
+
+    Raises:
+        HTTPException: when the upload was not started.
+    """
+    meta_path = upload_dir / "meta.json"
+    if not meta_path.exists():
+        raise HTTPException(status_code=404, detail="Unknown upload.")
+    return json.loads(meta_path.read_text())
+
+
+def _check_chunked_upload(
+    upload_dir: Path,
+) -> Tuple[Dict[str, Any], Dict[int, Path]]:
+    """Check that all the chunks of a file were received.
+
+    Args:
+        upload_dir: The directory of the chunked upload.
+
+    Returns:
+        The description of the file and its chunks, by offset.
+
+    Raises:
+        HTTPException: when a chunk is missing.
+    """
+    meta = _read_chunked_upload_meta(upload_dir)
+    parts = _get_chunked_upload_parts(upload_dir)
+    position = 0
+    while position < meta["size"]:
+        if position not in parts:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Missing chunk at offset {position} of {meta['filename']}.",
+            )
+        position += parts[position].stat().st_size
+    return meta, parts
+
+
+def _assemble_chunked_upload(
+    upload_dir: Path, size: int, parts: Dict[int, Path]
+) -> IO[bytes]:
+    """Assemble the chunks of a file in the directory of its chunked upload.
+
+    Args:
+        upload_dir: The directory of the chunked upload.
+        size: The size of the file.
+        parts: The chunks of the file, by offset.
+
+    Returns:
+        The assembled file, open for reading.
+    """
+    file_path = upload_dir / "file"
+    with file_path.open("wb") as file:
+        position = 0
+        while position < size:
+            with parts[position].open("rb") as part:
+                shutil.copyfileobj(part, file)
+            parts.pop(position).unlink()
+            position = file.tell()
+    return file_path.open("rb")
+
+
+class ChunkedUploadInit(Base):
+    """A request to start or resume uploading a file in chunks."""
+
+    # The id given to the file by the client, the same id resumes the upload.
+    file_id: str
+
+    # The name of the file.
+    filename: str
+
+    # The size of the file in bytes.
+    size: int
+
+    # The content type of the file.
+    content_type: Optional[str] = None
+
+
+class ChunkedUploadCommit(Base):
+    """A request to process files uploaded in chunks with the upload handler."""
+
+    # The ids of the files, in the order they are passed to the handler.
+    file_ids: List[str]
 
-        # Stream updates to client
-        return StreamingResponse(
-            _ndjson_updates(),
-            media_type="application/x-ndjson",
+
+def upload_chunked_init(app: App):
+    """Start or resume uploading a file in chunks.
+
+    Args:
+        app: The app to upload the file for.
+
+    Returns:
+        The upload init function.
+    """
+
+    async def upload_init(request: Request, body: ChunkedUploadInit):
+        """Start or resume uploading a file in chunks.
+
+        Args:
+            request: The FastAPI request object.
+            body: The file to upload.
+
+        Returns:
+            The size of the chunks already received, by offset.
+
+        Raises:
+            HTTPException: when the file size is invalid.
+        """
+        if body.size < 0:
+            raise HTTPException(status_code=400, detail="Invalid file size.")
+        upload_dir = _get_chunked_upload_dir(
+            request.headers.get("reflex-client-token"), body.file_id
+        )
+        # The file operations run in worker threads, so they never block the event loop.
+        await run_in_threadpool(_remove_expired_chunked_uploads)
+        chunks = await run_in_threadpool(
+            _init_chunked_upload, upload_dir, body.dict(exclude={"file_id"})
         )
+        return {"chunks": chunks}
 
-    return upload_file
+    return upload_init
+
+
+def upload_chunked_chunk(app: App):
+    """Receive a chunk of a file uploaded in chunks.
+
+    Args:
+        app: The app to upload the file for.
+
+    Returns:
+        The upload chunk function.
+    """
+
+    async def upload_chunk(request: Request, file_id: str, offset: int):
+        """Receive a chunk of a file uploaded in chunks.
+
+        The chunk is the raw request body. If the reflex-chunk-checksum header is set,
+        the chunk is only stored if its SHA-256 hex digest matches.
+
+        Args:
+            request: The FastAPI request object.
+            file_id: The id given to the file by the client.
+            offset: The offset of the chunk in the file.
+
+        Returns:
+            The size of the chunk received.
+
+        Raises:
+            HTTPException: when the upload was not started, the chunk exceeds the
+                file size or its checksum does not match.
+        """
+        upload_dir = _get_chunked_upload_dir(
+            request.headers.get("reflex-client-token"), file_id
+        )
+        # The file operations run in worker threads, so they never block the event loop.
+        size = (await run_in_threadpool(_read_chunked_upload_meta, upload_dir))["size"]
+        if offset < 0 or offset >= size:
+            raise HTTPException(status_code=400, detail="Invalid chunk offset.")
+
+        # Write to a temporary file, so an interrupted chunk is never used.
+        tmp_path = upload_dir / f"{offset}.{uuid.uuid4().hex}.tmp"
+        checksum = hashlib.sha256()
+        length = 0
+        try:
+            part = await run_in_threadpool(tmp_path.open, "wb")
+            try:
+                async for data in request.stream():
+                    length += len(data)
+                    if offset + length > size:
+                        raise HTTPException(
+                            status_code=400, detail="Chunk exceeds the file size."
+                        )
+                    checksum.update(data)
+                    await run_in_threadpool(part.write, data)
+            finally:
+                await run_in_threadpool(part.close)
+            if not length:
+                raise HTTPException(status_code=400, detail="Empty chunk.")
+            expected_checksum = request.headers.get("reflex-chunk-checksum")
+            if expected_checksum and expected_checksum.lower() != checksum.hexdigest():
+                raise HTTPException(status_code=400, detail="Chunk checksum mismatch.")
+            await run_in_threadpool(tmp_path.replace, upload_dir / f"{offset}.part")
+        finally:
+            await run_in_threadpool(tmp_path.unlink, missing_ok=True)
+        return {"offset": offset, "size": length}
+
+    return upload_chunk
+
+
+def upload_chunked_commit(app: App):
+    """Process files uploaded in chunks with the upload handler.
+
+    Args:
+        app: The app to upload the files for.
+
+    Returns:
+        The upload commit function.
+    """
+
+    async def upload_commit(request: Request, body: ChunkedUploadCommit):
+        """Assemble the chunks of the files and process them with the upload handler.
+
+        Args:
+            request: The FastAPI request object.
+            body: The files to process.
+
+        Returns:
+            StreamingResponse yielding newline-delimited JSON of StateUpdate
+            emitted by the upload handler.
+
+        Raises:
+            HTTPException: when a file was not completely uploaded.
+        """
+        token = request.headers.get("reflex-client-token")
+        handler = request.headers.get("reflex-event-handler")
+        param = await _get_upload_handler_param(app, token, handler)
+
+        # The file operations run in worker threads, so they never block the event loop.
+        upload_dirs = []
+        for file_id in body.file_ids:
+            upload_dir = _get_chunked_upload_dir(token, file_id)
+            meta, parts = await run_in_threadpool(_check_chunked_upload, upload_dir)
+            upload_dirs.append((upload_dir, meta, parts))
+
+        files = []
+        for upload_dir, meta, parts in upload_dirs:
+            file = await run_in_threadpool(
+                _assemble_chunked_upload, upload_dir, meta["size"], parts
+            )
+            headers = Headers(
+                {"content-type": meta["content_type"]} if meta["content_type"] else {}
+            )
+            files.append(
+                UploadFile(
+                    file=file,
+                    filename=meta["filename"],
+                    size=meta["size"],
+                    headers=headers,
+                )
+            )
+
+        def cleanup():
+            for upload_dir, _, _ in upload_dirs:
+                shutil.rmtree(upload_dir, ignore_errors=True)
+
+        return _process_upload(app, token, handler, param, files, cleanup)  # type: ignore
+
+    return upload_commit
 
 
 class EventNamespace(AsyncNamespace):
@@ -1458,15 +2014,23 @@ class EventNamespace(AsyncNamespace):
         """
         super().__init__(namespace)
         self.app = app
-
-    def on_connect(self, sid, environ):
+        # The updates waiting to be sent to each client, and the tasks flushing them.
+        self._pending_updates: dict[str, StateUpdate] = {}
+        self._flush_tasks: dict[str, asyncio.Task] = {}
+        self._flush_window = get_config().state_update_flush_window
+        # The clients decoding the updates sent as binary MessagePack frames.
+        self._msgpack_sids: set[str] = set()
+
+    def on_connect(self, sid, environ, auth=None):
         """Event for when the websocket is connected.
 
         Args:
             sid: The Socket.IO session id.
             environ: The request information, including HTTP headers.
+            auth: The data sent by the client on connection, like the update encodings it accepts.
         """
-        pass
+        if isinstance(auth, dict) and "msgpack" in auth.get("encodings", []):
+            self._msgpack_sids.add(sid)
 
     def on_disconnect(self, sid):
         """Event for when the websocket disconnects.
@@ -1477,19 +2041,78 @@ class EventNamespace(AsyncNamespace):
         disconnect_token = self.sid_to_token.pop(sid, None)
         if disconnect_token:
             self.token_to_sid.pop(disconnect_token, None)
+        self._msgpack_sids.discard(sid)
+        self._pending_updates.pop(sid, None)
+        flush_task = self._flush_tasks.pop(sid, None)
+        if flush_task is not None:
+            flush_task.cancel()
 
     async def emit_update(self, update: StateUpdate, sid: str) -> None:
         """Emit an update to the client.
 
+        With a flush window, the update is merged with the other updates sent to the
+        client within the window, and sent when the window ends or with a final update.
+
+        Args:
+            update: The state update to send.
+            sid: The Socket.IO session id.
+        """
+        if self._flush_window <= 0:
+            await self._emit(update, sid)
+            return
+
+        pending = self._pending_updates.get(sid)
+        if pending is not None:
+            merged = _merge_state_updates(pending, update)
+            if merged is None:
+                # The pending update must be applied before this one.
+                await self._flush_updates(sid)
+            else:
+                update = merged
+        self._pending_updates[sid] = update
+        if update.final:
+            await self._flush_updates(sid)
+        elif sid not in self._flush_tasks:
+            self._flush_tasks[sid] = asyncio.create_task(self._flush_updates_later(sid))
+
+    async def _emit(self, update: StateUpdate, sid: str) -> None:
+        """Send an update to the client.
+
         Args:
             update: The state update to send.
             sid: The Socket.IO session id.
         """
+        # Clients which can decode them get binary frames, and the others JSON.
+        data = update.msgpack() if sid in self._msgpack_sids else None
+        if data is None:
+            data = update.json()
         # Creating a task prevents the update from being blocked behind other coroutines.
         await asyncio.create_task(
-            self.emit(str(constants.SocketEvent.EVENT), update.json(), to=sid)
+            self.emit(str(constants.SocketEvent.EVENT), data, to=sid)
         )
 
+    async def _flush_updates(self, sid: str) -> None:
+        """Send the pending update of a client.
+
+        Args:
+            sid: The Socket.IO session id.
+        """
+        flush_task = self._flush_tasks.pop(sid, None)
+        if flush_task is not None and flush_task is not asyncio.current_task():
+            flush_task.cancel()
+        update = self._pending_updates.pop(sid, None)
+        if update is not None:
+            await self._emit(update, sid)
+
+    async def _flush_updates_later(self, sid: str) -> None:
+        """Send the pending update of a client when the flush window ends.
+
+        Args:
+            sid: The Socket.IO session id.
+        """
+        await asyncio.sleep(self._flush_window)
+        await self._flush_updates(sid)
+
     async def on_event(self, sid, data):
         """Event for receiving front-end websocket events.
 
@@ -1497,11 +2120,18 @@ class EventNamespace(AsyncNamespace):
             sid: The Socket.IO session id.
             data: The event data.
         """
-        # Get the event.
-        event = Event.parse_raw(data)
+        # Get the event, or the batch of events queued by the client.
+        if data.lstrip().startswith("["):
+            event = [Event.parse_obj(obj) for obj in json.loads(data)]
+            if not event:
+                return
+            token = event[0].token
+        else:
+            event = Event.parse_raw(data)
+            token = event.token
 
-        self.token_to_sid[event.token] = sid
-        self.sid_to_token[sid] = event.token
+        self.token_to_sid[token] = sid
+        self.sid_to_token[sid] = token
 
         # Get the event environment.
         assert self.app.sio is not None
@@ -225,6 +225,42 @@ class Config(Base):
     # Token expiration time for redis state manager
     redis_token_expiration: int = constants.Expiration.TOKEN
 
+    # Path of a SQLite database storing the states when redis is not used, so several backend workers can share them on a single host
+    state_db_path: Optional[str] = None
+
+    # Maximum number of client states kept by the memory state manager, least recently used are evicted (None for no limit)
+    memory_max_states: Optional[int] = None
+
+    # Whether the redis state manager stores each substate as a hash of individually serialized fields
+    redis_persist_fields: bool = False
+
+    # The serializer used to persist states in redis ("pickle" or "dill"), both formats can always be read
+    state_serializer: str = "pickle"
+
+    # Lock only the substates an event may modify instead of the whole client token, so independent parts of a page process events concurrently (requires redis_persist_fields)
+    redis_substate_locks: bool = False
+
+    # Compress states persisted in redis when they serialize to more than this many bytes (zstd or lz4 if installed, otherwise zlib)
+    redis_compress_threshold: Optional[int] = None
+
+    # Number of tokens whose states each worker keeps in memory between events, validated against redis on every event (0 to disable, only useful with sticky sessions)
+    redis_local_cache_size: int = 0
+
+    # Record dirty vars on assignment and propagate them to dependent computed vars and substates only when the delta is computed (or a computed var is read), so handlers mutating vars in bulk stay linear
+    state_coalesce_dirty_marking: bool = False
+
+    # Send mutations of list and dict vars as JSON patches ("$patch" in the delta) instead of the whole value when the patch is much shorter
+    state_json_patches: bool = False
+
+    # Skip recomputing computed vars when the values of the vars they depend on did not change (opt out impure vars with rx.var(memo=False))
+    memoize_computed_vars: bool = False
+
+    # Maximum number of bytes of the files of an upload request kept in memory, the rest is spooled to temporary files on disk (None to keep them all in memory)
+    upload_max_memory_size: Optional[int] = None
+
+    # Seconds during which consecutive state updates sent to a client are merged into a single websocket message, final updates are sent immediately (0 to send every update as it is produced)
+    state_update_flush_window: float = 0.0
+
     # Attributes that were explicitly set by the user.
     _non_default_attributes: Set[str] = pydantic.PrivateAttr(set())
 
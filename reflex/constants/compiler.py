@@ -55,6 +55,8 @@ class CompileVars(SimpleNamespace):
     HYDRATE = "hydrate"
     # The name of the is_hydrated variable.
     IS_HYDRATED = "is_hydrated"
+    # The key of the JSON patch operations applied to list and dict vars in a state delta.
+    DELTA_PATCH = "$patch"
     # The name of the function to add events to the queue.
     ADD_EVENTS = "addEvents"
     # The name of the var storing any connection error.
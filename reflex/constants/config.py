@@ -31,6 +31,8 @@ class Expiration(SimpleNamespace):
     LOCK = 10000
     # The PING timeout
     PING = 120
+    # Maximum time in seconds between sweeps of expired states (in memory or SQLite).
+    STATE_SWEEP = 60
 
 
 class GitIgnore(SimpleNamespace):
@@ -10,6 +10,7 @@ class Endpoint(Enum):
     PING = "ping"
     EVENT = "_event"
     UPLOAD = "_upload"
+    UPLOAD_CHUNKED = "_upload_chunked"
     AUTH_CODESPACE = "auth-codespace"
 
     def __str__(self) -> str:
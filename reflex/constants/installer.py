@@ -110,6 +110,7 @@ class PackageJson(SimpleNamespace):
 
     DEPENDENCIES = {
         "@emotion/react": "11.11.1",
+        "@msgpack/msgpack": "2.8.0",
         "axios": "1.6.0",
         "json5": "2.2.3",
         "next": "14.0.1",
@@ -358,6 +358,8 @@ class FileUpload(Base):
 
     upload_id: Optional[str] = None
     on_upload_progress: Optional[Union[EventHandler, Callable]] = None
+    # Upload the files in chunks of this many bytes, which are resumed after a failure.
+    chunk_size: Optional[int] = None
 
     @staticmethod
     def on_upload_progress_args_spec(_prog: Dict[str, Union[int, float, bool]]):
@@ -399,6 +401,13 @@ class FileUpload(Base):
                 Var.create_safe(upload_id, _var_is_string=True),
             ),
         ]
+        if self.chunk_size is not None:
+            spec_args.append(
+                (
+                    Var.create_safe("chunk_size", _var_is_string=False),
+                    Var.create_safe(self.chunk_size),
+                ),
+            )
         if self.on_upload_progress is not None:
             on_upload_progress = self.on_upload_progress
             if isinstance(on_upload_progress, EventHandler):
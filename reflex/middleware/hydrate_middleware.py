@@ -8,7 +8,6 @@ from reflex import constants
 from reflex.event import Event, get_hydrate_event
 from reflex.middleware.middleware import Middleware
 from reflex.state import BaseState, StateUpdate
-from reflex.utils import format
 
 if TYPE_CHECKING:
     from reflex.app import App
@@ -41,9 +40,12 @@ class HydrateMiddleware(Middleware):
         setattr(state, constants.CompileVars.IS_HYDRATED, False)
 
         # Get the initial state.
-        delta = format.format_state(state.dict())
+        await state._resolve_deferred_computed_vars(all_states=True)
+        delta = state.dict()
         # since a full dict was captured, clean any dirtiness
         state._clean()
+        # and send the diff vars whole in the next deltas
+        state._reset_sent_snapshots()
 
         # Return the state update.
         return StateUpdate(delta=delta, events=[])
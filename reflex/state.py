@@ -6,9 +6,15 @@ import asyncio
 import contextlib
 import copy
 import functools
+import hashlib
 import inspect
 import os
+import pickle
+import sqlite3
+import threading
+import time
 import uuid
+import zlib
 from abc import ABC, abstractmethod
 from collections import defaultdict
 from types import FunctionType, MethodType
@@ -19,10 +25,12 @@ from typing import (
     Callable,
     ClassVar,
     Dict,
+    FrozenSet,
     List,
     Optional,
     Sequence,
     Set,
+    Tuple,
     Type,
     Union,
     cast,
@@ -40,6 +48,8 @@ except ModuleNotFoundError:
 
 import wrapt
 from redis.asyncio import Redis
+from redis.asyncio.client import PubSub
+from redis.commands.core import AsyncScript
 from redis.exceptions import ResponseError
 
 from reflex import constants
@@ -68,6 +78,15 @@ var = computed_var
 # If the state is this large, it's considered a performance issue.
 TOO_LARGE_SERIALIZED_STATE = 100 * 1024  # 100kb
 
+# Kinds of state attributes, combined as flags in BaseState._attribute_kinds.
+_INHERITED_ATTR = 1
+_EVENT_HANDLER_ATTR = 2
+_BACKEND_VAR_ATTR = 4
+_BASE_VAR_ATTR = 8
+
+# Marks a backend var missing from the instance, like in states persisted before it was added.
+_MISSING_BACKEND_VAR = object()
+
 
 class HeaderData(Base):
     """An object containing headers data."""
@@ -330,6 +349,36 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
     # Set of substates which always need to be recomputed
     _always_dirty_substates: ClassVar[Set[str]] = set()
 
+    # Mapping of var name to all computed vars transitively depending on it, in dependency order
+    _dirty_propagation_plan: ClassVar[Dict[str, Tuple[str, ...]]] = {}
+
+    # Computed vars with an update interval, which may expire
+    _interval_computed_vars: ClassVar[Tuple[str, ...]] = ()
+
+    # Names of the vars sent to the frontend when they are dirty
+    _delta_var_names: ClassVar[FrozenSet[str]] = frozenset()
+
+    # Mapping of async and executor computed var name to the vars its value is computed from
+    _deferred_computed_vars: ClassVar[Dict[str, Tuple[str, ...]]] = {}
+
+    # Mapping of memoized computed var name to the vars its value is computed from
+    _memoized_computed_vars: ClassVar[Dict[str, Tuple[str, ...]]] = {}
+
+    # Names of the vars sent as changes since the value last sent to the frontend
+    _diff_var_names: ClassVar[FrozenSet[str]] = frozenset()
+
+    # Whether dirty var propagation is deferred until the delta is computed (process-global, see _init_state_options)
+    _coalesce_dirty_marking: ClassVar[bool] = False
+
+    # Whether computed vars with dependencies are memoized by default (process-global, see _init_state_options)
+    _memoize_computed_vars: ClassVar[bool] = False
+
+    # Whether mutations of list and dict vars are sent as JSON patches (process-global, see _init_state_options)
+    _send_json_patches: ClassVar[bool] = False
+
+    # Mapping of attribute name to its kind flags, looked up on attribute access
+    _attribute_kinds: ClassVar[Dict[str, int]] = {}
+
     # The parent state.
     parent_state: Optional[BaseState] = None
 
@@ -354,6 +403,21 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
     # Whether the state has ever been touched since instantiation.
     _was_touched: bool = False
 
+    # Whether dirty vars were recorded without being propagated yet (coalesced dirty marking).
+    _dirty_pending: bool = False
+
+    # The JSON patch operations applied to dirty list and dict vars since the last delta.
+    _var_patches: Optional[Dict[str, List[Dict[str, Any]]]] = None
+
+    # Fingerprints of the diff var values last sent to the frontend.
+    _sent_snapshots: Optional[Dict[str, Any]] = None
+
+    # The proxies returned for the mutable base and backend vars, reused until the state is cleaned.
+    _mutable_proxies: Optional[Dict[str, Any]] = None
+
+    # The vars touched since the state was last persisted (None if it was never persisted).
+    _touched_vars: Optional[Set[str]] = None
+
     # Whether this state class is a mixin and should not be instantiated.
     _mixin: ClassVar[bool] = False
 
@@ -651,12 +715,16 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
         cls._computed_var_dependencies = defaultdict(set)
         cls._substate_var_dependencies = defaultdict(set)
 
+        computed_var_deps = {}
+
         inherited_vars = set(cls.inherited_vars).union(
             set(cls.inherited_backend_vars),
         )
         for cvar_name, cvar in cls.computed_vars.items():
+            deps = computed_var_deps[cvar_name] = cvar._deps(objclass=cls)
+
             # Add the dependencies.
-            for var in cvar._deps(objclass=cls):
+            for var in deps:
                 cls._computed_var_dependencies[var].add(cvar_name)
                 if var in inherited_vars:
                     # track that this substate depends on its parent for this var
@@ -691,6 +759,173 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
                     parent_state.get_parent_state(),
                 )
 
+        cls._init_dirty_propagation_plan()
+        cls._init_computed_var_inputs(computed_var_deps)
+        cls._init_attribute_kinds()
+
+    @classmethod
+    def _init_attribute_kinds(cls):
+        """Classify the vars and event handlers of the state, so accessing them is a single lookup."""
+        kinds = defaultdict(int)
+        inherited_vars = {*cls.inherited_vars, *cls.inherited_backend_vars}
+        if cls.get_parent_state() is not None:
+            inherited_vars.add(constants.ROUTER_DATA)
+        for flag, names in (
+            (_INHERITED_ATTR, inherited_vars),
+            (_EVENT_HANDLER_ATTR, cls.event_handlers),
+            (_BACKEND_VAR_ATTR, cls.backend_vars),
+            (_BASE_VAR_ATTR, cls.base_vars),
+        ):
+            for name in names:
+                kinds[name] |= flag
+        cls._attribute_kinds = dict(kinds)
+
+    @classmethod
+    def _init_computed_var_inputs(cls, computed_var_deps: dict[str, set[str]]):
+        """Determine the memoized and the async or executor computed vars, and the vars they read.
+
+        Args:
+            computed_var_deps: The names of the vars accessed by each computed var.
+        """
+        memoize_computed_vars = cls._memoize_computed_vars
+        memoized = cls._memoized_computed_vars = {}
+        cls._deferred_computed_vars = {}
+        for cvar_name, cvar in cls.computed_vars.items():
+            deps = computed_var_deps[cvar_name]
+            input_vars = tuple(
+                sorted(
+                    var
+                    for var in deps
+                    if var in cls.vars
+                    or var in cls.backend_vars
+                    or var in cls.inherited_backend_vars
+                )
+            )
+            if cvar._is_deferred:
+                # Computed before each delta instead of on access.
+                cls._deferred_computed_vars[cvar_name] = input_vars
+            # Memoize by default only vars reading other vars, the others may be impure.
+            elif cvar._update_interval is None and (
+                cvar._memo or (cvar._memo is None and memoize_computed_vars and deps)
+            ):
+                memoized[cvar_name] = input_vars
+
+        # Vars reading a computed var recomputed on each access are not memoized by
+        # default, that var would be computed twice to check whether it changed.
+        states = [cls]
+        while (parent_state := states[-1].get_parent_state()) is not None:
+            states.append(parent_state)
+        changed = True
+        while changed:
+            volatile_vars = {
+                name
+                for name, var in cls.vars.items()
+                if isinstance(var, ComputedVar)
+                and not var._cache
+                and not var._is_deferred
+                and not any(name in state._memoized_computed_vars for state in states)
+            }
+            changed = False
+            for cvar_name, deps in list(memoized.items()):
+                if cls.computed_vars[
+                    cvar_name
+                ]._memo is None and not volatile_vars.isdisjoint(deps):
+                    del memoized[cvar_name]
+                    changed = True
+
+    @classmethod
+    def _set_memoize_computed_vars(cls, memoize_computed_vars: bool):
+        """Set whether computed vars are memoized by default in this state and its substates.
+
+        Args:
+            memoize_computed_vars: Whether computed vars with dependencies are memoized.
+        """
+        if cls._memoize_computed_vars == memoize_computed_vars:
+            return
+        cls._memoize_computed_vars = memoize_computed_vars
+        # Parents first, the substates check the memoized vars of their parents.
+        state_classes = [cls]
+        for state_cls in state_classes:
+            state_cls._init_computed_var_inputs(
+                {
+                    cvar_name: cvar._deps(objclass=state_cls)
+                    for cvar_name, cvar in state_cls.computed_vars.items()
+                }
+            )
+            state_classes.extend(state_cls.class_subclasses)
+
+    @classmethod
+    def _init_state_options(cls):
+        """Set the state options read from the config on this state tree.
+
+        Called once by the app when it sets up its state tree. The options are class
+        attributes inherited by the substates (unless they override them), so they are
+        process-global: every state manager and app using this state tree shares them.
+        """
+        config = get_config()
+        cls._coalesce_dirty_marking = config.state_coalesce_dirty_marking
+        cls._set_memoize_computed_vars(config.memoize_computed_vars)
+        cls._send_json_patches = config.state_json_patches
+
+    @classmethod
+    def _init_dirty_propagation_plan(cls):
+        """Compile the var dependency dicts into lookups used when vars are marked dirty.
+
+        For each var, all the computed vars that need to be recalculated when it changes
+        are resolved ahead of time (following computed vars depending on computed vars),
+        so marking a var dirty does not need to walk the dependency graph.
+        """
+        plan = {}
+        for var in cls._computed_var_dependencies:
+            # Depth first, so a computed var is listed before the computed vars depending on it.
+            ordered, visited = [], set()
+            to_visit = [(cvar, False) for cvar in cls._computed_var_dependencies[var]]
+            while to_visit:
+                cvar, dependents_visited = to_visit.pop()
+                if dependents_visited:
+                    ordered.append(cvar)
+                    continue
+                if cvar in visited:
+                    continue
+                visited.add(cvar)
+                to_visit.append((cvar, True))
+                to_visit.extend(
+                    (dependent, False)
+                    for dependent in cls._computed_var_dependencies.get(cvar, ())
+                )
+            plan[var] = tuple(reversed(ordered))
+        cls._dirty_propagation_plan = plan
+
+        cls._interval_computed_vars = tuple(
+            cvar_name
+            for cvar_name, cvar in cls.computed_vars.items()
+            if cvar._update_interval is not None
+        )
+
+        # Dirty base vars, frontend computed vars and computed vars with cache=False.
+        cls._delta_var_names = frozenset(
+            name
+            for name in (
+                *cls.base_vars,
+                *(
+                    cvar_name
+                    for cvar_name, cvar in cls.computed_vars.items()
+                    if not cvar._backend
+                ),
+                *cls._always_dirty_computed_vars,
+            )
+            if not types.is_backend_base_variable(name, cls)
+        )
+
+        # Computed vars declared with diff=True and base vars with Field(..., diff=True).
+        fields = cls.get_fields()
+        cls._diff_var_names = frozenset(
+            name
+            for name in cls._delta_var_names
+            if (name in cls.computed_vars and cls.computed_vars[name]._diff)
+            or (name in fields and fields[name].field_info.extra.get("diff"))
+        )
+
     @classmethod
     def _check_overridden_methods(cls):
         """Check for shadow methods and raise error if any.
@@ -908,6 +1143,13 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
         # Reinitialize dependency tracking dicts.
         cls._init_var_dependency_dicts()
 
+        # The new variable is inherited by all the substates.
+        substate_classes = list(cls.class_subclasses)
+        while substate_classes:
+            substate_class = substate_classes.pop()
+            substate_class._init_attribute_kinds()
+            substate_classes.extend(substate_class.class_subclasses)
+
     @classmethod
     def _set_var(cls, prop: BaseVar):
         """Set the var as a class member.
@@ -1031,24 +1273,21 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
             The value of the var.
         """
         # If the state hasn't been initialized yet, return the default value.
-        if not super().__getattribute__("__dict__"):
+        instance_dict = super().__getattribute__("__dict__")
+        if not instance_dict:
             return super().__getattribute__(name)
 
-        inherited_vars = {
-            **super().__getattribute__("inherited_vars"),
-            **super().__getattribute__("inherited_backend_vars"),
-        }
+        kind = type(self)._attribute_kinds.get(name, 0)
 
         # For now, handle router_data updates as a special case.
-        if name in inherited_vars or name == constants.ROUTER_DATA:
+        if kind & _INHERITED_ATTR:
             parent_state = super().__getattribute__("parent_state")
             if parent_state is not None:
                 return getattr(parent_state, name)
 
         # Allow event handlers to be called on the instance directly.
-        event_handlers = super().__getattribute__("event_handlers")
-        if name in event_handlers:
-            handler = event_handlers[name]
+        if kind & _EVENT_HANDLER_ATTR:
+            handler = type(self).event_handlers[name]
             if handler.is_background:
                 fn = _no_chain_background_task(type(self), name, handler.fn)
             else:
@@ -1057,24 +1296,37 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
             fn.__qualname__ = handler.fn.__qualname__  # type: ignore
             return fn
 
-        backend_vars = super().__getattribute__("_backend_vars")
-        if name in backend_vars:
-            value = backend_vars[name]
+        if kind & _BACKEND_VAR_ATTR:
+            value = (
+                super()
+                .__getattribute__("_backend_vars")
+                .get(name, _MISSING_BACKEND_VAR)
+            )
+            if value is _MISSING_BACKEND_VAR:
+                # Fall back to the default value of the class.
+                return super().__getattribute__(name)
         else:
             value = super().__getattribute__(name)
-
-        if isinstance(value, EventHandler):
-            # The event handler is inherited from a parent, so let the parent convert
-            # it to a callable function.
-            parent_state = super().__getattribute__("parent_state")
-            if parent_state is not None:
-                return getattr(parent_state, name)
-
-        if isinstance(value, MutableProxy.__mutable_types__) and (
-            name in super().__getattribute__("base_vars") or name in backend_vars
-        ):
+            if not kind & _BASE_VAR_ATTR:
+                if isinstance(value, EventHandler):
+                    # The event handler is inherited from a parent, so let the parent convert
+                    # it to a callable function.
+                    parent_state = super().__getattribute__("parent_state")
+                    if parent_state is not None:
+                        return getattr(parent_state, name)
+                return value
+
+        if isinstance(value, MutableProxy.__mutable_types__):
             # track changes in mutable containers (list, dict, set, etc)
-            return MutableProxy(wrapped=value, state=self, field_name=name)
+            proxies = instance_dict.get("_mutable_proxies")
+            if proxies is None:
+                proxies = instance_dict["_mutable_proxies"] = {}
+            proxy = proxies.get(name)
+            if proxy is None or proxy.__wrapped__ is not value:
+                proxy = proxies[name] = MutableProxy(
+                    wrapped=value, state=self, field_name=name
+                )
+            return proxy
 
         return value
 
@@ -1092,15 +1344,13 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
             value = value.__wrapped__
 
         # Set the var on the parent state.
-        inherited_vars = {**self.inherited_vars, **self.inherited_backend_vars}
-        if name in inherited_vars:
+        if name in self.inherited_vars or name in self.inherited_backend_vars:
             setattr(self.parent_state, name, value)
             return
 
         if name in self.backend_vars:
             self._backend_vars.__setitem__(name, value)
-            self.dirty_vars.add(name)
-            self._mark_dirty()
+            self._mark_var_dirty(name)
             return
 
         # Set the attribute.
@@ -1108,13 +1358,11 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
 
         # Add the var to the dirty list.
         if name in self.vars or name in self._computed_var_dependencies:
-            self.dirty_vars.add(name)
-            self._mark_dirty()
+            self._mark_var_dirty(name)
 
         # For now, handle router_data updates as a special case
         if name == constants.ROUTER_DATA:
-            self.dirty_vars.add(name)
-            self._mark_dirty()
+            self._mark_var_dirty(name)
 
     def reset(self):
         """Reset all the base vars to their default values."""
@@ -1506,6 +1754,13 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
         # Get the function to process the event.
         fn = functools.partial(handler.fn, state)
 
+        async def as_state_update(events: Any, final: bool) -> StateUpdate:
+            # Compute the async computed vars used by the delta (background tasks
+            # compute them when leaving `async with self`, while holding the lock).
+            if not isinstance(state, StateProxy):
+                await state._resolve_deferred_computed_vars()
+            return state._as_state_update(handler, events, final=final)
+
         # Wrap the function in a try/except block.
         try:
             # Handle async functions.
@@ -1518,24 +1773,24 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
             # Handle async generators.
             if inspect.isasyncgen(events):
                 async for event in events:
-                    yield state._as_state_update(handler, event, final=False)
-                yield state._as_state_update(handler, events=None, final=True)
+                    yield await as_state_update(event, final=False)
+                yield await as_state_update(None, final=True)
 
             # Handle regular generators.
             elif inspect.isgenerator(events):
                 try:
                     while True:
-                        yield state._as_state_update(handler, next(events), final=False)
+                        yield await as_state_update(next(events), final=False)
                 except StopIteration as si:
                     # the "return" value of the generator is not available
                     # in the loop, we must catch StopIteration to access it
                     if si.value is not None:
-                        yield state._as_state_update(handler, si.value, final=False)
-                yield state._as_state_update(handler, events=None, final=True)
+                        yield await as_state_update(si.value, final=False)
+                yield await as_state_update(None, final=True)
 
             # Handle regular event chains.
             else:
-                yield state._as_state_update(handler, events, final=True)
+                yield await as_state_update(events, final=True)
 
         # If an error occurs, throw a window alert.
         except Exception as ex:
@@ -1553,15 +1808,16 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
 
     def _mark_dirty_computed_vars(self) -> None:
         """Mark ComputedVars that need to be recalculated based on dirty_vars."""
-        dirty_vars = self.dirty_vars
-        while dirty_vars:
-            calc_vars, dirty_vars = dirty_vars, set()
-            for cvar in self._dirty_computed_vars(from_vars=calc_vars):
-                self.dirty_vars.add(cvar)
-                dirty_vars.add(cvar)
-                actual_var = self.computed_vars.get(cvar)
-                if actual_var is not None:
-                    actual_var.mark_dirty(instance=self)
+        plan = self._dirty_propagation_plan
+        dirty_cvars = [
+            cvar for var in self.dirty_vars if var in plan for cvar in plan[var]
+        ]
+        self.dirty_vars.update(dirty_cvars)
+        computed_vars = self.computed_vars
+        for cvar in dirty_cvars:
+            actual_var = computed_vars.get(cvar)
+            if actual_var is not None:
+                actual_var.mark_dirty(instance=self)
 
     def _expired_computed_vars(self) -> set[str]:
         """Determine ComputedVars that need to be recalculated based on the expiration time.
@@ -1571,7 +1827,7 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
         """
         return set(
             cvar
-            for cvar in self.computed_vars
+            for cvar in self._interval_computed_vars
             if self.computed_vars[cvar].needs_update(instance=self)
         )
 
@@ -1621,46 +1877,224 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
         Returns:
             The delta for the state.
         """
+        # Format the whole delta once, which also detaches it from the state values.
+        return format.format_state(self._get_delta())
+
+    def _get_delta(self) -> Delta:
+        """Get the delta for the state, with the unformatted values of the state.
+
+        Returns:
+            The delta for the state and its dirty substates.
+        """
         delta = {}
 
         # Apply dirty variables down into substates
         self.dirty_vars.update(self._always_dirty_computed_vars)
         self._mark_dirty()
 
-        frontend_computed_vars: set[str] = {
-            name for name, cv in self.computed_vars.items() if not cv._backend
-        }
-
-        # Return the dirty vars for this instance, any cached/dependent computed vars,
-        # and always dirty computed vars (cache=False)
-        delta_vars = (
-            self.dirty_vars.intersection(self.base_vars)
-            .union(self.dirty_vars.intersection(frontend_computed_vars))
-            .union(self._dirty_computed_vars(include_backend=False))
-            .union(self._always_dirty_computed_vars)
-        )
-
+        # Return the dirty vars for this instance, including dependent computed vars
+        # (marked dirty above) and always dirty computed vars (cache=False)
+        delta_var_names = self._delta_var_names
         subdelta = {
             prop: getattr(self, prop)
-            for prop in delta_vars
-            if not types.is_backend_base_variable(prop, type(self))
+            for prop in self.dirty_vars
+            if prop in delta_var_names
         }
+        patches = self._diff_sent_values(subdelta) if self._diff_var_names else {}
+        if self._var_patches:
+            # Send the patch of list and dict vars instead of the value when it is much shorter.
+            var_patches = {
+                prop: patch
+                for prop, patch in self._var_patches.items()
+                if prop in subdelta and 2 * len(patch) < len(subdelta[prop])
+            }
+            for prop in var_patches:
+                del subdelta[prop]
+            patches.update(var_patches)
+        if patches:
+            subdelta[constants.CompileVars.DELTA_PATCH] = patches
         if len(subdelta) > 0:
             delta[self.get_full_name()] = subdelta
 
         # Recursively find the substate deltas.
         substates = self.substates
         for substate in self.dirty_substates.union(self._always_dirty_substates):
-            delta.update(substates[substate].get_delta())
-
-        # Format the delta.
-        delta = format.format_state(delta)
+            delta.update(substates[substate]._get_delta())
 
-        # Return the delta.
         return delta
 
+    def _get_dirty_deferred_computed_vars(
+        self, all_states: bool = False
+    ) -> list[tuple[BaseState, str]]:
+        """Get the async and executor computed vars to compute before the next delta.
+
+        Args:
+            all_states: Whether to include the substates which are not dirty.
+
+        Returns:
+            The state instances and names of the computed vars.
+        """
+        self.dirty_vars.update(self._always_dirty_computed_vars)
+        self._mark_dirty()
+        computed_vars = self.computed_vars
+        dirty_cvars = [
+            (self, cvar_name)
+            for cvar_name in self._deferred_computed_vars
+            if cvar_name in self.dirty_vars
+            or not hasattr(self, computed_vars[cvar_name]._cache_attr)
+        ]
+        substates = self.substates
+        for substate in (
+            substates
+            if all_states
+            else self.dirty_substates.union(self._always_dirty_substates)
+        ):
+            dirty_cvars.extend(
+                substates[substate]._get_dirty_deferred_computed_vars(all_states)
+            )
+        return dirty_cvars
+
+    async def _resolve_deferred_computed_vars(self, all_states: bool = False):
+        """Compute the dirty async and executor computed vars of the state tree.
+
+        The vars are computed concurrently, except when one depends on another.
+        The delta then uses the computed values.
+
+        Args:
+            all_states: Whether to also compute the vars of the substates which are not dirty.
+        """
+        state = self
+        while state.parent_state is not None:
+            state = state.parent_state
+        pending = state._get_dirty_deferred_computed_vars(all_states)
+
+        def depends_on(dependent: tuple[BaseState, str], dep: tuple[BaseState, str]):
+            dependent_state, dependent_name = dependent
+            dep_state, dep_name = dep
+            if dependent_name not in dependent_state._dirty_propagation_plan.get(
+                dep_name, ()
+            ):
+                return False
+            # Computed vars only depend on vars of the same or a parent state.
+            state = dependent_state
+            while state is not None and state is not dep_state:
+                state = state.parent_state
+            return state is not None
+
+        while pending:
+            ready = [
+                cvar
+                for cvar in pending
+                if not any(depends_on(cvar, dep) for dep in pending if dep is not cvar)
+            ] or pending
+            await asyncio.gather(
+                *(
+                    state.computed_vars[name]._compute(
+                        state, state._deferred_computed_vars[name]
+                    )
+                    for state, name in ready
+                )
+            )
+            pending = [cvar for cvar in pending if cvar not in ready]
+
+    def _diff_sent_values(self, subdelta: dict[str, Any]) -> dict[str, Any]:
+        """Only keep the diff vars that changed since they were last sent to the frontend.
+
+        Changed lists and dicts are sent as JSON patches when they are much shorter
+        than the value.
+
+        Args:
+            subdelta: The dirty vars of this state and their values, modified in place.
+
+        Returns:
+            The JSON patches of the changed diff vars.
+        """
+        snapshots = self._sent_snapshots
+        if snapshots is None:
+            self._sent_snapshots = snapshots = {}
+        patches = {}
+        for prop in self._diff_var_names.intersection(subdelta):
+            value = subdelta[prop]
+            if isinstance(value, MutableProxy):
+                value = value.__wrapped__
+            snapshot = _get_diff_snapshot(value)
+            last_snapshot = snapshots.get(prop)
+            if snapshot == last_snapshot:
+                del subdelta[prop]
+                continue
+            snapshots[prop] = snapshot
+            # Persist the new snapshot, even if no var of the state was modified.
+            self._was_touched = True
+            patch = _get_snapshot_json_patch(last_snapshot, snapshot, value)
+            if patch is not None and 2 * len(patch) < len(value):
+                patches[prop] = patch
+                del subdelta[prop]
+        return patches
+
+    def _reset_sent_snapshots(self):
+        """Forget the diff var values sent to the frontend, so they are sent whole."""
+        if self._sent_snapshots:
+            self._sent_snapshots = None
+
+        # Recursively reset the substate snapshots.
+        for substate in self.substates.values():
+            substate._reset_sent_snapshots()
+
+    def _mark_var_dirty(self, name: str, patch: Optional[List[Dict[str, Any]]] = None):
+        """Add a var to the dirty vars and mark the state as dirty.
+
+        With coalesced dirty marking, only the substate chain is marked, and the
+        propagation to dependent computed vars and substates is deferred.
+
+        Args:
+            name: The name of the modified var.
+            patch: The JSON patch operations describing the modification (the whole
+                value is sent in the delta if None).
+        """
+        var_patches = self._var_patches
+        if patch is None:
+            if var_patches:
+                var_patches.pop(name, None)
+        elif name not in self.dirty_vars:
+            if var_patches is None:
+                self._var_patches = var_patches = {}
+            var_patches[name] = patch
+        elif var_patches and name in var_patches:
+            var_patches[name].extend(patch)
+        self.dirty_vars.add(name)
+        if not self._coalesce_dirty_marking:
+            self._mark_dirty()
+            return
+        self._dirty_pending = True
+        state = self
+        parent_state = self.parent_state
+        while parent_state is not None:
+            state_name = state.get_name()
+            if state_name in parent_state.dirty_substates:
+                break
+            parent_state.dirty_substates.add(state_name)
+            state = parent_state
+            parent_state = state.parent_state
+
+    def _flush_dirty_marking(self):
+        """Propagate the deferred dirty vars of this state and its parent states.
+
+        Called before reading a cached computed var, so it never returns a stale value.
+        """
+        pending_states = []
+        state = self
+        while state is not None:
+            if state._dirty_pending:
+                pending_states.append(state)
+            state = state.parent_state
+        # Parent states first, their vars may invalidate computed vars of this state.
+        for state in reversed(pending_states):
+            state._mark_dirty()
+
     def _mark_dirty(self):
         """Mark the substate and all parent states as dirty."""
+        if self._dirty_pending:
+            self._dirty_pending = False
         state_name = self.get_name()
         if (
             self.parent_state is not None
@@ -1681,19 +2115,21 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
         """Propagate dirty var / computed var status into substates."""
         substates = self.substates
         for var in self.dirty_vars:
-            for substate_name in self._substate_var_dependencies[var]:
+            for substate_name in self._substate_var_dependencies.get(var, ()):
                 self.dirty_substates.add(substate_name)
                 substate = substates[substate_name]
                 substate.dirty_vars.add(var)
                 substate._mark_dirty()
 
     def _update_was_touched(self):
-        """Update the _was_touched flag based on dirty_vars."""
+        """Update the _was_touched flag and touched vars based on dirty_vars."""
         if self.dirty_vars and not self._was_touched:
             for var in self.dirty_vars:
                 if var in self.base_vars or var in self._backend_vars:
                     self._was_touched = True
                     break
+        if self.dirty_vars and self._touched_vars is not None:
+            self._touched_vars.update(self.dirty_vars)
 
     def _get_was_touched(self) -> bool:
         """Check current dirty_vars and flag to determine if state instance was modified.
@@ -1709,6 +2145,79 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
         self._update_was_touched()
         return self._was_touched
 
+    def _get_persisted_field_names(self, var_names: Set[str] | None = None) -> set[str]:
+        """Get the names of the fields that back the vars of this state instance.
+
+        Inherited vars are excluded, because they are persisted with the parent state.
+
+        Args:
+            var_names: Only include the fields backing these vars (all fields if unspecified).
+
+        Returns:
+            The names of the fields to persist.
+        """
+        own_vars = (
+            set(self.base_vars)
+            | (set(self.backend_vars) - set(self.inherited_backend_vars))
+            | {constants.ROUTER_DATA}
+        )
+        computed_vars = {
+            cvar_name for cvar_name, cvar in self.computed_vars.items() if cvar._cache
+        }
+        if var_names is not None:
+            own_vars &= var_names
+            computed_vars &= var_names
+        for cvar_name in computed_vars:
+            cvar = self.computed_vars[cvar_name]
+            own_vars.update((cvar._cache_attr, cvar._last_updated_attr))
+        # Pending dirty vars are kept, so they are included in the next delta.
+        own_vars.update(("dirty_vars", "dirty_substates"))
+        if self._diff_var_names:
+            own_vars.add("_sent_snapshots")
+        return own_vars
+
+    def _get_persisted_fields(self, field_names: Set[str]) -> dict[str, Any]:
+        """Get the raw values of the given fields of this state instance.
+
+        Fields that are not currently set (like an invalidated computed var cache) are omitted.
+
+        Args:
+            field_names: The names of the fields to get.
+
+        Returns:
+            A mapping of field name to (unproxied) value.
+        """
+        backend_vars = self._backend_vars
+        instance_dict = self.__dict__
+        fields = {}
+        for name in field_names:
+            if name in backend_vars:
+                fields[name] = backend_vars[name]
+            elif name in instance_dict:
+                fields[name] = instance_dict[name]
+        return fields
+
+    @classmethod
+    def _from_persisted_fields(cls, fields: dict[str, Any]) -> BaseState:
+        """Create a state instance from persisted field values.
+
+        Fields that were never persisted keep their default values.
+
+        Args:
+            fields: A mapping of field name to value.
+
+        Returns:
+            The new state instance (without parent or substates).
+        """
+        state = cls(init_substates=False, _reflex_internal_init=True)
+        backend_vars = state._backend_vars
+        for name, value in fields.items():
+            if name in backend_vars:
+                backend_vars[name] = value
+            else:
+                state.__dict__[name] = value
+        return state
+
     def _clean(self):
         """Reset the dirty vars."""
         # Update touched status before cleaning dirty_vars.
@@ -1723,6 +2232,11 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
         # Clean this state.
         self.dirty_vars = set()
         self.dirty_substates = set()
+        self._dirty_pending = False
+        if self._var_patches is not None:
+            self._var_patches = None
+        if self._mutable_proxies is not None:
+            self._mutable_proxies = None
 
     def get_value(self, key: str) -> Any:
         """Get the value of a field (without proxying).
@@ -1836,6 +2350,9 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
         state["__dict__"]["parent_state"] = None
         state["__dict__"]["substates"] = {}
         state["__dict__"].pop("_was_touched", None)
+        state["__dict__"].pop("_touched_vars", None)
+        state["__dict__"].pop("_var_patches", None)
+        state["__dict__"].pop("_mutable_proxies", None)
         return state
 
 
@@ -2284,6 +2801,28 @@ class StateUpdate(Base):
     # Whether this is the final state update for the event.
     final: bool = True
 
+    def json(self) -> str:
+        """Convert the state update to a JSON string.
+
+        The delta is formatted while it is encoded, instead of walking it beforehand.
+
+        Returns:
+            The state update as a JSON string.
+        """
+        return format.json_dumps_state(
+            {"delta": self.delta, "events": self.events, "final": self.final}
+        )
+
+    def msgpack(self) -> bytes | None:
+        """Convert the state update to MessagePack, for clients accepting binary frames.
+
+        Returns:
+            The state update as MessagePack bytes, or None if it must be sent as JSON.
+        """
+        return format.msgpack_dumps_state(
+            {"delta": self.delta, "events": self.events, "final": self.final}
+        )
+
 
 class StateManager(Base, ABC):
     """A class to manage many client states."""
@@ -2301,18 +2840,59 @@ class StateManager(Base, ABC):
         Returns:
             The state manager (either memory or redis).
         """
+        # make sure expiration values are obtained only from the config object on creation
+        config = get_config()
         redis = prerequisites.get_redis()
         if redis is not None:
-            # make sure expiration values are obtained only from the config object on creation
-            config = get_config()
             return StateManagerRedis(
                 state=state,
                 redis=redis,
                 token_expiration=config.redis_token_expiration,
                 lock_expiration=config.redis_lock_expiration,
+                persist_fields=config.redis_persist_fields,
+                serializer=config.state_serializer,
+                compress_threshold=config.redis_compress_threshold,
+                local_cache_size=config.redis_local_cache_size,
+                substate_locks=config.redis_substate_locks,
             )
+        if config.state_db_path:
+            return StateManagerSQLite(state=state, db_path=config.state_db_path)
         return StateManagerMemory(state=state)
 
+    @staticmethod
+    def _link_states(
+        state_classes: Sequence[Type[BaseState]],
+        instances: Sequence[BaseState | None],
+        parent_state: BaseState | None = None,
+    ) -> dict[Type[BaseState], BaseState]:
+        """Link state instances together into a state tree.
+
+        Args:
+            state_classes: The state classes (parents first).
+            instances: The instance of each state class (None to create a new instance).
+            parent_state: The parent of the topmost state, if it is not in state_classes.
+
+        Returns:
+            The linked state instances by class.
+        """
+        states: dict[Type[BaseState], BaseState] = {}
+        for required_cls, state in zip(state_classes, instances):
+            parent_state_cls = required_cls.get_parent_state()
+            parent = states.get(parent_state_cls, parent_state)
+            if state is None:
+                # Key didn't exist so we have to create a new instance (but don't persist it yet).
+                state = required_cls(
+                    parent_state=parent,
+                    init_substates=False,
+                    _reflex_internal_init=True,
+                )
+            # Set up Bidirectional linkage between this state and its parent.
+            if parent is not None:
+                parent.substates[state.get_name()] = state
+                state.parent_state = parent
+            states[required_cls] = state
+        return states
+
     @abstractmethod
     async def get_state(self, token: str) -> BaseState:
         """Get the state for a token.
@@ -2349,18 +2929,53 @@ class StateManager(Base, ABC):
         yield self.state()
 
 
+def _default_token_expiration() -> int:
+    """Get the default token expiration time.
+
+    Returns:
+        The default token expiration time.
+    """
+    return get_config().redis_token_expiration
+
+
+def _default_memory_max_states() -> int | None:
+    """Get the default maximum number of states kept by the memory state manager.
+
+    Returns:
+        The maximum number of states (None for no limit).
+    """
+    return get_config().memory_max_states
+
+
 class StateManagerMemory(StateManager):
     """A state manager that stores states in memory."""
 
     # The mapping of client ids to states.
     states: Dict[str, BaseState] = {}
 
+    # The time (s) after which the state of an idle client is evicted.
+    token_expiration: int = pydantic.Field(default_factory=_default_token_expiration)
+
+    # The maximum number of states to keep, least recently used are evicted (None for no limit).
+    max_states: Optional[int] = pydantic.Field(
+        default_factory=_default_memory_max_states
+    )
+
     # The mutex ensures the dict of mutexes is updated exclusively
     _state_manager_lock = asyncio.Lock()
 
     # The dict of mutexes for each client
     _states_locks: Dict[str, asyncio.Lock] = pydantic.PrivateAttr({})
 
+    # The last time each client state was accessed, least recently used first.
+    _last_access: Dict[str, float] = pydantic.PrivateAttr(default_factory=dict)
+
+    # The number of events modifying each client state, which cannot be evicted meanwhile.
+    _states_in_use: Dict[str, int] = pydantic.PrivateAttr(default_factory=dict)
+
+    # The number of states evicted so far.
+    _evicted_states: int = pydantic.PrivateAttr(0)
+
     class Config:
         """The Pydantic config."""
 
@@ -2380,7 +2995,11 @@ class StateManagerMemory(StateManager):
         # Memory state manager ignores the substate suffix and always returns the top-level state.
         token = _split_substate_key(token)[0]
         if token not in self.states:
+            # Make room for the new state.
+            self._evict_states(n_new_states=1)
             self.states[token] = self.state(_reflex_internal_init=True)
+        self._last_access.pop(token, None)
+        self._last_access[token] = time.monotonic()
         return self.states[token]
 
     async def set_state(self, token: str, state: BaseState):
@@ -2409,10 +3028,95 @@ class StateManagerMemory(StateManager):
                 if token not in self._states_locks:
                     self._states_locks[token] = asyncio.Lock()
 
-        async with self._states_locks[token]:
-            state = await self.get_state(token)
-            yield state
-            await self.set_state(token, state)
+        self._states_in_use[token] = self._states_in_use.get(token, 0) + 1
+        try:
+            async with self._states_locks[token]:
+                state = await self.get_state(token)
+                yield state
+                await self.set_state(token, state)
+        finally:
+            self._states_in_use[token] -= 1
+            if not self._states_in_use[token]:
+                del self._states_in_use[token]
+
+    def _evict_states(self, n_new_states: int = 0) -> int:
+        """Evict the states (and locks) of expired clients and least recently used clients over the limit.
+
+        States that are being modified are never evicted.
+
+        Args:
+            n_new_states: The number of states about to be added.
+
+        Returns:
+            The number of evicted states.
+        """
+        now = time.monotonic()
+        n_states = len(self.states) + n_new_states
+        if not n_new_states or (
+            self.max_states is not None and n_states > self.max_states
+        ):
+            # States may be set directly, without being accessed through the state
+            # manager: track them in the periodic sweep or when over the limit only.
+            for token in self.states.keys() - self._last_access.keys():
+                self._last_access[token] = now
+            n_states = len(self._last_access) + n_new_states
+        to_evict = []
+        for token, last_access in self._last_access.items():
+            if now - last_access <= self.token_expiration and (
+                self.max_states is None or n_states - len(to_evict) <= self.max_states
+            ):
+                # All following tokens were accessed more recently.
+                break
+            if token not in self._states_in_use:
+                to_evict.append(token)
+        for token in to_evict:
+            self.states.pop(token, None)
+            self._states_locks.pop(token, None)
+            del self._last_access[token]
+        self._evicted_states += len(to_evict)
+        return len(to_evict)
+
+    async def _sweep_states(self):
+        """Periodically evict the states of expired clients.
+
+        Registered as a lifespan task of the app.
+        """
+        while True:
+            await asyncio.sleep(
+                min(self.token_expiration, constants.Expiration.STATE_SWEEP)
+            )
+            n_evicted = self._evict_states()
+            if n_evicted:
+                console.debug(
+                    f"Evicted {n_evicted} expired states, {len(self.states)} states in memory."
+                )
+
+    def get_metrics(self, estimate_size: bool = True) -> Dict[str, int]:
+        """Get metrics about the states kept in memory.
+
+        Args:
+            estimate_size: Whether to estimate the memory used by the states, by serializing them.
+
+        Returns:
+            The number of states, locks and evicted states, and the estimated size of the
+            states in bytes (when requested).
+        """
+        metrics = {
+            "states": len(self.states),
+            "locks": len(self._states_locks),
+            "evicted_states": self._evicted_states,
+        }
+        if estimate_size:
+            state_serializer = STATE_SERIALIZERS["pickle"]
+            estimated_bytes = 0
+            for state in list(self.states.values()):
+                to_visit = [state]
+                while to_visit:
+                    substate = to_visit.pop()
+                    to_visit.extend(substate.substates.values())
+                    estimated_bytes += len(state_serializer.dumps_state(substate))
+            metrics["estimated_bytes"] = estimated_bytes
+        return metrics
 
 
 # Workaround https://github.com/cloudpipe/cloudpickle/issues/408 for dynamic pydantic classes
@@ -2434,35 +3138,360 @@ def _dill_reduce_state(pickler, obj):
         dill.Pickler.dispatch[type](pickler, obj)
 
 
-def _default_lock_expiration() -> int:
-    """Get the default lock expiration time.
+# Atomically check the lock and write all touched substates (with expiration).
+#   KEYS[1]: the lock key, KEYS[2..n]: the substate keys.
+#   ARGV[1]: the lock id (empty to skip the check), ARGV[2]: the token expiration (s).
+#   Then for each substate key, either:
+#     "set", <pickled state>
+#     "hset" | "hreplace", <n_del>, <field>..., <n_set>, <field>, <value>...
+_SET_STATES_SCRIPT = """
+local n_locks = tonumber(ARGV[3])
+for locki = 1, n_locks do
+    if redis.call("GET", KEYS[locki]) ~= ARGV[1] then
+        return false
+    end
+end
+local expiration = ARGV[2]
+local argi = 4
+local versions = {}
+for keyi = n_locks + 1, #KEYS do
+    local key = KEYS[keyi]
+    local mode = ARGV[argi]
+    argi = argi + 1
+    if mode == "set" then
+        redis.call("SET", key, ARGV[argi], "EX", expiration)
+        argi = argi + 1
+    else
+        if mode == "hreplace" then
+            redis.call("DEL", key)
+        end
+        local n_del = tonumber(ARGV[argi])
+        argi = argi + 1
+        if n_del > 0 then
+            redis.call("HDEL", key, unpack(ARGV, argi, argi + n_del - 1))
+            argi = argi + n_del
+        end
+        local n_set = tonumber(ARGV[argi])
+        argi = argi + 1
+        if n_set > 0 then
+            redis.call("HSET", key, unpack(ARGV, argi, argi + 2 * n_set - 1))
+            argi = argi + 2 * n_set
+        end
+        redis.call("EXPIRE", key, expiration)
+    end
+    local version_key = key .. ":version"
+    versions[keyi - n_locks] = redis.call("INCR", version_key)
+    redis.call("EXPIRE", version_key, expiration)
+end
+return versions
+"""
+
+# Take several locks at once, only if none of them is held, so waiters never hold some
+# locks while waiting for others.
+_LOCK_SCRIPT = """
+for keyi = 1, #KEYS do
+    if redis.call("EXISTS", KEYS[keyi]) == 1 then
+        return 0
+    end
+end
+for keyi = 1, #KEYS do
+    redis.call("SET", KEYS[keyi], ARGV[1], "PX", ARGV[2])
+end
+return 1
+"""
+
+# The vars of a parent state that an event may write without holding its substate lock.
+_UNLOCKED_STATE_VARS = frozenset((constants.ROUTER_DATA, constants.ROUTER))
+
+
+class StateSerializer(ABC):
+    """Serializes state instances and field values for persistence in redis."""
+
+    # The first byte of every payload written by this serializer, used to pick the
+    # serializer when reading a payload back.
+    header: ClassVar[bytes]
 
-    Returns:
-        The default lock expiration time.
-    """
-    return get_config().redis_lock_expiration
+    @abstractmethod
+    def dumps(self, obj: Any) -> bytes:
+        """Serialize an object.
 
+        Args:
+            obj: The object to serialize.
 
-def _default_token_expiration() -> int:
-    """Get the default token expiration time.
+        Returns:
+            The serialized payload (starting with the header byte).
+        """
+        pass
 
-    Returns:
-        The default token expiration time.
-    """
-    return get_config().redis_token_expiration
+    @abstractmethod
+    def loads(self, data: bytes) -> Any:
+        """Deserialize an object.
 
+        Args:
+            data: The serialized payload (starting with the header byte).
 
-class StateManagerRedis(StateManager):
-    """A state manager that stores states in redis."""
+        Returns:
+            The deserialized object.
+        """
+        pass
 
-    # The redis client to use.
-    redis: Redis
+    def dumps_state(self, state: BaseState) -> bytes:
+        """Serialize the persisted fields of a single state instance.
 
-    # The token expiration time (s).
-    token_expiration: int = pydantic.Field(default_factory=_default_token_expiration)
+        Args:
+            state: The state instance to serialize.
 
-    # The maximum time to hold a lock (ms).
-    lock_expiration: int = pydantic.Field(default_factory=_default_lock_expiration)
+        Returns:
+            The serialized payload.
+        """
+        return self.dumps(
+            (
+                state.get_full_name(),
+                state._get_persisted_fields(state._get_persisted_field_names()),
+            )
+        )
+
+
+class DillStateSerializer(StateSerializer):
+    """Serialize with dill, pickling whole state instances (the legacy format)."""
+
+    # dill payloads start with the pickle PROTO opcode.
+    header = b"\x80"
+
+    def dumps(self, obj: Any) -> bytes:
+        """Serialize an object with dill.
+
+        Args:
+            obj: The object to serialize.
+
+        Returns:
+            The serialized payload.
+        """
+        return dill.dumps(obj, byref=True)
+
+    def loads(self, data: bytes) -> Any:
+        """Deserialize an object with dill.
+
+        Args:
+            data: The serialized payload.
+
+        Returns:
+            The deserialized object.
+        """
+        return dill.loads(data)
+
+    def dumps_state(self, state: BaseState) -> bytes:
+        """Serialize a whole state instance with dill.
+
+        Args:
+            state: The state instance to serialize.
+
+        Returns:
+            The serialized payload.
+        """
+        return self.dumps(state)
+
+
+class PickleStateSerializer(StateSerializer):
+    """Serialize with the stdlib pickle (protocol 5), which is much faster than dill.
+
+    Objects that the stdlib pickle cannot handle (like lambdas or locally defined
+    classes) are serialized with dill instead.
+    """
+
+    header = b"\x01"
+
+    def dumps(self, obj: Any) -> bytes:
+        """Serialize an object with pickle, falling back to dill.
+
+        Args:
+            obj: The object to serialize.
+
+        Returns:
+            The serialized payload.
+        """
+        try:
+            return self.header + pickle.dumps(obj, protocol=5)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return STATE_SERIALIZERS["dill"].dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        """Deserialize an object with pickle.
+
+        Args:
+            data: The serialized payload.
+
+        Returns:
+            The deserialized object.
+        """
+        return pickle.loads(memoryview(data)[1:])
+
+
+# The available state serializers, by name (see `Config.state_serializer`).
+STATE_SERIALIZERS: Dict[str, StateSerializer] = {
+    "dill": DillStateSerializer(),
+    "pickle": PickleStateSerializer(),
+}
+
+
+# The codecs used to compress large state payloads, by header byte. A compressed
+# payload is the header byte followed by the compressed serializer payload.
+# Higher header bytes are preferred when compressing.
+STATE_COMPRESSORS: Dict[
+    bytes, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]
+] = {
+    b"\x02": (zlib.compress, zlib.decompress),
+}
+
+try:
+    import lz4.frame
+
+    STATE_COMPRESSORS[b"\x03"] = (lz4.frame.compress, lz4.frame.decompress)
+except ImportError:
+    pass
+
+try:
+    import zstandard
+
+    STATE_COMPRESSORS[b"\x04"] = (
+        zstandard.ZstdCompressor().compress,
+        zstandard.ZstdDecompressor().decompress,
+    )
+except ImportError:
+    pass
+
+
+def _compress_state_payload(data: bytes, threshold: int | None) -> bytes:
+    """Compress a serialized state payload with the best available codec.
+
+    Prefers zstd, then lz4 (if installed), then zlib.
+
+    Args:
+        data: The serialized payload.
+        threshold: Only compress payloads larger than this many bytes (None to disable).
+
+    Returns:
+        The compressed payload, or the original payload if it was not compressed.
+    """
+    if threshold is None or len(data) <= threshold:
+        return data
+    header = max(STATE_COMPRESSORS)
+    compress, _ = STATE_COMPRESSORS[header]
+    compressed = header + compress(data)
+    # Incompressible data is kept as is.
+    return compressed if len(compressed) < len(data) else data
+
+
+def _loads_state_payload(data: bytes) -> Any:
+    """Deserialize a (possibly compressed) payload written by any of the state serializers.
+
+    Args:
+        data: The serialized payload.
+
+    Returns:
+        The deserialized object.
+
+    Raises:
+        StateValueError: If the payload was not written by a known serializer.
+    """
+    from reflex.utils.exceptions import StateValueError
+
+    header = data[:1]
+    if header in STATE_COMPRESSORS:
+        _, decompress = STATE_COMPRESSORS[header]
+        data = decompress(memoryview(data)[1:])
+        header = data[:1]
+    for state_serializer in STATE_SERIALIZERS.values():
+        if header == state_serializer.header:
+            return state_serializer.loads(data)
+    raise StateValueError(
+        f"Unknown state payload header {header!r}. "
+        "Is the compression library used by other workers installed?"
+    )
+
+
+def _default_state_serializer() -> str:
+    """Get the default state serializer.
+
+    Returns:
+        The name of the state serializer.
+    """
+    return get_config().state_serializer
+
+
+def _default_compress_threshold() -> int | None:
+    """Get the default size above which state payloads are compressed.
+
+    Returns:
+        The compression threshold in bytes (None if compression is disabled).
+    """
+    return get_config().redis_compress_threshold
+
+
+def _default_lock_expiration() -> int:
+    """Get the default lock expiration time.
+
+    Returns:
+        The default lock expiration time.
+    """
+    return get_config().redis_lock_expiration
+
+
+def _default_local_cache_size() -> int:
+    """Get the default number of tokens cached in process by the redis state manager.
+
+    Returns:
+        The local cache size (0 if the local cache is disabled).
+    """
+    return get_config().redis_local_cache_size
+
+
+def _default_substate_locks() -> bool:
+    """Get the default lock scope.
+
+    Returns:
+        Whether the redis state manager locks substates instead of the whole token.
+    """
+    return get_config().redis_substate_locks
+
+
+def _default_persist_fields() -> bool:
+    """Get the default field persistence mode.
+
+    Returns:
+        Whether substates are persisted as hashes of individually serialized fields.
+    """
+    return get_config().redis_persist_fields
+
+
+class StateManagerRedis(StateManager):
+    """A state manager that stores states in redis."""
+
+    # The redis client to use.
+    redis: Redis
+
+    # The token expiration time (s).
+    token_expiration: int = pydantic.Field(default_factory=_default_token_expiration)
+
+    # The maximum time to hold a lock (ms).
+    lock_expiration: int = pydantic.Field(default_factory=_default_lock_expiration)
+
+    # Whether to persist each substate as a hash of fields, only writing the touched fields.
+    persist_fields: bool = pydantic.Field(default_factory=_default_persist_fields)
+
+    # The name of the serializer used to persist states (see STATE_SERIALIZERS).
+    serializer: str = pydantic.Field(default_factory=_default_state_serializer)
+
+    # Lock only the substates an event may write instead of the whole token (requires persist_fields).
+    substate_locks: bool = pydantic.Field(default_factory=_default_substate_locks)
+
+    # Compress serialized states (or fields) larger than this many bytes (None to disable).
+    compress_threshold: Optional[int] = pydantic.Field(
+        default_factory=_default_compress_threshold
+    )
+
+    # The number of tokens whose substates are kept deserialized in process (0 to disable).
+    local_cache_size: int = pydantic.Field(default_factory=_default_local_cache_size)
 
     # The keyspace subscription string when redis is waiting for lock to be released
     _redis_notify_keyspace_events: str = (
@@ -2480,182 +3509,1112 @@ class StateManagerRedis(StateManager):
         b"evicted",
     }
 
-    # Only warn about each state class size once.
-    _warned_about_state_size: ClassVar[Set[str]] = set()
+    # Only warn about each state class size once.
+    _warned_about_state_size: ClassVar[Set[str]] = set()
+
+    # Futures resolved when a lock is released, by lock key.
+    _lock_waiters: Dict[bytes, Set[asyncio.Future]] = pydantic.PrivateAttr(
+        default_factory=dict
+    )
+
+    # The task listening for lock release events on behalf of all waiters.
+    _lock_listener: Optional[asyncio.Task] = pydantic.PrivateAttr(None)
+
+    # Resolved once the lock listener is connected.
+    _lock_listener_ready: Optional[asyncio.Future] = pydantic.PrivateAttr(None)
+
+    # The pubsub connection of the lock listener, subscribed to the locks with waiters.
+    _lock_pubsub: Optional[PubSub] = pydantic.PrivateAttr(None)
+
+    # Futures resolved when a subscription to a lock key is confirmed, by lock key.
+    _lock_subscribe_acks: Dict[bytes, List[asyncio.Future]] = pydantic.PrivateAttr(
+        default_factory=dict
+    )
+
+    # Serializes the (un)subscriptions to lock keys.
+    _lock_subscribe_lock: Optional[asyncio.Lock] = pydantic.PrivateAttr(None)
+
+    # The script used to write substates, registered on first use.
+    _set_states_script: Optional[AsyncScript] = pydantic.PrivateAttr(None)
+
+    # Substates kept in process after modify_state, with the version they were persisted at,
+    # by client token (least recently used first).
+    _local_cache: Dict[str, Dict[str, Tuple[Optional[int], BaseState]]] = (
+        pydantic.PrivateAttr(default_factory=dict)
+    )
+
+    def _get_root_state(self, state: BaseState) -> BaseState:
+        """Chase parent_state pointers to find an instance of the top-level state.
+
+        Args:
+            state: The state to start from.
+
+        Returns:
+            An instance of the top-level state (self.state).
+        """
+        while type(state) != self.state and state.parent_state is not None:
+            state = state.parent_state
+        return state
+
+    @staticmethod
+    def _get_required_state_classes(
+        state_cls: Type[BaseState],
+        get_substates: bool = True,
+        get_parent_states: bool = True,
+    ) -> set[Type[BaseState]]:
+        """Determine the state classes that must be fetched to get an instance of state_cls.
+
+        Args:
+            state_cls: The class of the requested state.
+            get_substates: If true, all substates of state_cls are required.
+            get_parent_states: If true, all parent states of state_cls are required.
+
+        Returns:
+            The set of required state classes, including state_cls.
+        """
+        to_visit = [(state_cls, get_substates)]
+        if get_parent_states:
+            parent_state_cls = state_cls.get_parent_state()
+            while parent_state_cls is not None:
+                to_visit.append((parent_state_cls, False))
+                parent_state_cls = parent_state_cls.get_parent_state()
+
+        required_state_classes = set()
+        visited = set()
+        while to_visit:
+            visit = to_visit.pop()
+            if visit in visited:
+                continue
+            visited.add(visit)
+            required_cls, all_substates = visit
+            required_state_classes.add(required_cls)
+            if all_substates:
+                # All substates are requested.
+                fetch_substates = required_cls.get_substates()
+            else:
+                # Only _potentially_dirty_substates need to be fetched to recalc computed vars.
+                fetch_substates = required_cls._potentially_dirty_substates()
+            to_visit.extend(
+                (substate_cls, all_substates) for substate_cls in fetch_substates
+            )
+        return required_state_classes
+
+    def _deserialize_state(
+        self,
+        state_cls: Type[BaseState],
+        redis_state: bytes | dict[bytes, bytes] | None,
+    ) -> BaseState | None:
+        """Deserialize a single substate instance fetched from redis.
+
+        Args:
+            state_cls: The class of the substate.
+            redis_state: The result of GET (pickled state) or HGETALL (pickled fields).
+
+        Returns:
+            The deserialized substate, or None if it was not found in redis.
+        """
+        if not redis_state:
+            return None
+        if isinstance(redis_state, dict):
+            state = state_cls._from_persisted_fields(
+                {
+                    name.decode(): _loads_state_payload(value)
+                    for name, value in redis_state.items()
+                }
+            )
+            # Only touched fields need to be written back.
+            state._touched_vars = set()
+            return state
+        state = _loads_state_payload(redis_state)
+        if isinstance(state, BaseState):
+            # Whole state instance pickled with dill.
+            return state
+        full_name, fields = state
+        return self.state.get_class_substate(full_name)._from_persisted_fields(fields)
+
+    @staticmethod
+    def _version_key(key: str) -> str:
+        """Get the redis key for the version counter of a substate.
+
+        Args:
+            key: The redis key of the substate (_substate_key).
+
+        Returns:
+            The redis key of the version counter.
+        """
+        # ":" cannot appear in a state name, so the key cannot clash with a substate key.
+        return f"{key}:version"
+
+    async def _load_states(
+        self,
+        token: str,
+        state_classes: Sequence[Type[BaseState]],
+        get_versions: bool = False,
+    ) -> tuple[list[BaseState | None], list[int | None]]:
+        """Fetch and deserialize substate instances from redis in a single round trip.
+
+        Substates persisted in either mode (single pickle or hash of fields) can be read,
+        so `persist_fields` may be toggled on an existing deployment.
+
+        Args:
+            token: The token to get the states for.
+            state_classes: The classes of the substates to fetch.
+            get_versions: Whether to also fetch the version counters of the substates.
+
+        Returns:
+            The deserialized substates (None if not found) and their versions (None if
+            not fetched or not found), in the order of state_classes.
+
+        Raises:
+            ResponseError: when redis returns an unexpected error.
+        """
+        client_token, _ = _split_substate_key(token)
+        keys = [_substate_key(client_token, state_cls) for state_cls in state_classes]
+        load_fields = [self.persist_fields] * len(keys)
+        states: list[BaseState | None] = [None] * len(keys)
+        versions: list[int | None] = [None] * len(keys)
+        pending = list(range(len(keys)))
+        for _ in range(2):
+            pipe = self.redis.pipeline(transaction=False)
+            for ix in pending:
+                if load_fields[ix]:
+                    pipe.hgetall(keys[ix])
+                else:
+                    pipe.get(keys[ix])
+            if get_versions:
+                pipe.mget([self._version_key(key) for key in keys])
+            results = await pipe.execute(raise_on_error=False)
+            if get_versions:
+                versions = [
+                    int(version) if version is not None else None
+                    for version in results.pop()
+                ]
+                get_versions = False
+            retry = []
+            for ix, result in zip(pending, results):
+                if isinstance(result, ResponseError):
+                    if "WRONGTYPE" not in str(result):
+                        raise result
+                    # The substate was persisted in the other mode, try again with that mode.
+                    load_fields[ix] = not load_fields[ix]
+                    retry.append(ix)
+                    continue
+                states[ix] = self._deserialize_state(state_classes[ix], result)
+            if not retry:
+                break
+            pending = retry
+        return states, versions
+
+    def _get_state_classes(
+        self, token: str, get_substates: bool = True, get_parent_states: bool = True
+    ) -> tuple[Type[BaseState], list[Type[BaseState]]]:
+        """Get the requested state class and all state classes required to fetch it.
+
+        Args:
+            token: The token to get the state for.
+            get_substates: If true, all substates of the requested state are required.
+            get_parent_states: If true, all parent states of the requested state are required.
+
+        Returns:
+            The requested state class and the required state classes (parents first).
+
+        Raises:
+            RuntimeError: when the state_cls is not specified in the token
+        """
+        # Split the actual token from the fully qualified substate name.
+        _, state_path = _split_substate_key(token)
+        if state_path:
+            # Get the State class associated with the given path.
+            state_cls = self.state.get_class_substate(state_path)
+        else:
+            raise RuntimeError(
+                "StateManagerRedis requires token to be specified in the form of {token}_{state_full_name}"
+            )
+
+        # Parents are sorted before their substates, so they can be linked in order.
+        state_classes = sorted(
+            self._get_required_state_classes(
+                state_cls,
+                get_substates=get_substates,
+                get_parent_states=get_parent_states,
+            ),
+            key=lambda required_cls: required_cls.get_full_name().count("."),
+        )
+        return state_cls, state_classes
+
+    async def get_state(
+        self,
+        token: str,
+        top_level: bool = True,
+        get_substates: bool = True,
+        parent_state: BaseState | None = None,
+    ) -> BaseState:
+        """Get the state for a token.
+
+        All required substates are fetched from redis in a single round trip, then
+        linked together into a state tree.
+
+        Args:
+            token: The token to get the state for.
+            top_level: If true, return an instance of the top-level state (self.state).
+            get_substates: If true, also retrieve substates.
+            parent_state: If provided, use this parent_state instead of getting it from redis.
+
+        Returns:
+            The state for the token.
+        """
+        state_cls, state_classes = self._get_state_classes(
+            token,
+            get_substates=get_substates,
+            get_parent_states=parent_state is None,
+        )
+        loaded_states, _ = await self._load_states(token, state_classes)
+        states = self._link_states(state_classes, loaded_states, parent_state)
+
+        # To retain compatibility with previous implementation, by default, we return
+        # the top-level state by chasing `parent_state` pointers up the tree.
+        if top_level:
+            return self._get_root_state(states[state_cls])
+        return states[state_cls]
+
+    def _warn_if_too_large(
+        self,
+        state: BaseState,
+        pickle_state_size: int,
+    ):
+        """Print a warning when the state is too large.
+
+        Args:
+            state: The state to check.
+            pickle_state_size: The size of the pickled state.
+        """
+        state_full_name = state.get_full_name()
+        if (
+            state_full_name not in self._warned_about_state_size
+            and pickle_state_size > TOO_LARGE_SERIALIZED_STATE
+            and state.substates
+        ):
+            console.warn(
+                f"State {state_full_name} serializes to {pickle_state_size} bytes "
+                "which may present performance issues. Consider reducing the size of this state."
+            )
+            self._warned_about_state_size.add(state_full_name)
+
+    def _get_serializer(self) -> StateSerializer:
+        """Get the configured state serializer.
+
+        Returns:
+            The state serializer.
+
+        Raises:
+            StateValueError: If the configured serializer does not exist.
+        """
+        from reflex.utils.exceptions import StateValueError
+
+        try:
+            return STATE_SERIALIZERS[self.serializer]
+        except KeyError:
+            raise StateValueError(
+                f"Unknown state serializer {self.serializer!r}, "
+                f"expected one of {', '.join(STATE_SERIALIZERS)}."
+            ) from None
+
+    def _get_set_state_args(
+        self, state: BaseState, field_names: Set[str] | None = None
+    ) -> list[Any]:
+        """Serialize a single substate instance into arguments for the set states script.
+
+        Args:
+            state: The substate instance to persist.
+            field_names: Only write these fields (defaults to the fields of the touched vars).
+
+        Returns:
+            The script arguments describing how to write the substate.
+        """
+        state_serializer = self._get_serializer()
+        if not self.persist_fields:
+            pickle_state = state_serializer.dumps_state(state)
+            self._warn_if_too_large(state, len(pickle_state))
+            return [
+                "set",
+                _compress_state_payload(pickle_state, self.compress_threshold),
+            ]
+
+        # A substate that was never persisted as a hash is written in full.
+        touched_vars = state._touched_vars
+        if field_names is None:
+            field_names = state._get_persisted_field_names(touched_vars)
+        fields = {
+            name: state_serializer.dumps(value)
+            for name, value in state._get_persisted_fields(field_names).items()
+        }
+        self._warn_if_too_large(state, sum(len(value) for value in fields.values()))
+        fields = {
+            name: _compress_state_payload(value, self.compress_threshold)
+            for name, value in fields.items()
+        }
+        removed_fields = (
+            field_names - set(fields) if touched_vars is not None else set()
+        )
+        return [
+            "hset" if touched_vars is not None else "hreplace",
+            len(removed_fields),
+            *removed_fields,
+            len(fields),
+            *(item for field in fields.items() for item in field),
+        ]
+
+    async def _set_states(
+        self,
+        token: str,
+        state: BaseState,
+        lock_id: bytes | None = None,
+    ) -> dict[str, int]:
+        """Persist the touched substates of a state tree.
+
+        All touched substates are written in a single atomic script, which also checks
+        that the lock is still held and bumps the version of each written substate.
+
+        Args:
+            token: The token to set the state for.
+            state: The state to set.
+            lock_id: If provided, the lock_key must be set to this value to set the state.
+
+        Returns:
+            The new version of each written substate, by substate key.
+
+        Raises:
+            LockExpiredError: If lock_id is provided and the lock for the token is not held by that ID.
+            RuntimeError: If the state instance doesn't match the state name in the token.
+        """
+        client_token, substate_name = _split_substate_key(token)
+        # If the substate name on the token doesn't match the instance name, it cannot have a parent.
+        if state.parent_state is not None and state.get_full_name() != substate_name:
+            raise RuntimeError(
+                f"Cannot `set_state` with mismatching token {token} and substate {state.get_full_name()}."
+            )
+
+        lock_keys = self._get_lock_keys(token) if lock_id is not None else []
+        check_locks = self.substate_locks and lock_id is not None
+
+        # Persist only the touched states (parents or substates are excluded by BaseState.__getstate__).
+        keys = []
+        args = []
+        touched_states = []
+        to_visit = [state]
+        while to_visit:
+            substate = to_visit.pop()
+            to_visit.extend(substate.substates.values())
+            if substate._get_was_touched():
+                field_names = None
+                if (
+                    check_locks
+                    and self._substate_lock_key(client_token, type(substate))
+                    not in lock_keys
+                ):
+                    field_names = self._get_unlocked_field_names(token, substate)
+                keys.append(_substate_key(client_token, substate))
+                args.extend(self._get_set_state_args(substate, field_names))
+                touched_states.append(substate)
+        if lock_id is None and not keys:
+            return {}
+
+        if self._set_states_script is None:
+            self._set_states_script = self.redis.register_script(_SET_STATES_SCRIPT)
+        versions = await self._set_states_script(
+            keys=[*lock_keys, *keys],
+            args=[lock_id or b"", self.token_expiration, len(lock_keys), *args],
+        )
+        if versions is None:
+            raise LockExpiredError(
+                f"Lock expired for token {token} while processing. Consider increasing "
+                f"`app.state_manager.lock_expiration` (currently {self.lock_expiration}) "
+                "or use `@rx.background` decorator for long-running tasks."
+            )
+        if self.persist_fields:
+            for substate in touched_states:
+                substate._touched_vars = set()
+        return dict(zip(keys, versions))
+
+    @staticmethod
+    def _get_unlocked_field_names(token: str, state: BaseState) -> set[str]:
+        """Get the fields to write for a touched parent state not covered by the locks.
+
+        With substate locks, the parent states of the event's substate are read and
+        written without being locked, so concurrent events in sibling substates could
+        overwrite each other's changes. Only the request data (written by every event,
+        last writer wins) and the computed vars derived from it may be written to them,
+        without the pending dirty vars of the parent state.
+
+        Args:
+            token: The token (with substate path) the state is modified for.
+            state: The touched parent state.
+
+        Returns:
+            The names of the fields to write.
+
+        Raises:
+            StateValueError: If the event modified other vars of the parent state.
+        """
+        touched_vars = state._touched_vars
+        modified_vars = (
+            touched_vars & (set(state.base_vars) | set(state.backend_vars))
+            if touched_vars is not None
+            else {"*"}
+        )
+        if modified_vars - _UNLOCKED_STATE_VARS:
+            from reflex.utils.exceptions import StateValueError
+
+            raise StateValueError(
+                f"Cannot modify {', '.join(sorted(modified_vars - _UNLOCKED_STATE_VARS))}"
+                f" of {state.get_full_name()} while processing an event for {token}: "
+                "with substate locks, the parent states are not locked by an event. "
+                "Modify the vars from an event handler of the parent state, or disable "
+                "`redis_substate_locks`."
+            )
+        return state._get_persisted_field_names(touched_vars) - {
+            "dirty_vars",
+            "dirty_substates",
+            "_sent_snapshots",
+        }
+
+    async def set_state(
+        self,
+        token: str,
+        state: BaseState,
+        lock_id: bytes | None = None,
+    ):
+        """Set the state for a token.
+
+        All touched substates are written in a single atomic script, which also checks
+        that the lock is still held, so a commit cannot partially succeed.
+
+        Args:
+            token: The token to set the state for.
+            state: The state to set.
+            lock_id: If provided, the lock_key must be set to this value to set the state.
+        """
+        await self._set_states(token, state, lock_id)
+
+    def _update_local_cache(
+        self,
+        token: str,
+        state: BaseState,
+        versions: dict[str, int | None],
+    ):
+        """Keep the substates of a state tree in process after it was persisted.
+
+        Only substates whose persisted version is known are cached.
+
+        Args:
+            token: The token of the state.
+            state: The state that was persisted.
+            versions: The persisted version of each substate, by substate key (None
+                for substates that were created and not persisted).
+        """
+        client_token, _ = _split_substate_key(token)
+        cached = {}
+        to_visit = [self._get_root_state(state)]
+        while to_visit:
+            substate = to_visit.pop()
+            to_visit.extend(substate.substates.values())
+            key = _substate_key(client_token, substate)
+            if key in versions:
+                # The instance now matches what is persisted.
+                substate._was_touched = False
+                cached[key] = (versions[key], substate)
+        self._local_cache.pop(client_token, None)
+        if cached:
+            self._local_cache[client_token] = cached
+        while len(self._local_cache) > self.local_cache_size:
+            del self._local_cache[next(iter(self._local_cache))]
+
+    @contextlib.asynccontextmanager
+    async def _modify_cached_state(self, token: str) -> AsyncIterator[BaseState]:
+        """Modify the state for a token, reusing substates kept in process when possible.
+
+        The versions of the cached substates are checked in the same round trip as the
+        lock acquisition, and only outdated or missing substates are fetched.
+
+        Args:
+            token: The token to modify the state for.
+
+        Yields:
+            The state for the token.
+        """
+        client_token, _ = _split_substate_key(token)
+        state_cls, state_classes = self._get_state_classes(token)
+        keys = [
+            _substate_key(client_token, required_cls) for required_cls in state_classes
+        ]
+        async with self._lock(token, [self._version_key(key) for key in keys]) as (
+            lock_id,
+            current_versions,
+        ):
+            # Concurrent events (with substate locks) never share cached instances.
+            cached = self._local_cache.pop(client_token, {})
+            try:
+                instances: list[BaseState | None] = [None] * len(keys)
+                versions = {}
+                load_ix = []
+                for ix, (key, version) in enumerate(zip(keys, current_versions)):
+                    if key in cached and cached[key][0] == version:
+                        instances[ix] = cached[key][1]
+                        instances[ix].substates = {}
+                        versions[key] = version
+                    else:
+                        load_ix.append(ix)
+                if load_ix:
+                    loaded_states, loaded_versions = await self._load_states(
+                        token,
+                        [state_classes[ix] for ix in load_ix],
+                        get_versions=True,
+                    )
+                    for ix, loaded_state, version in zip(
+                        load_ix, loaded_states, loaded_versions
+                    ):
+                        instances[ix] = loaded_state
+                        # Substates persisted without a version cannot be validated.
+                        if loaded_state is None or version is not None:
+                            versions[keys[ix]] = version
+                states = self._link_states(state_classes, instances)
+                state = self._get_root_state(states[state_cls])
+                yield state
+                versions.update(await self._set_states(token, state, lock_id))
+            except BaseException:
+                # The in process instances may not match what is persisted.
+                self._local_cache.pop(client_token, None)
+                raise
+            self._update_local_cache(token, state, versions)
+
+    @contextlib.asynccontextmanager
+    async def modify_state(self, token: str) -> AsyncIterator[BaseState]:
+        """Modify the state for a token while holding exclusive lock.
+
+        Args:
+            token: The token to modify the state for.
+
+        Yields:
+            The state for the token.
+        """
+        if self.local_cache_size > 0:
+            async with self._modify_cached_state(token) as state:
+                yield state
+            return
+        async with self._lock(token) as (lock_id, _):
+            state = await self.get_state(token)
+            yield state
+            await self.set_state(token, state, lock_id)
+
+    @staticmethod
+    def _lock_key(token: str) -> bytes:
+        """Get the redis key for a token's lock.
+
+        Args:
+            token: The token to get the lock key for.
+
+        Returns:
+            The redis lock key for the token.
+        """
+        # All substates share the same lock domain, so ignore any substate path suffix.
+        client_token = _split_substate_key(token)[0]
+        return f"{client_token}_lock".encode()
+
+    @staticmethod
+    def _substate_lock_key(client_token: str, state_cls: Type[BaseState]) -> bytes:
+        """Get the redis key for the lock of a single substate.
+
+        Args:
+            client_token: The client token.
+            state_cls: The substate class.
+
+        Returns:
+            The redis lock key for the substate.
+        """
+        return f"{_substate_key(client_token, state_cls)}_lock".encode()
+
+    def _get_lock_keys(self, token: str) -> list[bytes]:
+        """Get the redis keys of the locks to hold while modifying the state for a token.
+
+        With substate locks, only the substates that may be written by the event are
+        locked: the requested substate, its substates and the substates with computed
+        vars depending on them. Parent states are not locked, so an event may only
+        write the request data to them (see `_get_unlocked_field_names`).
+
+        Args:
+            token: The token (with substate path) to modify the state for.
+
+        Returns:
+            The redis lock keys, sorted.
+
+        Raises:
+            StateValueError: If substate locks are enabled without persist_fields.
+        """
+        if not self.substate_locks:
+            return [self._lock_key(token)]
+        if not self.persist_fields:
+            from reflex.utils.exceptions import StateValueError
+
+            raise StateValueError(
+                "Substate locks require `persist_fields`, so concurrent events only "
+                "write the fields they touched in shared parent states."
+            )
+        client_token, state_path = _split_substate_key(token)
+        state_cls = (
+            self.state.get_class_substate(state_path) if state_path else self.state
+        )
+        parent_state_classes = set()
+        parent_state_cls = state_cls.get_parent_state()
+        while parent_state_cls is not None:
+            parent_state_classes.add(parent_state_cls)
+            parent_state_cls = parent_state_cls.get_parent_state()
+        return sorted(
+            self._substate_lock_key(client_token, required_cls)
+            for required_cls in self._get_required_state_classes(state_cls)
+            - parent_state_classes
+        )
+
+    def _lock_command(self, client: Any, lock_keys: Sequence[bytes], lock_id: bytes):
+        """Issue the command trying to get all the locks at once.
+
+        Args:
+            client: The redis client or pipeline to issue the command with.
+            lock_keys: The redis keys for the locks.
+            lock_id: The ID of the lock.
+
+        Returns:
+            The result of the command (truthy if the locks were obtained).
+        """
+        if len(lock_keys) == 1:
+            return client.set(
+                lock_keys[0],
+                lock_id,
+                px=self.lock_expiration,
+                nx=True,  # only set if it doesn't exist
+            )
+        return client.eval(
+            _LOCK_SCRIPT, len(lock_keys), *lock_keys, lock_id, self.lock_expiration
+        )
+
+    async def _try_get_lock(
+        self, lock_keys: Sequence[bytes], lock_id: bytes
+    ) -> bool | None:
+        """Try to get redis locks for a token.
+
+        Args:
+            lock_keys: The redis keys for the locks.
+            lock_id: The ID of the lock.
+
+        Returns:
+            True if all the locks were obtained.
+        """
+        return bool(await self._lock_command(self.redis, lock_keys, lock_id))
+
+    def _wake_lock_waiters(self, lock_key: bytes | None = None):
+        """Wake up the coroutines waiting for a lock to be released.
+
+        Args:
+            lock_key: The redis key of the released lock (None to wake all waiters).
+        """
+        if lock_key is None:
+            waiters = [
+                waiter for waiters in self._lock_waiters.values() for waiter in waiters
+            ]
+            self._lock_waiters.clear()
+        else:
+            # Waiters unregister (and unsubscribe) themselves once woken up.
+            waiters = list(self._lock_waiters.get(lock_key, ()))
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _lock_channel(self, lock_key: bytes) -> bytes:
+        """Get the keyspace notification channel of a lock key.
+
+        Args:
+            lock_key: The redis key of the lock.
+
+        Returns:
+            The channel notified when the lock key changes.
+        """
+        db = self.redis.connection_pool.connection_kwargs.get("db", 0)
+        return f"__keyspace@{db}__:".encode() + lock_key
+
+    async def _listen_lock_releases(self, ready: asyncio.Future):
+        """Dispatch lock release events to the waiting coroutines.
+
+        Keyspace notifications are enabled once and a single pubsub connection,
+        shared by every waiter in the process, is subscribed to the keyspace channels
+        of the lock keys with local waiters only (so the events of locks that nobody
+        in this process waits for are not delivered to it).
+
+        Args:
+            ready: Resolved once connected to receive lock release events.
+
+        Raises:
+            ResponseError: when the keyspace config cannot be set.
+        """
+        try:
+            # Enable keyspace notifications for the lock keys, so we know when they are available.
+            try:
+                await self.redis.config_set(
+                    "notify-keyspace-events",
+                    self._redis_notify_keyspace_events,
+                )
+            except ResponseError:
+                # Some redis servers only allow out-of-band configuration, so ignore errors here.
+                ignore_config_error = os.environ.get(
+                    "REFLEX_IGNORE_REDIS_CONFIG_ERROR",
+                    None,
+                )
+                if not ignore_config_error:
+                    raise
+            async with self.redis.pubsub() as pubsub:
+                await pubsub.connect()
+                self._lock_pubsub = pubsub
+                ready.set_result(None)
+                while True:
+                    message = await pubsub.get_message(timeout=None)
+                    if message is None:
+                        continue
+                    lock_key = message["channel"].partition(b":")[2]
+                    if message["type"] == "subscribe":
+                        acks = self._lock_subscribe_acks.get(lock_key)
+                        if acks:
+                            ack = acks.pop(0)
+                            if not acks:
+                                del self._lock_subscribe_acks[lock_key]
+                            if not ack.done():
+                                ack.set_result(None)
+                    elif (
+                        message["type"] == "message"
+                        and message["data"] in self._redis_keyspace_lock_release_events
+                    ):
+                        self._wake_lock_waiters(lock_key)
+        except Exception as err:
+            if not ready.done():
+                ready.set_exception(err)
+                return
+            console.warn(f"Stopped listening for redis lock release events: {err}")
+        finally:
+            self._lock_pubsub = None
+            for acks in self._lock_subscribe_acks.values():
+                for ack in acks:
+                    if not ack.done():
+                        ack.set_result(None)
+            self._lock_subscribe_acks.clear()
+            # Waiters retry to get the lock (and restart the listener).
+            self._wake_lock_waiters()
+
+    async def _ensure_lock_listener(self):
+        """Start listening for lock release events, if not already listening.
+
+        Coroutine will not return until the listener is connected.
+        """
+        loop = asyncio.get_running_loop()
+        if (
+            self._lock_listener is None
+            or self._lock_listener.done()
+            or self._lock_listener.get_loop() is not loop
+        ):
+            self._lock_waiters.clear()
+            self._lock_subscribe_acks.clear()
+            self._lock_subscribe_lock = asyncio.Lock()
+            self._lock_listener_ready = loop.create_future()
+            self._lock_listener = loop.create_task(
+                self._listen_lock_releases(self._lock_listener_ready)
+            )
+        await asyncio.shield(self._lock_listener_ready)  # type: ignore
+
+    async def _add_lock_waiter(
+        self, lock_keys: Sequence[bytes], waiter: asyncio.Future
+    ):
+        """Register a waiter for lock keys, subscribing to their release events.
+
+        Coroutine will not return until the subscriptions are confirmed.
+
+        Args:
+            lock_keys: The redis keys for the locks.
+            waiter: The future resolved when one of the locks is released.
+        """
+        loop = asyncio.get_running_loop()
+        async with self._lock_subscribe_lock:  # type: ignore
+            new_keys = [
+                lock_key for lock_key in lock_keys if lock_key not in self._lock_waiters
+            ]
+            for lock_key in lock_keys:
+                self._lock_waiters.setdefault(lock_key, set()).add(waiter)
+            pubsub = self._lock_pubsub
+            if pubsub is None:
+                return
+            if new_keys:
+                for lock_key in new_keys:
+                    self._lock_subscribe_acks.setdefault(lock_key, []).append(
+                        loop.create_future()
+                    )
+                await pubsub.subscribe(*map(self._lock_channel, new_keys))
+            # Also wait for the subscriptions still pending for other waiters.
+            acks = [
+                self._lock_subscribe_acks[lock_key][-1]
+                for lock_key in lock_keys
+                if lock_key in self._lock_subscribe_acks
+            ]
+        if acks:
+            await asyncio.wait(acks)
+
+    async def _remove_lock_waiter(
+        self, lock_keys: Sequence[bytes], waiter: asyncio.Future
+    ):
+        """Unregister a waiter, unsubscribing from the locks nobody waits for anymore.
+
+        Args:
+            lock_keys: The redis keys for the locks.
+            waiter: The future passed to _add_lock_waiter.
+        """
+        async with self._lock_subscribe_lock:  # type: ignore
+            unused_keys = []
+            for lock_key in lock_keys:
+                waiters = self._lock_waiters.get(lock_key)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self._lock_waiters[lock_key]
+                        unused_keys.append(lock_key)
+            if unused_keys and self._lock_pubsub is not None:
+                await self._lock_pubsub.unsubscribe(
+                    *map(self._lock_channel, unused_keys)
+                )
+
+    async def _wait_lock(self, lock_keys: Sequence[bytes], lock_id: bytes) -> None:
+        """Wait for redis locks to be released via pubsub.
+
+        Coroutine will not return until all the locks are obtained.
+
+        Args:
+            lock_keys: The redis keys for the locks.
+            lock_id: The ID of the lock.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._ensure_lock_listener()
+            # Subscribe before trying, so a release in between is not missed.
+            waiter = loop.create_future()
+            try:
+                await self._add_lock_waiter(lock_keys, waiter)
+                if await self._try_get_lock(lock_keys, lock_id):
+                    return
+                await asyncio.wait_for(waiter, timeout=self.lock_expiration / 1000.0)
+            except asyncio.TimeoutError:
+                pass  # the lock has expired by now, try to get it again
+            finally:
+                await self._remove_lock_waiter(lock_keys, waiter)
+
+    @contextlib.asynccontextmanager
+    async def _lock(self, token: str, version_keys: Sequence[str] = ()):
+        """Obtain a redis lock for a token.
+
+        Depending on `substate_locks`, either the token or only the substates that may
+        be written by the event are locked.
+
+        Args:
+            token: The token to obtain a lock for.
+            version_keys: The version counters to read once the lock is obtained.
+
+        Yields:
+            The ID of the lock (to be passed to set_state) and the versions read while
+            holding the lock.
+
+        Raises:
+            LockExpiredError: If the lock has expired while processing the event.
+        """
+        lock_keys = self._get_lock_keys(token)
+        lock_id = uuid.uuid4().hex.encode()
+
+        # Read the versions in the same round trip as the fast path lock attempt.
+        pipe = self.redis.pipeline(transaction=False)
+        self._lock_command(pipe, lock_keys, lock_id)
+        if version_keys:
+            pipe.mget(version_keys)
+        state_is_locked, *results = await pipe.execute()
+        versions = results[0] if results else []
+        if not state_is_locked:
+            # Missed the fast-path to get lock, subscribe for lock delete/expire events
+            await self._wait_lock(lock_keys, lock_id)
+            # The versions may have changed while the lock was held by another worker.
+            versions = await self.redis.mget(version_keys) if version_keys else []
+        state_is_locked = True
+
+        try:
+            yield (
+                lock_id,
+                [int(version) if version is not None else None for version in versions],
+            )
+        except LockExpiredError:
+            state_is_locked = False
+            raise
+        finally:
+            if state_is_locked:
+                # only delete our lock
+                await self.redis.delete(*lock_keys)
+
+    async def close(self):
+        """Explicitly close the redis connection and connection_pool.
+
+        It is necessary in testing scenarios to close between asyncio test cases
+        to avoid having lingering redis connections associated with event loops
+        that will be closed (each test case uses its own event loop).
+
+        Note: Connections will be automatically reopened when needed.
+        """
+        listener = self._lock_listener
+        self._lock_listener = None
+        if listener is not None and listener.get_loop() is asyncio.get_running_loop():
+            listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await listener
+        await self.redis.aclose(close_connection_pool=True)
+
+
+_SQLITE_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS states ("
+    "key TEXT PRIMARY KEY, client_token TEXT NOT NULL, state_name TEXT NOT NULL, "
+    "state BLOB NOT NULL, expires_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS states_client_token ON states (client_token)",
+    "CREATE TABLE IF NOT EXISTS locks ("
+    "client_token TEXT PRIMARY KEY, lock_id BLOB NOT NULL, expires_at REAL NOT NULL)",
+)
+
+
+class StateManagerSQLite(StateManager):
+    """A state manager that stores states in a local SQLite database.
+
+    The database is shared by all the backend workers of a single host, so more than
+    one worker can be used without redis.
+    """
+
+    # The path of the SQLite database.
+    db_path: str
+
+    # The token expiration time (s).
+    token_expiration: int = pydantic.Field(default_factory=_default_token_expiration)
+
+    # The maximum time to hold a lock (ms).
+    lock_expiration: int = pydantic.Field(default_factory=_default_lock_expiration)
+
+    # The name of the serializer used to persist states (see STATE_SERIALIZERS).
+    serializer: str = pydantic.Field(default_factory=_default_state_serializer)
+
+    # The maximum time (s) between attempts to get a lock held by another event.
+    _max_lock_poll_interval: ClassVar[float] = 0.1
 
-    def _get_root_state(self, state: BaseState) -> BaseState:
-        """Chase parent_state pointers to find an instance of the top-level state.
+    # The connection to the database, opened on first use in each worker process.
+    _connection: Optional[sqlite3.Connection] = pydantic.PrivateAttr(None)
 
-        Args:
-            state: The state to start from.
+    # The process that opened the connection.
+    _connection_pid: Optional[int] = pydantic.PrivateAttr(None)
+
+    # The connection is shared by the threads running the queries.
+    _connection_lock: threading.Lock = pydantic.PrivateAttr(
+        default_factory=threading.Lock
+    )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get the connection to the database, opening it if needed.
 
         Returns:
-            An instance of the top-level state (self.state).
+            The connection to the database.
         """
-        while type(state) != self.state and state.parent_state is not None:
-            state = state.parent_state
-        return state
-
-    async def _get_parent_state(self, token: str) -> BaseState | None:
-        """Get the parent state for the state requested in the token.
+        # Connections cannot be used across fork, the workers are forked from a preloaded app.
+        if self._connection is None or self._connection_pid != os.getpid():
+            connection = sqlite3.connect(
+                self.db_path,
+                timeout=self.lock_expiration / 1000.0,
+                isolation_level=None,  # transactions are explicit
+                check_same_thread=False,
+            )
+            # Readers never block the writer (and vice versa).
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            for statement in _SQLITE_SCHEMA:
+                connection.execute(statement)
+            self._connection = connection
+            self._connection_pid = os.getpid()
+        return self._connection
+
+    async def _run(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run database queries in a thread, to not block the event loop.
 
         Args:
-            token: The token to get the state for (_substate_key).
+            fn: The function running the queries, given the connection.
 
         Returns:
-            The parent state for the state requested by the token or None if there is no such parent.
+            The result of the function.
         """
-        parent_state = None
-        client_token, state_path = _split_substate_key(token)
-        parent_state_name = state_path.rpartition(".")[0]
-        if parent_state_name:
-            # Retrieve the parent state to populate event handlers onto this substate.
-            parent_state = await self.get_state(
-                token=_substate_key(client_token, parent_state_name),
-                top_level=False,
-                get_substates=False,
-            )
-        return parent_state
 
-    async def _populate_substates(
-        self,
-        token: str,
-        state: BaseState,
-        all_substates: bool = False,
-    ):
-        """Fetch and link substates for the given state instance.
+        def run():
+            with self._connection_lock:
+                return fn(self._connect())
 
-        There is no return value; the side-effect is that `state` will have `substates` populated,
-        and each substate will have its `parent_state` set to `state`.
+        return await asyncio.get_running_loop().run_in_executor(None, run)
 
-        Args:
-            token: The token to get the state for.
-            state: The state instance to populate substates for.
-            all_substates: Whether to fetch all substates or just required substates.
-        """
-        client_token, _ = _split_substate_key(token)
+    @staticmethod
+    @contextlib.contextmanager
+    def _transaction(connection: sqlite3.Connection):
+        """Run queries in a write transaction.
 
-        if all_substates:
-            # All substates are requested.
-            fetch_substates = state.get_substates()
-        else:
-            # Only _potentially_dirty_substates need to be fetched to recalc computed vars.
-            fetch_substates = state._potentially_dirty_substates()
-
-        tasks = {}
-        # Retrieve the necessary substates from redis.
-        for substate_cls in fetch_substates:
-            substate_name = substate_cls.get_name()
-            tasks[substate_name] = asyncio.create_task(
-                self.get_state(
-                    token=_substate_key(client_token, substate_cls),
-                    top_level=False,
-                    get_substates=all_substates,
-                    parent_state=state,
-                )
-            )
+        Args:
+            connection: The connection to the database.
 
-        for substate_name, substate_task in tasks.items():
-            state.substates[substate_name] = await substate_task
+        Yields:
+            The connection to the database.
+        """
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
 
-    async def get_state(
-        self,
-        token: str,
-        top_level: bool = True,
-        get_substates: bool = True,
-        parent_state: BaseState | None = None,
-    ) -> BaseState:
+    async def get_state(self, token: str) -> BaseState:
         """Get the state for a token.
 
         Args:
             token: The token to get the state for.
-            top_level: If true, return an instance of the top-level state (self.state).
-            get_substates: If true, also retrieve substates.
-            parent_state: If provided, use this parent_state instead of getting it from redis.
 
         Returns:
             The state for the token.
-
-        Raises:
-            RuntimeError: when the state_cls is not specified in the token
         """
-        # Split the actual token from the fully qualified substate name.
-        _, state_path = _split_substate_key(token)
-        if state_path:
-            # Get the State class associated with the given path.
-            state_cls = self.state.get_class_substate(state_path)
-        else:
-            raise RuntimeError(
-                "StateManagerRedis requires token to be specified in the form of {token}_{state_full_name}"
-            )
-
-        # Fetch the serialized substate from redis.
-        redis_state = await self.redis.get(token)
-
-        if redis_state is not None:
-            # Deserialize the substate.
-            state = dill.loads(redis_state)
-
-            # Populate parent state if missing and requested.
-            if parent_state is None:
-                parent_state = await self._get_parent_state(token)
-            # Set up Bidirectional linkage between this state and its parent.
-            if parent_state is not None:
-                parent_state.substates[state.get_name()] = state
-                state.parent_state = parent_state
-            # Populate substates if requested.
-            await self._populate_substates(token, state, all_substates=get_substates)
-
-            # To retain compatibility with previous implementation, by default, we return
-            # the top-level state by chasing `parent_state` pointers up the tree.
-            if top_level:
-                return self._get_root_state(state)
-            return state
-
-        # TODO: dedupe the following logic with the above block
-        # Key didn't exist so we have to create a new instance for this token.
-        if parent_state is None:
-            parent_state = await self._get_parent_state(token)
-        # Instantiate the new state class (but don't persist it yet).
-        state = state_cls(
-            parent_state=parent_state,
-            init_substates=False,
-            _reflex_internal_init=True,
+        # SQLite state manager ignores the substate suffix and always returns the top-level state.
+        client_token = _split_substate_key(token)[0]
+        rows = await self._run(
+            lambda connection: connection.execute(
+                "SELECT state_name, state FROM states "
+                "WHERE client_token = ? AND expires_at > ?",
+                (client_token, time.time()),
+            ).fetchall()
         )
-        # Set up Bidirectional linkage between this state and its parent.
-        if parent_state is not None:
-            parent_state.substates[state.get_name()] = state
-            state.parent_state = parent_state
-        # Populate substates for the newly created state.
-        await self._populate_substates(token, state, all_substates=get_substates)
-        # To retain compatibility with previous implementation, by default, we return
-        # the top-level state by chasing `parent_state` pointers up the tree.
-        if top_level:
-            return self._get_root_state(state)
-        return state
-
-    def _warn_if_too_large(
-        self,
-        state: BaseState,
-        pickle_state_size: int,
-    ):
-        """Print a warning when the state is too large.
-
-        Args:
-            state: The state to check.
-            pickle_state_size: The size of the pickled state.
-        """
-        state_full_name = state.get_full_name()
-        if (
-            state_full_name not in self._warned_about_state_size
-            and pickle_state_size > TOO_LARGE_SERIALIZED_STATE
-            and state.substates
-        ):
-            console.warn(
-                f"State {state_full_name} serializes to {pickle_state_size} bytes "
-                "which may present performance issues. Consider reducing the size of this state."
-            )
-            self._warned_about_state_size.add(state_full_name)
+        loaded_states = {}
+        for state_name, payload in rows:
+            try:
+                state_cls = self.state.get_class_substate(state_name)
+            except ValueError:
+                continue  # the state class was removed from the app
+            state = _loads_state_payload(payload)
+            if not isinstance(state, BaseState):
+                # Fields of the state pickled by PickleStateSerializer.
+                state = state_cls._from_persisted_fields(state[1])
+            loaded_states[state_cls] = state
+
+        # Parents are listed before their substates, so they can be linked in order.
+        state_classes = [self.state]
+        for state_cls in state_classes:
+            state_classes.extend(state_cls.get_substates())
+        states = self._link_states(
+            state_classes,
+            [loaded_states.get(state_cls) for state_cls in state_classes],
+        )
+        return states[self.state]
 
     async def set_state(
         self,
@@ -2665,57 +4624,64 @@ class StateManagerRedis(StateManager):
     ):
         """Set the state for a token.
 
+        All touched substates are written in a single transaction, which also checks
+        that the lock is still held.
+
         Args:
             token: The token to set the state for.
             state: The state to set.
-            lock_id: If provided, the lock_key must be set to this value to set the state.
+            lock_id: If provided, the lock must be held with this ID to set the state.
 
         Raises:
             LockExpiredError: If lock_id is provided and the lock for the token is not held by that ID.
-            RuntimeError: If the state instance doesn't match the state name in the token.
         """
-        # Check that we're holding the lock.
-        if (
-            lock_id is not None
-            and await self.redis.get(self._lock_key(token)) != lock_id
-        ):
+        client_token = _split_substate_key(token)[0]
+        state_serializer = STATE_SERIALIZERS[self.serializer]
+        expires_at = time.time() + self.token_expiration
+        rows = []
+        to_visit = [state]
+        while to_visit:
+            substate = to_visit.pop()
+            to_visit.extend(substate.substates.values())
+            if substate._get_was_touched():
+                rows.append(
+                    (
+                        _substate_key(client_token, substate),
+                        client_token,
+                        substate.get_full_name(),
+                        state_serializer.dumps_state(substate),
+                        expires_at,
+                    )
+                )
+
+        def write(connection: sqlite3.Connection) -> bool:
+            with self._transaction(connection):
+                if (
+                    lock_id is not None
+                    and connection.execute(
+                        "SELECT 1 FROM locks "
+                        "WHERE client_token = ? AND lock_id = ? AND expires_at > ?",
+                        (client_token, lock_id, time.time()),
+                    ).fetchone()
+                    is None
+                ):
+                    return False
+                connection.executemany(
+                    "INSERT OR REPLACE INTO states VALUES (?, ?, ?, ?, ?)", rows
+                )
+                # The untouched substates expire with the touched ones.
+                connection.execute(
+                    "UPDATE states SET expires_at = ? WHERE client_token = ?",
+                    (expires_at, client_token),
+                )
+            return True
+
+        if not await self._run(write):
             raise LockExpiredError(
                 f"Lock expired for token {token} while processing. Consider increasing "
                 f"`app.state_manager.lock_expiration` (currently {self.lock_expiration}) "
                 "or use `@rx.background` decorator for long-running tasks."
             )
-        client_token, substate_name = _split_substate_key(token)
-        # If the substate name on the token doesn't match the instance name, it cannot have a parent.
-        if state.parent_state is not None and state.get_full_name() != substate_name:
-            raise RuntimeError(
-                f"Cannot `set_state` with mismatching token {token} and substate {state.get_full_name()}."
-            )
-
-        # Recursively set_state on all known substates.
-        tasks = []
-        for substate in state.substates.values():
-            tasks.append(
-                asyncio.create_task(
-                    self.set_state(
-                        token=_substate_key(client_token, substate),
-                        state=substate,
-                        lock_id=lock_id,
-                    )
-                )
-            )
-        # Persist only the given state (parents or substates are excluded by BaseState.__getstate__).
-        if state._get_was_touched():
-            pickle_state = dill.dumps(state, byref=True)
-            self._warn_if_too_large(state, len(pickle_state))
-            await self.redis.set(
-                _substate_key(client_token, state),
-                pickle_state,
-                ex=self.token_expiration,
-            )
-
-        # Wait for substates to be persisted.
-        for t in tasks:
-            await t
 
     @contextlib.asynccontextmanager
     async def modify_state(self, token: str) -> AsyncIterator[BaseState]:
@@ -2732,123 +4698,76 @@ class StateManagerRedis(StateManager):
             yield state
             await self.set_state(token, state, lock_id)
 
-    @staticmethod
-    def _lock_key(token: str) -> bytes:
-        """Get the redis key for a token's lock.
-
-        Args:
-            token: The token to get the lock key for.
-
-        Returns:
-            The redis lock key for the token.
-        """
-        # All substates share the same lock domain, so ignore any substate path suffix.
-        client_token = _split_substate_key(token)[0]
-        return f"{client_token}_lock".encode()
-
-    async def _try_get_lock(self, lock_key: bytes, lock_id: bytes) -> bool | None:
-        """Try to get a redis lock for a token.
-
-        Args:
-            lock_key: The redis key for the lock.
-            lock_id: The ID of the lock.
-
-        Returns:
-            True if the lock was obtained.
-        """
-        return await self.redis.set(
-            lock_key,
-            lock_id,
-            px=self.lock_expiration,
-            nx=True,  # only set if it doesn't exist
-        )
-
-    async def _wait_lock(self, lock_key: bytes, lock_id: bytes) -> None:
-        """Wait for a redis lock to be released via pubsub.
-
-        Coroutine will not return until the lock is obtained.
-
-        Args:
-            lock_key: The redis key for the lock.
-            lock_id: The ID of the lock.
-
-        Raises:
-            ResponseError: when the keyspace config cannot be set.
-        """
-        state_is_locked = False
-        lock_key_channel = f"__keyspace@0__:{lock_key.decode()}"
-        # Enable keyspace notifications for the lock key, so we know when it is available.
-        try:
-            await self.redis.config_set(
-                "notify-keyspace-events",
-                self._redis_notify_keyspace_events,
-            )
-        except ResponseError:
-            # Some redis servers only allow out-of-band configuration, so ignore errors here.
-            ignore_config_error = os.environ.get(
-                "REFLEX_IGNORE_REDIS_CONFIG_ERROR",
-                None,
-            )
-            if not ignore_config_error:
-                raise
-        async with self.redis.pubsub() as pubsub:
-            await pubsub.psubscribe(lock_key_channel)
-            while not state_is_locked:
-                # wait for the lock to be released
-                while True:
-                    if not await self.redis.exists(lock_key):
-                        break  # key was removed, try to get the lock again
-                    message = await pubsub.get_message(
-                        ignore_subscribe_messages=True,
-                        timeout=self.lock_expiration / 1000.0,
-                    )
-                    if message is None:
-                        continue
-                    if message["data"] in self._redis_keyspace_lock_release_events:
-                        break
-                state_is_locked = await self._try_get_lock(lock_key, lock_id)
-
     @contextlib.asynccontextmanager
     async def _lock(self, token: str):
-        """Obtain a redis lock for a token.
+        """Obtain a lock for a token, shared by all the workers using the database.
 
         Args:
             token: The token to obtain a lock for.
 
         Yields:
             The ID of the lock (to be passed to set_state).
-
-        Raises:
-            LockExpiredError: If the lock has expired while processing the event.
         """
-        lock_key = self._lock_key(token)
+        client_token = _split_substate_key(token)[0]
         lock_id = uuid.uuid4().hex.encode()
 
-        if not await self._try_get_lock(lock_key, lock_id):
-            # Missed the fast-path to get lock, subscribe for lock delete/expire events
-            await self._wait_lock(lock_key, lock_id)
-        state_is_locked = True
+        def try_lock(connection: sqlite3.Connection) -> bool:
+            now = time.time()
+            with self._transaction(connection):
+                connection.execute(
+                    "DELETE FROM locks WHERE client_token = ? AND expires_at <= ?",
+                    (client_token, now),
+                )
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO locks VALUES (?, ?, ?)",
+                    (client_token, lock_id, now + self.lock_expiration / 1000.0),
+                )
+            return cursor.rowcount == 1
+
+        # There are no notifications across processes, so poll with a growing interval.
+        poll_interval = 0.005
+        while not await self._run(try_lock):
+            await asyncio.sleep(poll_interval)
+            poll_interval = min(poll_interval * 2, self._max_lock_poll_interval)
 
         try:
             yield lock_id
-        except LockExpiredError:
-            state_is_locked = False
-            raise
         finally:
-            if state_is_locked:
-                # only delete our lock
-                await self.redis.delete(lock_key)
+            # only delete our lock
+            await self._run(
+                lambda connection: connection.execute(
+                    "DELETE FROM locks WHERE client_token = ? AND lock_id = ?",
+                    (client_token, lock_id),
+                )
+            )
 
-    async def close(self):
-        """Explicitly close the redis connection and connection_pool.
+    async def _sweep_states(self):
+        """Periodically delete the expired states and locks.
 
-        It is necessary in testing scenarios to close between asyncio test cases
-        to avoid having lingering redis connections associated with event loops
-        that will be closed (each test case uses its own event loop).
+        Registered as a lifespan task of the app.
+        """
 
-        Note: Connections will be automatically reopened when needed.
+        def sweep(connection: sqlite3.Connection):
+            now = time.time()
+            with self._transaction(connection):
+                connection.execute("DELETE FROM states WHERE expires_at <= ?", (now,))
+                connection.execute("DELETE FROM locks WHERE expires_at <= ?", (now,))
+
+        while True:
+            await asyncio.sleep(
+                min(self.token_expiration, constants.Expiration.STATE_SWEEP)
+            )
+            await self._run(sweep)
+
+    async def close(self):
+        """Close the connection to the database.
+
+        Note: The connection will be automatically reopened when needed.
         """
-        await self.redis.aclose(close_connection_pool=True)
+        with self._connection_lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
 
 
 def get_state_manager() -> StateManager:
@@ -2998,6 +4917,190 @@ class SessionStorage(ClientStorageBase, str):
         return inst
 
 
+def _json_pointer(key: Any) -> str:
+    """Format a list index or dict key as a JSON pointer (RFC 6901) to an item of a var.
+
+    Args:
+        key: The index or key.
+
+    Returns:
+        The JSON pointer.
+    """
+    return "/" + str(key).replace("~", "~0").replace("/", "~1")
+
+
+def _get_list_json_patch(
+    value: list, method: str, args: tuple, kwargs: dict
+) -> list[dict[str, Any]] | None:
+    """Get the JSON patch operations equivalent to calling a method of a list.
+
+    Args:
+        value: The list, before calling the method.
+        method: The name of the method.
+        args: The positional arguments of the method.
+        kwargs: The keyword arguments of the method.
+
+    Returns:
+        The operations, or None if the change cannot be described by a patch.
+    """
+    if kwargs:
+        return None
+    size = len(value)
+    if method == "append":
+        return [{"op": "add", "path": "/-", "value": args[0]}]
+    if method == "extend" and isinstance(args[0], (list, tuple)):
+        return [{"op": "add", "path": "/-", "value": item} for item in args[0]]
+    if method == "insert" and isinstance(args[0], int):
+        index = args[0] if args[0] >= 0 else max(args[0] + size, 0)
+        return [
+            {"op": "add", "path": _json_pointer(min(index, size)), "value": args[1]}
+        ]
+    if method == "remove" and args[0] in value:
+        return [{"op": "remove", "path": _json_pointer(value.index(args[0]))}]
+    if method in ("pop", "__delitem__", "__setitem__"):
+        index = args[0] if args else -1
+        if not isinstance(index, int) or not -size <= index < size:
+            return None
+        path = _json_pointer(index % size)
+        if method == "__setitem__":
+            return [{"op": "replace", "path": path, "value": args[1]}]
+        return [{"op": "remove", "path": path}]
+    return None
+
+
+def _get_dict_json_patch(
+    value: dict, method: str, args: tuple, kwargs: dict
+) -> list[dict[str, Any]] | None:
+    """Get the JSON patch operations equivalent to calling a method of a dict.
+
+    Args:
+        value: The dict, before calling the method.
+        method: The name of the method.
+        args: The positional arguments of the method.
+        kwargs: The keyword arguments of the method.
+
+    Returns:
+        The operations, or None if the change cannot be described by a patch.
+    """
+    if method == "update":
+        if len(args) > 1 or (args and not isinstance(args[0], dict)):
+            return None
+        items = {**args[0], **kwargs} if args else kwargs
+    elif kwargs or not args:
+        return None
+    elif method in ("__setitem__", "setdefault"):
+        if method == "setdefault" and args[0] in value:
+            return []
+        items = {args[0]: args[1] if len(args) > 1 else None}
+    elif method in ("pop", "__delitem__"):
+        if not isinstance(args[0], str):
+            return None
+        if args[0] not in value:
+            return []
+        return [{"op": "remove", "path": _json_pointer(args[0])}]
+    else:
+        return None
+    if not all(isinstance(key, str) for key in items):
+        # Other keys are converted to strings in JSON, which cannot always be reversed.
+        return None
+    return [
+        {"op": "add", "path": _json_pointer(key), "value": item}
+        for key, item in items.items()
+    ]
+
+
+def _fingerprint(value: Any) -> bytes:
+    """Get a digest of the JSON representation of a value sent to the frontend.
+
+    Args:
+        value: The value.
+
+    Returns:
+        The digest.
+    """
+    return hashlib.blake2b(format.json_dumps(value).encode(), digest_size=16).digest()
+
+
+def _get_diff_snapshot(value: Any) -> Any:
+    """Get a compact snapshot of a diff var value sent to the frontend.
+
+    Args:
+        value: The value.
+
+    Returns:
+        The fingerprints of the items of lists and dicts, or of the whole value.
+    """
+    if isinstance(value, list):
+        return [_fingerprint(item) for item in value]
+    if isinstance(value, dict) and all(isinstance(key, str) for key in value):
+        return {key: _fingerprint(item) for key, item in value.items()}
+    return _fingerprint(value)
+
+
+def _get_snapshot_json_patch(
+    last_snapshot: Any, snapshot: Any, value: Any
+) -> list[dict[str, Any]] | None:
+    """Get the JSON patch operations changing the last sent value of a diff var into the new one.
+
+    Args:
+        last_snapshot: The snapshot of the value last sent to the frontend.
+        snapshot: The snapshot of the new value.
+        value: The new value.
+
+    Returns:
+        The operations, or None if the values are not both lists or both dicts.
+    """
+    if isinstance(last_snapshot, list) and isinstance(snapshot, list):
+        patch = [
+            {"op": "replace", "path": _json_pointer(index), "value": value[index]}
+            for index, (last, new) in enumerate(zip(last_snapshot, snapshot))
+            if last != new
+        ]
+        patch.extend(
+            {"op": "add", "path": "/-", "value": item}
+            for item in value[len(last_snapshot) :]
+        )
+        patch.extend(
+            {"op": "remove", "path": _json_pointer(index)}
+            for index in reversed(range(len(snapshot), len(last_snapshot)))
+        )
+        return patch
+    if isinstance(last_snapshot, dict) and isinstance(snapshot, dict):
+        patch = [
+            {"op": "remove", "path": _json_pointer(key)}
+            for key in last_snapshot
+            if key not in snapshot
+        ]
+        patch.extend(
+            {"op": "add", "path": _json_pointer(key), "value": value[key]}
+            for key, new in snapshot.items()
+            if last_snapshot.get(key) != new
+        )
+        return patch
+    return None
+
+
+def _get_json_patch(
+    value: Any, method: str, args: tuple, kwargs: dict
+) -> list[dict[str, Any]] | None:
+    """Get the JSON patch operations equivalent to calling a method of a var value.
+
+    Args:
+        value: The var value, before calling the method.
+        method: The name of the method.
+        args: The positional arguments of the method.
+        kwargs: The keyword arguments of the method.
+
+    Returns:
+        The operations, or None if the change cannot be described by a patch.
+    """
+    if isinstance(value, list):
+        return _get_list_json_patch(value, method, args, kwargs)
+    if isinstance(value, dict):
+        return _get_dict_json_patch(value, method, args, kwargs)
+    return None
+
+
 class MutableProxy(wrapt.ObjectProxy):
     """A proxy for a mutable object that tracks changes."""
 
@@ -3037,6 +5140,14 @@ class MutableProxy(wrapt.ObjectProxy):
 
     __mutable_types__ = (list, dict, set, Base, DeclarativeBase)
 
+    # Whether the wrapped object is nested in the field value (only changes of the
+    # field value itself are described by JSON patches).
+    _self_nested: bool = False
+
+    # The proxies of the mutable objects nested in the field value, by object id. Shared
+    # by all the proxies of the field and reset when the field value itself is mutated.
+    _self_nested_proxies: Optional[Dict[int, MutableProxy]] = None
+
     def __init__(self, wrapped: Any, state: BaseState, field_name: str):
         """Create a proxy for a mutable object that tracks changes.
 
@@ -3070,8 +5181,21 @@ class MutableProxy(wrapt.ObjectProxy):
         Returns:
             The result of the wrapped function.
         """
-        self._self_state.dirty_vars.add(self._self_field_name)
-        self._self_state._mark_dirty()
+        if not self._self_nested and self._self_nested_proxies:
+            # Objects may have been removed from the field value.
+            self._self_nested_proxies.clear()
+        state = self._self_state
+        patch = None
+        if (
+            wrapped is not None
+            and not self._self_nested
+            and state._send_json_patches
+            and self._self_field_name in state._delta_var_names
+        ):
+            patch = _get_json_patch(
+                self.__wrapped__, wrapped.__name__, args, kwargs or {}
+            )
+        state._mark_var_dirty(self._self_field_name, patch)
         if wrapped is not None:
             return wrapped(*args, **(kwargs or {}))
 
@@ -3088,11 +5212,20 @@ class MutableProxy(wrapt.ObjectProxy):
         if isinstance(value, self.__mutable_types__) and not isinstance(
             value, MutableProxy
         ):
-            return type(self)(
-                wrapped=value,
-                state=self._self_state,
-                field_name=self._self_field_name,
-            )
+            nested_proxies = self._self_nested_proxies
+            if nested_proxies is None:
+                nested_proxies = self._self_nested_proxies = {}
+            # The cached proxy keeps the object alive, so its id cannot be reused.
+            proxy = nested_proxies.get(id(value))
+            if proxy is None:
+                proxy = nested_proxies[id(value)] = type(self)(
+                    wrapped=value,
+                    state=self._self_state,
+                    field_name=self._self_field_name,
+                )
+                proxy._self_nested = True
+                proxy._self_nested_proxies = nested_proxies
+            return proxy
         return value
 
     def _wrap_recursive_decorator(self, wrapped, instance, args, kwargs) -> Any:
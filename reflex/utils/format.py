@@ -4,10 +4,13 @@ from __future__ import annotations
 
 import inspect
 import json
+import math
 import os
 import re
 from typing import TYPE_CHECKING, Any, Callable, List, Optional, Union
 
+import wrapt
+
 from reflex import constants
 from reflex.utils import exceptions, types
 from reflex.vars import BaseVar, Var
@@ -16,6 +19,16 @@ if TYPE_CHECKING:
     from reflex.components.component import ComponentStyle
     from reflex.event import ArgsSpec, EventChain, EventHandler, EventSpec
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 WRAP_MAP = {
     "{": "}",
     "(": ")",
@@ -745,6 +758,147 @@ def format_state(value: Any, key: Optional[str] = None) -> Any:
         )
 
 
+def _format_state_value(value: Any) -> Any:
+    """Format a state value that the JSON encoder cannot serialize natively.
+
+    Args:
+        value: The value to format.
+
+    Returns:
+        A value the JSON encoder can serialize (possibly calling this again).
+
+    Raises:
+        TypeError: If the value has no serializer.
+    """
+    from reflex.base import Base
+    from reflex.utils import serializers
+
+    # Serialize the value wrapped by mutable var proxies.
+    if isinstance(value, wrapt.ObjectProxy):
+        return value.__wrapped__
+
+    if isinstance(value, types.StateIterBases):
+        return list(value)
+
+    if isinstance(value, Base):
+        return value.dict()
+
+    serialized = serializers.serialize(value)
+    if serialized is not None:
+        return serialized
+
+    raise TypeError(f"No JSON serializer found for var {value} of type {type(value)}.")
+
+
+def _may_contain_non_finite_float(value: Any) -> bool:
+    """Check whether state values may contain NaN or infinite floats.
+
+    Args:
+        value: The state values to check.
+
+    Returns:
+        Whether a NaN or infinite float was found, or a value which is only formatted
+        while it is encoded (and may produce one) was found.
+    """
+    to_visit = [value]
+    while to_visit:
+        value = to_visit.pop()
+        if isinstance(value, wrapt.ObjectProxy):
+            value = value.__wrapped__
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            to_visit.extend(value.values())
+        elif isinstance(value, types.StateIterBases):
+            to_visit.extend(value)
+        elif value is not None and not isinstance(value, (str, int)):
+            return True
+    return False
+
+
+def json_dumps_state(value: Any) -> str:
+    """Format and encode state values (like a delta) to JSON in a single pass.
+
+    Equivalent to json_dumps(format_state(value)), but the values are formatted while
+    they are encoded, with orjson if it is installed. NaN and infinite floats are
+    encoded as NaN/Infinity by both encoders (orjson would encode them as null).
+
+    Args:
+        value: The state values to encode.
+
+    Returns:
+        The JSON string.
+    """
+    if orjson is not None:
+        try:
+            encoded = orjson.dumps(
+                value,
+                default=_format_state_value,
+                option=orjson.OPT_NON_STR_KEYS
+                | orjson.OPT_PASSTHROUGH_DATACLASS
+                | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            # Like integers larger than 64 bits, the json module reports other errors.
+            pass
+        else:
+            # Only look for the floats encoded as null when there is a null.
+            if b"null" not in encoded or not _may_contain_non_finite_float(value):
+                return encoded.decode()
+    return json.dumps(value, ensure_ascii=False, default=_format_state_value)
+
+
+# The types msgpack encodes without calling the default hook (except large integers).
+_MSGPACK_TYPES = (dict, list, tuple, str, bytes, float, int, type(None))
+
+
+def _format_msgpack_state_value(value: Any) -> Any:
+    """Format a state value which msgpack can not encode.
+
+    Unlike the JSON encoders, msgpack does not format the value returned by the
+    default hook again, so it is formatted until msgpack can encode it.
+
+    Args:
+        value: The value to format.
+
+    Returns:
+        The formatted value.
+
+    Raises:
+        OverflowError: For integers larger than 64 bits, which are sent as JSON.
+    """
+    while True:
+        if isinstance(value, int):
+            raise OverflowError("Integer value out of range")
+        value = _format_state_value(value)
+        if isinstance(value, _MSGPACK_TYPES):
+            return value
+
+
+def msgpack_dumps_state(value: Any) -> bytes | None:
+    """Format and encode state values (like a delta) to MessagePack in a single pass.
+
+    Args:
+        value: The state values to encode.
+
+    Returns:
+        The MessagePack bytes, or None if msgpack is not installed or the values can
+        only be encoded to JSON (like integers larger than 64 bits).
+    """
+    if msgpack is None:
+        return None
+    try:
+        return msgpack.packb(
+            value,
+            default=_format_msgpack_state_value,
+            use_bin_type=True,
+            datetime=False,
+        )
+    except (OverflowError, TypeError, ValueError):
+        return None
+
+
 def format_state_name(state_name: str) -> str:
     """Format a state name, replacing dots with double underscore.
 
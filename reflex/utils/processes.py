@@ -17,6 +17,7 @@ import typer
 from redis.exceptions import RedisError
 
 from reflex import constants
+from reflex.config import get_config
 from reflex.utils import console, path_ops, prerequisites
 
 
@@ -39,6 +40,9 @@ def get_num_workers() -> int:
         The number of backend worker processes.
     """
     if (redis_client := prerequisites.get_redis_sync()) is None:
+        # Without redis, states can only be shared between workers by a SQLite database.
+        if get_config().state_db_path:
+            return (os.cpu_count() or 1) * 2 + 1
         return 1
     try:
         redis_client.ping()
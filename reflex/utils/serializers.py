@@ -360,7 +360,58 @@ def serialize_color(color: Color) -> str:
 
 
 try:
-    from pandas import DataFrame
+    import numpy
+
+    @serializer
+    def serialize_ndarray(array: numpy.ndarray) -> list:
+        """Serialize a numpy array.
+
+        Args:
+            array: The array to serialize.
+
+        Returns:
+            The array as (nested) lists of python values.
+        """
+        return array.tolist()
+
+    @serializer
+    def serialize_numpy_scalar(value: numpy.generic) -> Any:
+        """Serialize a numpy scalar (like numpy.int64 or numpy.float64).
+
+        Args:
+            value: The scalar to serialize.
+
+        Returns:
+            The equivalent python value.
+        """
+        return value.item()
+
+except ImportError:
+    pass
+
+try:
+    from pandas import DataFrame, Series
+    from pandas.api.types import is_numeric_dtype
+
+    def format_dataframe_column(column: Series) -> List[Any]:
+        """Format the values of a dataframe column to a list of python values.
+
+        Numeric and boolean columns are converted at once by numpy, the lists and
+        tuples in the cells of the other columns are formatted as strings.
+
+        Args:
+            column: The column to format.
+
+        Returns:
+            The column values.
+        """
+        if is_numeric_dtype(column.dtype):
+            if column.hasnans:
+                # Nullable extension dtypes have pd.NA values.
+                return column.to_numpy(dtype=object, na_value=None).tolist()
+            return column.to_numpy().tolist()
+        values = column.to_numpy(dtype=object).tolist()
+        return [str(v) if isinstance(v, (list, tuple)) else v for v in values]
 
     def format_dataframe_values(df: DataFrame) -> List[List[Any]]:
         """Format dataframe values to a list of lists.
@@ -371,10 +422,10 @@ try:
         Returns:
             The dataframe as a list of lists.
         """
-        return [
-            [str(d) if isinstance(d, (list, tuple)) else d for d in data]
-            for data in list(df.values.tolist())
-        ]
+        if not len(df.columns):
+            return [[] for _ in range(len(df))]
+        columns = [format_dataframe_column(column) for _, column in df.items()]
+        return [list(row) for row in zip(*columns)]
 
     @serializer
     def serialize_dataframe(df: DataFrame) -> dict:
@@ -107,6 +107,7 @@ RESERVED_BACKEND_VAR_NAMES = {
     "_abc_impl",
     "_backend_vars",
     "_was_touched",
+    "_touched_vars",
 }
 
 
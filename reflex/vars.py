@@ -2,18 +2,23 @@
 
 from __future__ import annotations
 
+import asyncio
 import contextlib
 import dataclasses
 import datetime
 import dis
 import functools
+import hashlib
 import inspect
 import json
+import multiprocessing
+import pickle
 import random
 import re
 import string
 import sys
-from types import CodeType, FunctionType
+from concurrent.futures import ProcessPoolExecutor
+from types import CodeType, FunctionType, SimpleNamespace
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -33,6 +38,8 @@ from typing import (
     get_type_hints,
 )
 
+import dill
+
 from reflex import constants
 from reflex.base import Base
 from reflex.utils import console, imports, serializers, types
@@ -2176,6 +2183,21 @@ class ComputedVar(Var, property):
     # Interval at which the computed var should be updated
     _update_interval: Optional[datetime.timedelta] = dataclasses.field(default=None)
 
+    # Whether to only send the changes since the value last sent to the frontend
+    _diff: bool = dataclasses.field(default=False)
+
+    # Whether to skip recomputation when the dependency values did not change (None for the config default)
+    _memo: Optional[bool] = dataclasses.field(default=None)
+
+    # The executor computing the value outside of the event loop ("thread" or "process")
+    _executor: Optional[str] = dataclasses.field(default=None)
+
+    # Whether the getter is a coroutine function
+    _is_async: bool = dataclasses.field(default=False)
+
+    # Whether the value is computed concurrently before the delta is sent (async or with an executor)
+    _is_deferred: bool = dataclasses.field(default=False)
+
     # The name of the var.
     _var_name: str = dataclasses.field()
 
@@ -2203,6 +2225,9 @@ class ComputedVar(Var, property):
         auto_deps: bool = True,
         interval: Optional[Union[int, datetime.timedelta]] = None,
         backend: bool | None = None,
+        diff: bool = False,
+        memo: bool | None = None,
+        executor: str | None = None,
         **kwargs,
     ):
         """Initialize a ComputedVar.
@@ -2215,10 +2240,14 @@ class ComputedVar(Var, property):
             auto_deps: Whether var dependencies should be auto-determined.
             interval: Interval at which the computed var should be updated.
             backend: Whether the computed var is a backend var.
+            diff: Whether to only send the changes since the value last sent to the frontend.
+            memo: Whether to skip recomputation when the dependency values did not change.
+            executor: The executor computing the value outside of the event loop ("thread" or "process").
             **kwargs: additional attributes to set on the instance
 
         Raises:
             TypeError: If the computed var dependencies are not Var instances or var names.
+            ValueError: If the executor is not supported.
         """
         if backend is None:
             backend = fget.__name__.startswith("_")
@@ -2229,6 +2258,16 @@ class ComputedVar(Var, property):
         if isinstance(interval, int):
             interval = datetime.timedelta(seconds=interval)
         self._update_interval = interval
+        self._diff = diff
+        self._memo = memo
+        if executor not in (None, "thread", "process"):
+            raise ValueError(
+                f"Unsupported executor {executor!r} for computed var {fget.__name__}, "
+                'use "thread" or "process".'
+            )
+        self._executor = executor
+        self._is_async = asyncio.iscoroutinefunction(fget)
+        self._is_deferred = executor is not None or self._is_async
         if deps is None:
             deps = []
         else:
@@ -2271,6 +2310,9 @@ class ComputedVar(Var, property):
             auto_deps=kwargs.pop("auto_deps", self._auto_deps),
             interval=kwargs.pop("interval", self._update_interval),
             backend=kwargs.pop("backend", self._backend),
+            diff=kwargs.pop("diff", self._diff),
+            memo=kwargs.pop("memo", self._memo),
+            executor=kwargs.pop("executor", self._executor),
             _var_name=kwargs.pop("_var_name", self._var_name),
             _var_type=kwargs.pop("_var_type", self._var_type),
             _var_is_local=kwargs.pop("_var_is_local", self._var_is_local),
@@ -2297,6 +2339,15 @@ class ComputedVar(Var, property):
         """
         return f"__cached_{self._var_name}"
 
+    @property
+    def _memo_attr(self) -> str:
+        """Get the attribute used to store the memoized value on the instance.
+
+        Returns:
+            An attribute name.
+        """
+        return f"__memo_{self._var_name}"
+
     @property
     def _last_updated_attr(self) -> str:
         """Get the attribute used to store the last updated timestamp.
@@ -2334,19 +2385,135 @@ class ComputedVar(Var, property):
         Returns:
             The value of the var for the given instance.
         """
-        if instance is None or not self._cache:
+        if instance is None:
             return super().__get__(instance, owner)
 
+        if self._is_deferred:
+            # The value is computed by _compute before each delta.
+            if hasattr(instance, self._cache_attr):
+                return getattr(instance, self._cache_attr)
+            if self._is_async:
+                return (
+                    None
+                    if isinstance(self._initial_value, types.Unset)
+                    else self._initial_value
+                )
+            # Executor vars read before their first computation get the same namespace.
+            fget = property.__getattribute__(self, "fget")
+            deps = type(instance)._deferred_computed_vars[self._var_name]
+            inputs = self._get_executor_inputs(instance, deps)
+            setattr(instance, self._cache_attr, fget(SimpleNamespace(**inputs)))
+            return getattr(instance, self._cache_attr)
+
+        memo_deps = type(instance)._memoized_computed_vars.get(self._var_name)
+        if not self._cache:
+            if memo_deps is None:
+                return super().__get__(instance, owner)
+            return self._get_memoized(instance, owner, memo_deps)
+
+        if instance._coalesce_dirty_marking:
+            # apply deferred dirty vars, which may invalidate the cached value
+            instance._flush_dirty_marking()
+
         # handle caching
         if not hasattr(instance, self._cache_attr) or self.needs_update(instance):
             # Set cache attr on state instance.
-            setattr(instance, self._cache_attr, super().__get__(instance, owner))
+            setattr(
+                instance,
+                self._cache_attr,
+                super().__get__(instance, owner)
+                if memo_deps is None
+                else self._get_memoized(instance, owner, memo_deps),
+            )
             # Ensure the computed var gets serialized to redis.
             instance._was_touched = True
             # Set the last updated timestamp on the state instance.
             setattr(instance, self._last_updated_attr, datetime.datetime.now())
         return getattr(instance, self._cache_attr)
 
+    def _get_executor_inputs(
+        self, instance: BaseState, deps: tuple[str, ...]
+    ) -> dict[str, Any]:
+        """Get the values of the vars an executor computed var is computed from.
+
+        Executors only get the values of the dependencies, not the state: the
+        mutable var proxies of the state are not safe to use from other threads.
+
+        Args:
+            instance: the state instance the computed var is attached to.
+            deps: the names of the vars this computed var depends on.
+
+        Returns:
+            The values of the dependencies by var name.
+        """
+        from reflex.state import MutableProxy
+
+        inputs = {}
+        for dep in deps:
+            value = getattr(instance, dep)
+            inputs[dep] = (
+                value.__wrapped__ if isinstance(value, MutableProxy) else value
+            )
+        return inputs
+
+    async def _compute(self, instance: BaseState, deps: tuple[str, ...]) -> None:
+        """Compute the value of an async or executor computed var without blocking the event loop.
+
+        Args:
+            instance: the state instance the computed var is attached to.
+            deps: the names of the vars this computed var depends on.
+        """
+        fget = property.__getattribute__(self, "fget")
+        if self._is_async:
+            value = await fget(instance)
+        else:
+            inputs = self._get_executor_inputs(instance, deps)
+            if self._executor == "process":
+                value = await asyncio.get_running_loop().run_in_executor(
+                    _get_process_pool(),
+                    _call_in_process,
+                    dill.dumps((fget, inputs), recurse=True),
+                )
+            else:
+                value = await asyncio.get_running_loop().run_in_executor(
+                    None, fget, SimpleNamespace(**inputs)
+                )
+        setattr(instance, self._cache_attr, value)
+        # Ensure the computed var gets serialized to redis.
+        instance._was_touched = True
+        setattr(instance, self._last_updated_attr, datetime.datetime.now())
+
+    def _get_memoized(
+        self, instance: BaseState, owner: Type, deps: tuple[str, ...]
+    ) -> Any:
+        """Get the value of the computed var, only computed again when its dependency values changed.
+
+        Args:
+            instance: the instance of the class accessing this computed var.
+            owner: the class that this descriptor is attached to.
+            deps: the names of the vars this computed var depends on.
+
+        Returns:
+            The value of the var for the given instance.
+        """
+        try:
+            fingerprint = hashlib.blake2b(
+                pickle.dumps(
+                    tuple(getattr(instance, dep) for dep in deps),
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                ),
+                digest_size=16,
+            ).digest()
+        except (pickle.PicklingError, TypeError, AttributeError):
+            # The dependency values cannot be compared.
+            return super().__get__(instance, owner)
+        memo = getattr(instance, self._memo_attr, None)
+        if memo is not None and memo[0] == fingerprint:
+            return memo[1]
+        value = super().__get__(instance, owner)
+        setattr(instance, self._memo_attr, (fingerprint, value))
+        return value
+
     def _deps(
         self,
         objclass: Type,
@@ -2462,9 +2629,14 @@ class ComputedVar(Var, property):
     def mark_dirty(self, instance) -> None:
         """Mark this ComputedVar as dirty.
 
+        Async and executor computed vars keep their value until it is computed again
+        before the next delta.
+
         Args:
             instance: the state instance that needs to recompute the value.
         """
+        if self._is_deferred:
+            return
         with contextlib.suppress(AttributeError):
             delattr(instance, self._cache_attr)
 
@@ -2488,6 +2660,9 @@ def computed_var(
     auto_deps: bool = True,
     interval: Optional[Union[datetime.timedelta, int]] = None,
     backend: bool | None = None,
+    diff: bool = False,
+    memo: bool | None = None,
+    executor: str | None = None,
     _deprecated_cached_var: bool = False,
     **kwargs,
 ) -> ComputedVar | Callable[[Callable[[BaseState], Any]], ComputedVar]:
@@ -2501,6 +2676,12 @@ def computed_var(
         auto_deps: Whether var dependencies should be auto-determined.
         interval: Interval at which the computed var should be updated.
         backend: Whether the computed var is a backend var.
+        diff: Whether to only send the changes since the value last sent to the frontend.
+        memo: Whether to skip recomputation when the dependency values did not change
+            (defaults to the memoize_computed_vars config, for vars with dependencies).
+        executor: Compute the value before each delta in a "thread" or a "process" pool
+            (the getter only receives the values of the vars it reads, which it must
+            not modify).
         _deprecated_cached_var: Indicate usage of deprecated cached_var partial function.
         **kwargs: additional attributes to set on the instance
 
@@ -2537,12 +2718,64 @@ def computed_var(
             auto_deps=auto_deps,
             interval=interval,
             backend=backend,
+            diff=diff,
+            memo=memo,
+            executor=executor,
             **kwargs,
         )
 
     return wrapper
 
 
+# The pool of the computed vars with executor="process", created on first use.
+_process_pool: ProcessPoolExecutor | None = None
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Get the process pool computing the computed vars with executor="process".
+
+    Returns:
+        The process pool.
+    """
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _process_pool
+
+
+@contextlib.asynccontextmanager
+async def _shutdown_process_pool():
+    """Shut down the process pool of the computed vars when the app stops.
+
+    Registered as a lifespan task of the app.
+
+    Yields:
+        Control while the app is running.
+    """
+    global _process_pool
+    try:
+        yield
+    finally:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False)
+            _process_pool = None
+
+
+def _call_in_process(payload: bytes) -> Any:
+    """Call a computed var getter in a worker process.
+
+    Args:
+        payload: The dill serialized getter and values of the vars it reads.
+
+    Returns:
+        The value of the computed var.
+    """
+    fget, inputs = dill.loads(payload)
+    return fget(SimpleNamespace(**inputs))
+
+
 # Partial function of computed_var with cache=True
 cached_var = functools.partial(computed_var, cache=True, _deprecated_cached_var=True)
 
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -119,3 +120,25 @@ def test_serialize_dataframe():
     assert value == serialize_dataframe(df)
     assert isinstance(value, dict)
     assert tuple(value) == ("columns", "data")
+
+
+def test_serialize_dataframe_dtypes():
+    """Test that each column of a dataframe is serialized according to its dtype."""
+    df = pd.DataFrame(
+        {
+            "int": [1, 2],
+            "float": [1.5, float("nan")],
+            "bool": [True, False],
+            "str": ["foo", None],
+            "nested": [[1, 2], (3, 4)],
+            "nullable": pd.array([1, None], dtype="Int64"),
+        }
+    )
+    value = serialize_dataframe(df)
+    assert value["columns"] == ["int", "float", "bool", "str", "nested", "nullable"]
+    assert value["data"] == [
+        [1, 1.5, True, "foo", "[1, 2]", 1],
+        [2, None, False, None, "(3, 4)", None],
+    ]
+    # numpy scalars are converted to python values.
+    assert not isinstance(value["data"][0][0], np.generic)
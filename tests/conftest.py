@@ -13,6 +13,7 @@ import pytest
 from reflex.app import App
 from reflex.event import EventSpec
 from reflex.model import ModelRegistry
+from reflex.state import BaseState
 from reflex.utils import prerequisites
 
 from .states import (
@@ -24,6 +25,40 @@ from .states import (
 )
 
 
+@pytest.fixture(autouse=True)
+def reset_state_options(monkeypatch) -> Generator:
+    """Restore the process-global state options set from the config in a test.
+
+    Args:
+        monkeypatch: pytest monkeypatch fixture.
+
+    Yields:
+        None
+    """
+    previous_options = []
+    init_state_options = BaseState._init_state_options.__func__  # type: ignore
+
+    def _init_state_options(cls):
+        previous_options.append(
+            (
+                cls,
+                cls._coalesce_dirty_marking,
+                cls._memoize_computed_vars,
+                cls._send_json_patches,
+            )
+        )
+        init_state_options(cls)
+
+    monkeypatch.setattr(
+        BaseState, "_init_state_options", classmethod(_init_state_options)
+    )
+    yield
+    for cls, coalesce, memoize, json_patches in reversed(previous_options):
+        cls._coalesce_dirty_marking = coalesce
+        cls._set_memoize_computed_vars(memoize)
+        cls._send_json_patches = json_patches
+
+
 @pytest.fixture
 def app() -> App:
     """A base app.
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import asyncio
 import functools
+import hashlib
 import io
 import json
 import os.path
 import re
+import shutil
+import tempfile
+import threading
 import unittest.mock
 import uuid
 from contextlib import nullcontext as does_not_raise
@@ -14,7 +19,7 @@ from unittest.mock import AsyncMock
 
 import pytest
 import sqlmodel
-from fastapi import FastAPI, UploadFile
+from fastapi import FastAPI, HTTPException, UploadFile
 from starlette_admin.auth import AuthProvider
 from starlette_admin.contrib.sqla.admin import Admin
 from starlette_admin.contrib.sqla.view import ModelView
@@ -23,11 +28,19 @@ import reflex as rx
 from reflex import AdminDash, constants
 from reflex.app import (
     App,
+    ChunkedUploadCommit,
+    ChunkedUploadInit,
     ComponentCallable,
+    EventNamespace,
     OverlayFragment,
+    _copy_upload_file,
+    _merge_state_updates,
     default_overlay_component,
     process,
     upload,
+    upload_chunked_chunk,
+    upload_chunked_commit,
+    upload_chunked_init,
 )
 from reflex.components import Component
 from reflex.components.base.fragment import Fragment
@@ -808,6 +821,132 @@ async def test_upload_file(tmp_path, state, delta, token: str, mocker):
         await app.state_manager.close()
 
 
+@pytest.mark.asyncio
+async def test_upload_file_chunked(tmp_path, token: str, mocker, monkeypatch):
+    """Test that files uploaded in chunks are resumed, assembled and processed.
+
+    Args:
+        tmp_path: Temporary path.
+        token: a Token.
+        mocker: pytest mocker object.
+        monkeypatch: pytest monkeypatch object.
+    """
+    monkeypatch.setenv("REFLEX_UPLOADED_FILES_DIR", str(tmp_path / "uploaded_files"))
+    mocker.patch("reflex.state.State.class_subclasses", {FileUploadState})
+    FileUploadState._tmp_path = tmp_path
+    app = App(state=State)
+    app.event_namespace.emit = AsyncMock()  # type: ignore
+    handler = f"{FileUploadState.get_full_name()}.multi_handle_upload"
+
+    def request_mock(body: bytes = b"", **headers):
+        async def stream():
+            yield body
+
+        request = unittest.mock.Mock()
+        request.headers = {
+            "reflex-client-token": token,
+            "reflex-event-handler": handler,
+            **headers,
+        }
+        request.stream = stream
+        return request
+
+    data = b"0123456789abcdefghij"
+    init = upload_chunked_init(app)
+    upload_chunk = upload_chunked_chunk(app)
+    commit = upload_chunked_commit(app)
+    body = ChunkedUploadInit(file_id="file1", filename="image1.jpg", size=len(data))
+    assert await init(request_mock(), body) == {"chunks": {}}
+
+    await upload_chunk(request_mock(data[:8]), "file1", 0)
+    # The chunks are not stored in the upload dir, which is served publicly.
+    assert not any((tmp_path / "uploaded_files").iterdir())
+    assert any((tmp_path / ".uploaded_files_chunked").iterdir())
+    with pytest.raises(HTTPException):
+        await upload_chunk(
+            request_mock(data[8:16], **{"reflex-chunk-checksum": "0" * 64}),
+            "file1",
+            8,
+        )
+    with pytest.raises(HTTPException):
+        await upload_chunk(request_mock(data[16:] + b"extra"), "file1", 16)
+
+    # Committing before all chunks are received fails.
+    with pytest.raises(HTTPException) as err:
+        await commit(request_mock(), ChunkedUploadCommit(file_ids=["file1"]))
+    assert err.value.status_code == 409
+
+    # Resuming the upload reports the chunks already received.
+    assert await init(request_mock(), body) == {"chunks": {0: 8}}
+    checksum = hashlib.sha256(data[8:16]).hexdigest()
+    await upload_chunk(
+        request_mock(data[8:16], **{"reflex-chunk-checksum": checksum}), "file1", 8
+    )
+    await upload_chunk(request_mock(data[16:]), "file1", 16)
+
+    # The chunks are assembled and removed outside of the event loop thread.
+    file_threads = set()
+    copyfileobj = shutil.copyfileobj
+    rmtree = shutil.rmtree
+
+    def record_thread(func):
+        def wrapper(*args, **kwargs):
+            file_threads.add(threading.get_ident())
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    monkeypatch.setattr(shutil, "copyfileobj", record_thread(copyfileobj))
+    monkeypatch.setattr(shutil, "rmtree", record_thread(rmtree))
+
+    streaming_response = await commit(
+        request_mock(), ChunkedUploadCommit(file_ids=["file1"])
+    )
+    async for state_update in streaming_response.body_iterator:
+        assert json.loads(state_update)["delta"] == {
+            FileUploadState.get_full_name(): {"img_list": ["image1.jpg"]}
+        }
+    assert (tmp_path / "image1.jpg").read_bytes() == data
+    assert file_threads
+    assert threading.get_ident() not in file_threads
+    # The chunks and the assembled file are removed.
+    assert not any((tmp_path / ".uploaded_files_chunked").iterdir())
+
+    if isinstance(app.state_manager, StateManagerRedis):
+        await app.state_manager.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "max_memory_size,in_memory",
+    [
+        (None, True),
+        (100, True),
+        (4, False),
+        (0, False),
+    ],
+)
+async def test_copy_upload_file(max_memory_size, in_memory):
+    """Test that uploaded files are copied in memory up to the memory limit.
+
+    Args:
+        max_memory_size: The number of bytes of the copy kept in memory.
+        in_memory: Whether the copy is expected to be kept in memory.
+    """
+    data = b"This is binary data"
+    content_copy = await _copy_upload_file(
+        UploadFile(file=io.BytesIO(data)), max_memory_size
+    )
+    if max_memory_size is None:
+        assert isinstance(content_copy, io.BytesIO)
+    elif isinstance(content_copy, tempfile.SpooledTemporaryFile):
+        assert content_copy._rolled is not in_memory
+    else:
+        assert not in_memory
+    assert content_copy.read() == data
+    content_copy.close()
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize(
     "state",
@@ -1155,6 +1294,270 @@ async def test_process_events(mocker, token: str):
         await app.state_manager.close()
 
 
+@pytest.mark.asyncio
+async def test_process_event_batch(mocker, token: str):
+    """Test that a batch of events is processed under one lock with merged updates.
+
+    Args:
+        mocker: mocker object.
+        token: a Token.
+    """
+    app = App(state=GenState)
+    modify_state = mocker.spy(app.state_manager, "modify_state")
+    events = [
+        Event(
+            token=token,
+            name=f"{GenState.get_name()}.go",
+            payload={"c": c},
+            router_data={"pathname": "/", "query": {}},
+        )
+        for c in (1, 2, 3)
+    ]
+
+    updates = [
+        update async for update in process(app, events, "mock_sid", {}, "127.0.0.1")
+    ]
+
+    assert modify_state.call_count == 1
+    # The updates of the first events are merged in the first update of the last one.
+    substate = GenState.get_full_name()
+    assert [
+        (update.delta.get(substate, {}).get("value"), update.final)
+        for update in updates
+    ] == [(4, False), (5, False), (6, False), (None, True)]
+
+    if isinstance(app.state_manager, StateManagerRedis):
+        await app.state_manager.close()
+
+
+class BatchState(BaseState):
+    """A state with a list var sent as a patch when an item is appended."""
+
+    items: List[int] = []
+
+    def load(self):
+        """Replace the items."""
+        self.items = list(range(20))
+
+    def add(self):
+        """Append an item."""
+        self.items.append(99)
+
+
+@pytest.mark.asyncio
+async def test_process_event_batch_patch(token: str, monkeypatch):
+    """Test that the update held during a batch is not changed by the next events.
+
+    Args:
+        token: a Token.
+        monkeypatch: pytest monkeypatch object.
+    """
+    monkeypatch.setattr(BatchState, "_send_json_patches", False)
+    monkeypatch.setenv("STATE_JSON_PATCHES", "true")
+    app = App(state=BatchState)
+    assert BatchState._send_json_patches
+    events = [
+        Event(
+            token=token,
+            name=f"{BatchState.get_name()}.{name}",
+            router_data={"pathname": "/", "query": {}},
+        )
+        for name in ("load", "add")
+    ]
+
+    # Apply the updates like the frontend does.
+    items = None
+    async for update in process(app, events, "mock_sid", {}, "127.0.0.1"):
+        subdelta = update.delta.get(BatchState.get_full_name(), {})
+        items = subdelta.get("items", items)
+        for operation in subdelta.get(constants.CompileVars.DELTA_PATCH, {}).get(
+            "items", []
+        ):
+            items = [*items, operation["value"]]
+
+    state = await app.state_manager.get_state(events[0].substate_token)
+    assert items == state.items == [*range(20), 99]
+
+    if isinstance(app.state_manager, StateManagerRedis):
+        await app.state_manager.close()
+
+
+def test_merge_state_updates():
+    """Test merging the updates of consecutive events."""
+    patch = constants.CompileVars.DELTA_PATCH
+    first = StateUpdate(
+        delta={"state": {"a": 1, patch: {"l": [{"op": "add", "path": "/-"}]}}},
+        final=True,
+    )
+    second = StateUpdate(
+        delta={
+            "state": {"b": 2, patch: {"l": [{"op": "remove", "path": "/0"}]}},
+            "state.sub": {"c": 3},
+        },
+        final=False,
+    )
+    assert _merge_state_updates(first, second) == StateUpdate(
+        delta={
+            "state": {
+                "a": 1,
+                "b": 2,
+                patch: {
+                    "l": [{"op": "add", "path": "/-"}, {"op": "remove", "path": "/0"}]
+                },
+            },
+            "state.sub": {"c": 3},
+        },
+        final=False,
+    )
+    # A new value replaces the patches sent before.
+    assert _merge_state_updates(first, StateUpdate(delta={"state": {"l": []}})) == (
+        StateUpdate(delta={"state": {"a": 1, "l": []}})
+    )
+    # A patch can not be applied to a value sent in the same update.
+    assert (
+        _merge_state_updates(
+            StateUpdate(delta={"state": {"l": [1]}}),
+            StateUpdate(delta={"state": {patch: {"l": []}}}),
+        )
+        is None
+    )
+
+
+@pytest.mark.asyncio
+async def test_emit_update_flush_window():
+    """Test that the updates sent within the flush window are merged."""
+    app = App(state=GenState)
+    namespace = EventNamespace("/event", app)
+    namespace.emit = AsyncMock()  # type: ignore
+    namespace._flush_window = 0.01
+
+    for value in range(3):
+        await namespace.emit_update(
+            StateUpdate(delta={"state": {"value": value}}, final=False), sid="sid"
+        )
+    namespace.emit.assert_not_called()
+    await asyncio.sleep(0.05)
+    namespace.emit.assert_called_once()
+    assert json.loads(namespace.emit.call_args.args[1])["delta"] == {
+        "state": {"value": 2}
+    }
+
+    # A final update is sent immediately along with the pending updates.
+    namespace.emit.reset_mock()
+    await namespace.emit_update(
+        StateUpdate(delta={"state": {"value": 3}}, final=False), sid="sid"
+    )
+    await namespace.emit_update(
+        StateUpdate(delta={"state.sub": {"other": 1}}, final=True), sid="sid"
+    )
+    namespace.emit.assert_called_once()
+    assert json.loads(namespace.emit.call_args.args[1]) == {
+        "delta": {"state": {"value": 3}, "state.sub": {"other": 1}},
+        "events": [],
+        "final": True,
+    }
+    assert not namespace._flush_tasks
+
+
+@pytest.mark.asyncio
+async def test_emit_update_flush_window_snapshot(monkeypatch):
+    """Test that the pending update is not changed by the next mutations of the state.
+
+    Args:
+        monkeypatch: pytest monkeypatch object.
+    """
+    app = App(state=BatchState)
+    monkeypatch.setattr(BatchState, "_send_json_patches", True)
+    namespace = EventNamespace("/event", app)
+    namespace.emit = AsyncMock()  # type: ignore
+    namespace._flush_window = 10
+    state = BatchState(_reflex_internal_init=True)  # type: ignore
+
+    state.load()
+    await namespace.emit_update(
+        StateUpdate(delta=state.get_delta(), final=False), sid="sid"
+    )
+    state._clean()
+    state.add()
+    await namespace.emit_update(StateUpdate(delta=state.get_delta()), sid="sid")
+
+    # The patch can not be merged with the pending value, both are sent in order.
+    first, second = (
+        json.loads(call.args[1])["delta"][BatchState.get_full_name()]
+        for call in namespace.emit.call_args_list
+    )
+    assert first == {"items": list(range(20))}
+    assert second == {
+        constants.CompileVars.DELTA_PATCH: {
+            "items": [{"op": "add", "path": "/-", "value": 99}]
+        }
+    }
+
+
+@pytest.mark.asyncio
+async def test_emit_update_msgpack():
+    """Test that updates are sent as MessagePack to the clients accepting it."""
+    msgpack = pytest.importorskip("msgpack")
+    app = App(state=GenState)
+    namespace = EventNamespace("/event", app)
+    namespace.emit = AsyncMock()  # type: ignore
+    namespace.on_connect("binary_sid", {}, {"encodings": ["msgpack"]})
+    namespace.on_connect("json_sid", {})
+    update = StateUpdate(delta={"state": {"value": 1}})
+
+    await namespace.emit_update(update, sid="binary_sid")
+    assert msgpack.unpackb(namespace.emit.call_args.args[1]) == json.loads(
+        update.json()
+    )
+    await namespace.emit_update(update, sid="json_sid")
+    assert namespace.emit.call_args.args[1] == update.json()
+
+    # Values which can not be encoded to MessagePack are sent as JSON.
+    update = StateUpdate(delta={"state": {"value": 2**70}})
+    await namespace.emit_update(update, sid="binary_sid")
+    assert namespace.emit.call_args.args[1] == update.json()
+
+    namespace.on_disconnect("binary_sid")
+    assert not namespace._msgpack_sids
+
+
+@pytest.mark.asyncio
+async def test_on_event_msgpack(token: str):
+    """Test that a client negotiating MessagePack receives the updates of its events as binary frames.
+
+    Args:
+        token: a Token.
+    """
+    msgpack = pytest.importorskip("msgpack")
+    app = App(state=GenState)
+    namespace = EventNamespace("/event", app)
+    namespace.emit = AsyncMock()  # type: ignore
+    app.sio = unittest.mock.Mock()
+    app.sio.get_environ.return_value = {
+        "asgi.scope": {"headers": [], "client": ["127.0.0.1", 1234]}
+    }
+    # The auth sent by the client, see state.js.
+    namespace.on_connect("mock_sid", {}, {"encodings": ["msgpack"]})
+    event = Event(
+        token=token,
+        name=f"{GenState.get_name()}.go",
+        payload={"c": 1},
+        router_data={"pathname": "/", "query": {}},
+    )
+
+    await namespace.on_event("mock_sid", event.json())
+
+    frames = [call.args[1] for call in namespace.emit.call_args_list]
+    assert frames
+    assert all(isinstance(frame, bytes) for frame in frames)
+    updates = [msgpack.unpackb(frame) for frame in frames]
+    assert updates[0]["delta"][GenState.get_full_name()]["value"] == 1
+    assert updates[-1]["final"] is True
+
+    if isinstance(app.state_manager, StateManagerRedis):
+        await app.state_manager.close()
+
+
 @pytest.mark.parametrize(
     ("state", "overlay_component", "exp_page_child"),
     [
@@ -1395,6 +1798,8 @@ def test_app_state_manager():
     app._enable_state()
     assert app.state_manager is not None
     assert isinstance(app.state_manager, (StateManagerMemory, StateManagerRedis))
+    if isinstance(app.state_manager, StateManagerMemory):
+        assert app.state_manager._sweep_states in app.lifespan_tasks
 
 
 def test_generate_component():
@@ -7,13 +7,20 @@ import functools
 import json
 import os
 import sys
+import uuid
 from textwrap import dedent
-from typing import Any, Callable, Dict, Generator, List, Optional, Union
+from typing import Any, Callable, Dict, Generator, List, Optional, Type, Union
 from unittest.mock import AsyncMock, Mock
 
 import pytest
 from plotly.graph_objects import Figure
 
+try:
+    import pydantic.v1 as pydantic
+except ModuleNotFoundError:
+    import pydantic  # type: ignore
+from redis.asyncio import Redis
+
 import reflex as rx
 import reflex.config
 from reflex import constants
@@ -23,6 +30,8 @@ from reflex.components.sonner.toast import Toaster
 from reflex.constants import CompileVars, RouteVar, SocketEvent
 from reflex.event import Event, EventHandler
 from reflex.state import (
+    STATE_COMPRESSORS,
+    STATE_SERIALIZERS,
     BaseState,
     ImmutableStateError,
     LockExpiredError,
@@ -33,12 +42,16 @@ from reflex.state import (
     StateManager,
     StateManagerMemory,
     StateManagerRedis,
+    StateManagerSQLite,
     StateProxy,
     StateUpdate,
+    _compress_state_payload,
+    _loads_state_payload,
     _substate_key,
 )
 from reflex.testing import chdir
 from reflex.utils import format, prerequisites, types
+from reflex.utils.exceptions import StateValueError
 from reflex.utils.format import json_dumps
 from reflex.vars import BaseVar, ComputedVar
 from tests.states.mutation import MutableSQLAModel, MutableTestState
@@ -929,6 +942,45 @@ def test_add_var_default_handlers(test_state):
     assert isinstance(test_state.event_handlers["set_rand_int"], EventHandler)
 
 
+def test_add_var_inherited_by_substate():
+    class DynamicParentState(BaseState):
+        pass
+
+    class DynamicChildState(DynamicParentState):
+        pass
+
+    parent = DynamicParentState()
+    child = parent.substates[DynamicChildState.get_name()]
+    DynamicParentState.add_var("dynamic_list", List[int], [])
+    parent.dynamic_list = [1]
+
+    # The substate reads the new var from its parent.
+    assert child.dynamic_list == [1]
+    child.dynamic_list.append(2)
+    assert parent.dynamic_list == [1, 2]
+    assert "dynamic_list" in parent.dirty_vars
+
+
+def test_backend_var_missing_from_instance():
+    """Test that a backend var missing from a persisted state reads the class default."""
+
+    class LegacyState(BaseState):
+        _num: int = 5
+        _items: List[int] = []
+
+    legacy = LegacyState(_reflex_internal_init=True)  # type: ignore
+    payload = legacy.__getstate__()
+    # Like a state persisted before the backend vars were added.
+    payload["__dict__"]["_backend_vars"] = {}
+    state = LegacyState.__new__(LegacyState)
+    state.__setstate__(payload)
+
+    assert state._num == 5
+    assert state._items == []
+    state._num = 6
+    assert state._num == 6
+
+
 class InterdependentState(BaseState):
     """A state with 3 vars and 3 computed vars.
 
@@ -1334,6 +1386,269 @@ def test_cached_var_depends_on_event_handler(use_partial: bool):
     assert s.x == 45
 
 
+def test_dirty_propagation_plan():
+    """Test that chained computed vars are resolved ahead of time, in dependency order."""
+
+    class PlanState(BaseState):
+        v: int = 0
+        _backend: int = 0
+
+        @rx.var(cache=True)
+        def double(self) -> int:
+            return self.v * 2
+
+        @rx.var(cache=True)
+        def quadruple(self) -> int:
+            return self.double * 2
+
+        @rx.var(cache=True)
+        def octuple(self) -> int:
+            return self.quadruple * 2
+
+        @rx.var(cache=True, backend=True)
+        def backend_double(self) -> int:
+            return self.v * 2
+
+    v_plan = PlanState._dirty_propagation_plan["v"]
+    assert sorted(v_plan) == ["backend_double", "double", "octuple", "quadruple"]
+    assert v_plan.index("double") < v_plan.index("quadruple") < v_plan.index("octuple")
+    assert PlanState._dirty_propagation_plan["double"] == ("quadruple", "octuple")
+    assert "octuple" not in PlanState._dirty_propagation_plan
+    assert "v" in PlanState._delta_var_names
+    assert "octuple" in PlanState._delta_var_names
+    assert "_backend" not in PlanState._delta_var_names
+    assert "backend_double" not in PlanState._delta_var_names
+
+    ps = PlanState()
+    assert ps.octuple == 0
+    ps.v = 1
+    assert ps.dirty_vars == {"v", "double", "quadruple", "octuple", "backend_double"}
+    assert ps.octuple == 8
+    assert ps.get_delta() == {
+        PlanState.get_full_name(): {
+            "v": 1,
+            "double": 2,
+            "quadruple": 4,
+            "octuple": 8,
+        }
+    }
+
+
+def test_coalesced_dirty_marking(monkeypatch):
+    """Test that coalesced dirty marking defers propagation without serving stale values.
+
+    Args:
+        monkeypatch: Pytest monkeypatch object.
+    """
+
+    class CoalescedState(BaseState):
+        items: List[int] = []
+
+        @rx.var(cache=True)
+        def total(self) -> int:
+            return sum(self.items)
+
+    class CoalescedChildState(CoalescedState):
+        @rx.var(cache=True)
+        def count(self) -> int:
+            return len(self.items)
+
+    # The option is read when the app sets up the state tree, not with the classes.
+    assert not CoalescedChildState._coalesce_dirty_marking
+    monkeypatch.setenv("STATE_COALESCE_DIRTY_MARKING", "true")
+    CoalescedState._init_state_options()
+    assert CoalescedChildState._coalesce_dirty_marking
+
+    cs = CoalescedState()
+    child = cs.substates[CoalescedChildState.get_name()]
+    assert cs.total == 0
+    assert child.count == 0
+    cs._clean()
+
+    for i in range(100):
+        cs.items.append(i)
+    # Only the var name was recorded, nothing was propagated yet.
+    assert cs.dirty_vars == {"items"}
+    assert cs._dirty_pending
+    assert not cs.dirty_substates
+    assert not child.dirty_vars
+
+    # Reading a computed var applies the deferred propagation first.
+    assert child.count == 100
+    assert not cs._dirty_pending
+    assert cs.dirty_vars == {"items", "total"}
+    assert child.dirty_vars == {"items", "count"}
+
+    cs.items.append(100)
+    assert cs.total == sum(range(101))
+    assert cs.get_delta() == {
+        CoalescedState.get_full_name(): {"items": list(range(101)), "total": 5050},
+        CoalescedChildState.get_full_name(): {"count": 101},
+    }
+    cs._clean()
+
+    # Modifying a child var only marks the substate chain until the delta is computed.
+    child.items = [1]
+    assert CoalescedChildState.get_name() not in cs.dirty_substates
+    assert cs.get_delta() == {
+        CoalescedState.get_full_name(): {"items": [1], "total": 1},
+        CoalescedChildState.get_full_name(): {"count": 1},
+    }
+
+
+def test_memoized_computed_vars(monkeypatch):
+    """Test that memoized computed vars are only recomputed when their dependencies change.
+
+    Args:
+        monkeypatch: Pytest monkeypatch object.
+    """
+    calls = []
+
+    class MemoState(BaseState):
+        v: List[int] = [1, 2]
+        w: int = 0
+
+        @rx.var
+        def total(self) -> int:
+            calls.append("total")
+            return sum(self.v)
+
+        @rx.var(cache=True)
+        def doubled(self) -> int:
+            calls.append("doubled")
+            return self.total * 2
+
+        @rx.var(memo=False)
+        def impure(self) -> int:
+            calls.append("impure")
+            return self.w
+
+        @rx.var
+        def constant(self) -> int:
+            calls.append("constant")
+            return 42
+
+    # The option is read when the app sets up the state tree, not with the classes.
+    assert MemoState._memoized_computed_vars == {}
+    monkeypatch.setenv("MEMOIZE_COMPUTED_VARS", "true")
+    MemoState._init_state_options()
+    assert MemoState._memoized_computed_vars == {
+        "total": ("v",),
+        "doubled": ("total",),
+    }
+    ms = MemoState(_reflex_internal_init=True)  # type: ignore
+    assert ms.doubled == 6
+    assert sorted(calls) == ["doubled", "total"]
+    ms._clean()
+
+    # Reassigning an equal value does not recompute the vars.
+    calls.clear()
+    ms.v = [1, 2]
+    assert ms.get_delta()[MemoState.get_full_name()]["doubled"] == 6
+    assert ms.total == 3
+    assert sorted(calls) == ["constant", "impure"]
+    ms._clean()
+
+    # Mutating the dependency recomputes them.
+    calls.clear()
+    ms.v.append(3)
+    assert ms.doubled == 12
+    assert sorted(calls) == ["doubled", "total"]
+
+
+@pytest.mark.asyncio
+async def test_deferred_computed_vars():
+    """Test that async and executor computed vars are computed concurrently before the delta."""
+    first_started = asyncio.Event()
+    second_started = asyncio.Event()
+
+    class DeferredState(BaseState):
+        v: int = 1
+
+        @rx.var(cache=True)
+        async def first(self) -> int:
+            first_started.set()
+            await second_started.wait()
+            return self.v + 1
+
+        @rx.var
+        async def second(self) -> int:
+            second_started.set()
+            await first_started.wait()
+            return self.v + 2
+
+        @rx.var(cache=True)
+        async def chained(self) -> int:
+            return self.first * 10  # type: ignore
+
+        @rx.var(executor="thread")
+        def threaded(self) -> int:
+            return self.v + 3
+
+    assert DeferredState._deferred_computed_vars == {
+        "first": ("v",),
+        "second": ("v",),
+        "chained": ("first",),
+        "threaded": ("v",),
+    }
+    ds = DeferredState(_reflex_internal_init=True)  # type: ignore
+    assert ds.second is None
+    await asyncio.wait_for(ds._resolve_deferred_computed_vars(), timeout=5)
+    assert (ds.first, ds.second, ds.chained, ds.threaded) == (2, 3, 20, 4)
+    ds._clean()
+
+    # The values are kept until they are computed again before the next delta.
+    first_started.clear()
+    second_started.clear()
+    ds.v = 2
+    assert ds.first == 2
+    await asyncio.wait_for(ds._resolve_deferred_computed_vars(), timeout=5)
+    assert ds.get_delta() == {
+        DeferredState.get_full_name(): {
+            "v": 2,
+            "first": 3,
+            "second": 4,
+            "chained": 30,
+            "threaded": 5,
+        }
+    }
+
+    with pytest.raises(ValueError):
+        rx.var(executor="greenlet")(lambda self: 0)
+
+
+@pytest.mark.asyncio
+async def test_executor_computed_vars():
+    """Test that executor computed vars only get the values of the vars they read."""
+    from reflex import vars as rx_vars
+
+    class ExecutorState(BaseState):
+        items: List[int] = [1, 2, 3]
+
+        @rx.var(executor="thread")
+        def threaded(self) -> str:
+            return f"{type(self).__name__}:{type(self.items).__name__}"
+
+        @rx.var(executor="process")
+        def squares(self) -> List[int]:
+            return [item * item for item in self.items]
+
+    # Read before its first computation, the getter gets the same namespace.
+    es = ExecutorState(_reflex_internal_init=True)  # type: ignore
+    assert es.threaded == "SimpleNamespace:list"
+
+    es = ExecutorState(_reflex_internal_init=True)  # type: ignore
+    await asyncio.wait_for(es._resolve_deferred_computed_vars(), timeout=60)
+    assert es.threaded == "SimpleNamespace:list"
+    assert es.squares == [1, 4, 9]
+
+    # The worker processes are stopped with the app.
+    assert rx_vars._process_pool is not None
+    async with rx_vars._shutdown_process_pool():
+        pass
+    assert rx_vars._process_pool is None
+
+
 def test_computed_var_dependencies():
     """Test that a ComputedVar correctly tracks its dependencies."""
 
@@ -1588,20 +1903,41 @@ async def test_state_with_invalid_yield(capsys, mock_app):
     assert "must only return/yield: None, Events or other EventHandlers" in captured.out
 
 
-@pytest.fixture(scope="function", params=["in_process", "redis"])
-def state_manager(request) -> Generator[StateManager, None, None]:
-    """Instance of state manager parametrized for redis and in-process.
+@pytest.fixture(
+    scope="function",
+    params=[
+        "in_process",
+        "redis",
+        "redis_fields",
+        "redis_cached",
+        "redis_substate_locks",
+        "sqlite",
+    ],
+)
+def state_manager(request, tmp_path) -> Generator[StateManager, None, None]:
+    """Instance of state manager parametrized for redis, sqlite and in-process.
 
     Args:
         request: pytest request object.
+        tmp_path: pytest tmp_path fixture.
 
     Yields:
         A state manager instance
     """
     state_manager = StateManager.create(state=TestState)
-    if request.param == "redis":
+    if request.param.startswith("redis"):
         if not isinstance(state_manager, StateManagerRedis):
             pytest.skip("Test requires redis")
+        state_manager.persist_fields = request.param in (
+            "redis_fields",
+            "redis_substate_locks",
+        )
+        state_manager.substate_locks = request.param == "redis_substate_locks"
+        state_manager.local_cache_size = 10 if request.param == "redis_cached" else 0
+    elif request.param == "sqlite":
+        state_manager = StateManagerSQLite(
+            state=TestState, db_path=str(tmp_path / "states.db")
+        )
     else:
         # explicitly NOT using redis
         state_manager = StateManagerMemory(state=TestState)
@@ -1609,7 +1945,7 @@ def state_manager(request) -> Generator[StateManager, None, None]:
 
     yield state_manager
 
-    if isinstance(state_manager, StateManagerRedis):
+    if isinstance(state_manager, (StateManagerRedis, StateManagerSQLite)):
         asyncio.get_event_loop().run_until_complete(state_manager.close())
 
 
@@ -1640,7 +1976,8 @@ async def test_state_manager_modify_state(
     """
     async with state_manager.modify_state(substate_token) as state:
         if isinstance(state_manager, StateManagerRedis):
-            assert await state_manager.redis.get(f"{token}_lock")
+            for lock_key in state_manager._get_lock_keys(substate_token):
+                assert await state_manager.redis.get(lock_key)
         elif isinstance(state_manager, StateManagerMemory):
             assert token in state_manager._states_locks
             assert state_manager._states_locks[token].locked()
@@ -1698,6 +2035,137 @@ async def test_state_manager_contend(
         assert not state_manager._states_locks[token].locked()
 
 
+@pytest.mark.asyncio
+async def test_state_manager_memory_eviction(mocker):
+    """Test that the memory state manager evicts expired and least recently used states.
+
+    Args:
+        mocker: pytest mock object.
+    """
+    now = 1000.0
+    mocker.patch("reflex.state.time.monotonic", side_effect=lambda: now)
+    state_manager = StateManagerMemory(
+        state=TestState, token_expiration=60, max_states=2
+    )
+
+    async with state_manager.modify_state("token1"):
+        pass
+    await state_manager.get_state("token2")
+    now += 30
+    await state_manager.get_state("token1")
+    # token2 is the least recently used.
+    await state_manager.get_state("token3")
+    assert list(state_manager.states) == ["token1", "token3"]
+    assert "token2" not in state_manager._last_access
+
+    # States being modified are not evicted.
+    now += 61
+    async with state_manager.modify_state("token1"):
+        now += 61
+        assert state_manager._evict_states() == 1
+        assert list(state_manager.states) == ["token1"]
+    assert state_manager._evict_states() == 1
+    assert not state_manager.states
+    assert not state_manager._states_locks
+    assert state_manager.get_metrics() == {
+        "states": 0,
+        "locks": 0,
+        "evicted_states": 3,
+        "estimated_bytes": 0,
+    }
+
+    # States set directly are only tracked by the sweep or when over the limit.
+    state_manager.states["direct"] = TestState(_reflex_internal_init=True)  # type: ignore
+    await state_manager.get_state("token4")
+    assert "direct" not in state_manager._last_access
+    # Over the limit, the direct state is tracked as just accessed.
+    await state_manager.get_state("token5")
+    assert list(state_manager.states) == ["direct", "token5"]
+    assert list(state_manager._last_access) == ["direct", "token5"]
+
+
+@pytest.mark.asyncio
+async def test_state_manager_memory_sweep():
+    """Test that the sweeper task evicts expired states in the background."""
+    state_manager = StateManagerMemory(state=TestState, token_expiration=0)
+    await state_manager.get_state("token1")
+    metrics = state_manager.get_metrics()
+    assert metrics["states"] == 1
+    assert metrics["estimated_bytes"] > 0
+
+    sweeper = asyncio.create_task(state_manager._sweep_states())
+    await asyncio.sleep(0.01)
+    sweeper.cancel()
+    assert not state_manager.states
+    assert state_manager.get_metrics(estimate_size=False) == {
+        "states": 0,
+        "locks": 0,
+        "evicted_states": 1,
+    }
+
+
+@pytest.mark.asyncio
+async def test_state_manager_sqlite_shared(tmp_path, token: str):
+    """Test that workers using the same SQLite database share states and locks.
+
+    Args:
+        tmp_path: pytest tmp_path fixture.
+        token: A token.
+    """
+    db_path = str(tmp_path / "states.db")
+    worker1 = StateManagerSQLite(state=TestState, db_path=db_path)
+    worker2 = StateManagerSQLite(state=TestState, db_path=db_path)
+    grandchild_path = GrandchildState.get_full_name().split(".")
+
+    async with worker1.modify_state(_substate_key(token, GrandchildState)) as state:
+        state.num1 = 1
+        state.get_substate(grandchild_path).value2 = "worker1"
+
+        async def _modify_worker2():
+            async with worker2.modify_state(_substate_key(token, ChildState2)) as state:
+                # The lock of worker1 was released before.
+                assert state.num1 == 1
+                assert state.get_substate(grandchild_path).value2 == "worker1"
+                state.num1 = 2
+
+        # worker2 waits for the lock held by worker1.
+        modify_worker2 = asyncio.create_task(_modify_worker2())
+        await asyncio.sleep(0.05)
+        assert not modify_worker2.done()
+    await modify_worker2
+
+    state = await worker1.get_state(_substate_key(token, TestState))
+    assert state.num1 == 2
+    assert state.get_substate(grandchild_path).value2 == "worker1"
+
+    # Expired states are not loaded.
+    worker2.token_expiration = -1
+    async with worker2.modify_state(_substate_key(token, TestState)) as state:
+        state.num1 = 3
+    assert (await worker1.get_state(_substate_key(token, TestState))).num1 == 0
+    await worker1.close()
+    await worker2.close()
+
+
+@pytest.mark.asyncio
+async def test_state_manager_sqlite_lock_expired(tmp_path, token: str):
+    """Test that no substate is written when the lock expired before committing.
+
+    Args:
+        tmp_path: pytest tmp_path fixture.
+        token: A token.
+    """
+    state_manager = StateManagerSQLite(
+        state=TestState, db_path=str(tmp_path / "states.db"), lock_expiration=50
+    )
+    with pytest.raises(LockExpiredError):
+        async with state_manager.modify_state(_substate_key(token, TestState)) as state:
+            state.num1 = 1
+            await asyncio.sleep(0.1)
+    assert (await state_manager.get_state(_substate_key(token, TestState))).num1 == 0
+    await state_manager.close()
+
+
 @pytest.fixture(scope="function")
 def state_manager_redis() -> Generator[StateManager, None, None]:
     """Instance of state manager for redis only.
@@ -1794,6 +2262,617 @@ async def test_state_manager_lock_expire_contend(
     assert (await state_manager_redis.get_state(substate_token_redis)).num1 == exp_num1
 
 
+@pytest.mark.asyncio
+async def test_state_manager_shared_lock_listener(
+    state_manager_redis: StateManagerRedis,
+    token: str,
+    substate_token_redis: str,
+    mocker,
+):
+    """Test that contended waiters share a single lock release listener.
+
+    Args:
+        state_manager_redis: A state manager instance.
+        token: A token.
+        substate_token_redis: A token + substate name for looking up in state manager.
+        mocker: pytest mock object.
+    """
+    config_set_spy = mocker.spy(state_manager_redis.redis, "config_set")
+    pubsub_spy = mocker.spy(state_manager_redis.redis, "pubsub")
+    subscribed = []
+
+    async def _coro():
+        async with state_manager_redis.modify_state(substate_token_redis) as state:
+            await asyncio.sleep(0.01)
+            if state_manager_redis._lock_pubsub is not None:
+                subscribed.extend(state_manager_redis._lock_pubsub.channels)
+            state.num1 += 1
+
+    for _ in range(2):
+        await asyncio.gather(*(_coro() for _ in range(10)))
+
+    assert (await state_manager_redis.get_state(substate_token_redis)).num1 == 20
+    assert config_set_spy.call_count == 1
+    assert pubsub_spy.call_count == 1
+    assert not state_manager_redis._lock_waiters
+    # Only the contended lock is subscribed to, in the db of the connection.
+    db = state_manager_redis.redis.connection_pool.connection_kwargs.get("db", 0)
+    assert set(subscribed) == {f"__keyspace@{db}__:{token}_lock".encode()}
+    assert state_manager_redis._lock_pubsub is not None
+    assert not state_manager_redis._lock_pubsub.channels
+    assert not state_manager_redis._lock_pubsub.patterns
+    assert (await state_manager_redis.redis.get(f"{token}_lock")) is None
+
+
+def test_state_manager_substate_lock_keys(state_manager_redis: StateManagerRedis):
+    """Test that substate locks only cover the substates an event may write.
+
+    Args:
+        state_manager_redis: A state manager instance.
+    """
+    grandchild_token = _substate_key("token", GrandchildState)
+    assert state_manager_redis._get_lock_keys(grandchild_token) == [b"token_lock"]
+
+    state_manager_redis.substate_locks = True
+    with pytest.raises(StateValueError):
+        state_manager_redis._get_lock_keys(grandchild_token)
+
+    state_manager_redis.persist_fields = True
+    assert state_manager_redis._get_lock_keys(grandchild_token) == sorted(
+        StateManagerRedis._substate_lock_key("token", state_cls)
+        for state_cls in StateManagerRedis._get_required_state_classes(GrandchildState)
+        - {TestState, ChildState}
+    )
+    assert state_manager_redis._get_lock_keys(
+        _substate_key("token", TestState)
+    ) == sorted(
+        StateManagerRedis._substate_lock_key("token", state_cls)
+        for state_cls in StateManagerRedis._get_required_state_classes(TestState)
+    )
+
+
+class SubstateLockState(BaseState):
+    """A root state for testing substate locks."""
+
+    num: int = 0
+
+
+class SubstateLockChildState(SubstateLockState):
+    """A substate for testing substate locks."""
+
+    value: str = ""
+
+
+class SubstateLockChildState2(SubstateLockState):
+    """Another substate, independent from SubstateLockChildState."""
+
+    value: str = ""
+
+
+@pytest.mark.asyncio
+async def test_state_manager_substate_locks(
+    state_manager_redis: StateManagerRedis, token: str
+):
+    """Test that events on independent substates of a token do not block each other.
+
+    Args:
+        state_manager_redis: A state manager instance.
+        token: A token.
+    """
+    state_manager = StateManagerRedis(
+        state=SubstateLockState,
+        redis=state_manager_redis.redis,
+        persist_fields=True,
+        substate_locks=True,
+    )
+    child_token = _substate_key(token, SubstateLockChildState)
+    child2_token = _substate_key(token, SubstateLockChildState2)
+
+    async with state_manager.modify_state(child_token) as state:
+        state.get_substate([SubstateLockChildState.get_name()]).value = "child"
+
+        async def _modify_child2():
+            async with state_manager.modify_state(child2_token) as state:
+                state.get_substate(
+                    [SubstateLockChildState2.get_name()]
+                ).value = "child2"
+
+        # Would time out if the whole token was locked.
+        await asyncio.wait_for(_modify_child2(), timeout=1)
+
+    async with state_manager.modify_state(
+        _substate_key(token, SubstateLockState)
+    ) as state:
+        state.num = 42
+
+    state = await state_manager.get_state(_substate_key(token, SubstateLockState))
+    assert state.num == 42
+    assert state.get_substate([SubstateLockChildState.get_name()]).value == "child"
+    assert state.get_substate([SubstateLockChildState2.get_name()]).value == "child2"
+    assert not await state_manager.redis.keys(f"{token}*_lock")
+
+    # An event on the root state locks its substates as well.
+    root_lock_keys = state_manager._get_lock_keys(
+        _substate_key(token, SubstateLockState)
+    )
+    assert set(state_manager._get_lock_keys(child_token)) < set(root_lock_keys)
+
+
+@pytest.mark.asyncio
+async def test_state_manager_substate_locks_parent_writes(
+    state_manager_redis: StateManagerRedis, token: str
+):
+    """Test that concurrent events in sibling substates cannot overwrite their parent.
+
+    Args:
+        state_manager_redis: A state manager instance.
+        token: A token.
+    """
+    state_manager = StateManagerRedis(
+        state=SubstateLockState,
+        redis=state_manager_redis.redis,
+        persist_fields=True,
+        substate_locks=True,
+    )
+    root_token = _substate_key(token, SubstateLockState)
+    async with state_manager.modify_state(root_token) as state:
+        state.num = 1
+        # Like an event, send the delta before the state is persisted.
+        state.get_delta()
+        state._clean()
+
+    both_read = asyncio.Event()
+    reads = []
+
+    async def _increment(state_cls: Type[BaseState]):
+        async with state_manager.modify_state(_substate_key(token, state_cls)) as state:
+            substate = state.get_substate([state_cls.get_name()])
+            num = substate.num
+            reads.append(num)
+            if len(reads) == 2:
+                both_read.set()
+            await asyncio.wait_for(both_read.wait(), timeout=1)
+            # Sets the var on the parent state, which is not locked by the event.
+            substate.num = num + 1
+            substate.value = "modified"
+            state.get_delta()
+            state._clean()
+
+    results = await asyncio.gather(
+        _increment(SubstateLockChildState),
+        _increment(SubstateLockChildState2),
+        return_exceptions=True,
+    )
+
+    # Both events read the parent concurrently, so neither may write it back.
+    assert reads == [1, 1]
+    assert all(isinstance(result, StateValueError) for result in results)
+    state = await state_manager.get_state(root_token)
+    assert state.num == 1
+    assert state.get_substate([SubstateLockChildState.get_name()]).value == ""
+    assert state.get_substate([SubstateLockChildState2.get_name()]).value == ""
+    assert not await state_manager.redis.keys(f"{token}*_lock")
+
+    # The request data of the parent state may still be written by any event.
+    async with state_manager.modify_state(
+        _substate_key(token, SubstateLockChildState)
+    ) as state:
+        # Like app.process, for each event.
+        state.router_data = {constants.RouteVar.PATH: "/child"}
+        state.router = RouterData(state.router_data)
+        state.get_substate([SubstateLockChildState.get_name()]).value = "child"
+        state.get_delta()
+        state._clean()
+    state = await state_manager.get_state(root_token)
+    assert state.router.page.path == "/child"
+    assert state.num == 1
+    assert state.get_substate([SubstateLockChildState.get_name()]).value == "child"
+
+
+@pytest.mark.asyncio
+async def test_state_manager_persist_fields(
+    state_manager_redis: StateManagerRedis, token: str
+):
+    """Test that only the touched fields are written when persisting fields.
+
+    Args:
+        state_manager_redis: A state manager instance.
+        token: A token.
+    """
+    state_manager_redis.persist_fields = True
+    child_token = _substate_key(token, ChildState)
+
+    # A new substate is written in full.
+    async with state_manager_redis.modify_state(child_token) as state:
+        state.get_substate(ChildState.get_full_name().split(".")).value = "first"
+        state.num1 = 1
+    fields = await state_manager_redis.redis.hgetall(child_token)
+    assert {b"value", b"count", b"router_data"} <= set(fields)
+    assert b"num1" not in fields  # persisted with the parent state
+
+    # Change the stored count behind the back of the state manager.
+    await state_manager_redis.redis.hset(
+        child_token, "count", state_manager_redis._get_serializer().dumps(42)
+    )
+
+    # Only the touched field is written back.
+    async with state_manager_redis.modify_state(child_token) as state:
+        child_state = state.get_substate(ChildState.get_full_name().split("."))
+        assert child_state.count == 42
+        child_state.value = "second"
+        child_state.count  # reading does not touch the field
+    fields = await state_manager_redis.redis.hgetall(child_token)
+    assert _loads_state_payload(fields[b"value"]) == "second"
+    assert _loads_state_payload(fields[b"count"]) == 42
+
+    state = await state_manager_redis.get_state(child_token)
+    assert state.num1 == 1
+    child_state = state.get_substate(ChildState.get_full_name().split("."))
+    assert child_state.value == "second"
+    assert child_state.count == 42
+
+
+@pytest.mark.asyncio
+async def test_state_manager_persist_fields_migration(
+    state_manager_redis: StateManagerRedis, token: str, substate_token_redis: str
+):
+    """Test that substates persisted in the other mode can still be read.
+
+    Args:
+        state_manager_redis: A state manager instance.
+        token: A token.
+        substate_token_redis: A token + substate name for looking up in state manager.
+    """
+    state_manager_redis.persist_fields = False
+    async with state_manager_redis.modify_state(substate_token_redis) as state:
+        state.num1 = 7
+    assert await state_manager_redis.redis.type(substate_token_redis) == b"string"
+
+    state_manager_redis.persist_fields = True
+    async with state_manager_redis.modify_state(substate_token_redis) as state:
+        assert state.num1 == 7
+        state.num2 = 2.5
+    assert await state_manager_redis.redis.type(substate_token_redis) == b"hash"
+
+    state_manager_redis.persist_fields = False
+    state = await state_manager_redis.get_state(substate_token_redis)
+    assert state.num1 == 7
+    assert state.num2 == 2.5
+
+
+@pytest.mark.asyncio
+async def test_state_manager_set_state_lock_lost(
+    state_manager_redis: StateManagerRedis, token: str, mocker
+):
+    """Test that no substate is written when the lock is lost before committing.
+
+    Args:
+        state_manager_redis: A state manager instance.
+        token: A token.
+        mocker: pytest mock object.
+    """
+    grandchild_token = _substate_key(token, GrandchildState)
+    async with state_manager_redis.modify_state(grandchild_token) as state:
+        state.num1 = 1
+        state.get_substate(GrandchildState.get_full_name().split(".")).value2 = "v1"
+
+    set_spy = mocker.spy(state_manager_redis.redis, "set")
+    with pytest.raises(LockExpiredError):
+        async with state_manager_redis.modify_state(grandchild_token) as state:
+            state.num1 = 2
+            grandchild_state = state.get_substate(
+                GrandchildState.get_full_name().split(".")
+            )
+            grandchild_state.value2 = "v2"
+            # Simulate the lock expiring while processing.
+            await state_manager_redis.redis.delete(f"{token}_lock")
+    # The substates are only written by the script, which checks the lock.
+    assert set_spy.call_count == 0
+
+    state = await state_manager_redis.get_state(grandchild_token)
+    assert state.num1 == 1
+    grandchild_state = state.get_substate(GrandchildState.get_full_name().split("."))
+    assert grandchild_state.value2 == "v1"
+
+
+@pytest.mark.parametrize("serializer", ["dill", "pickle"])
+def test_state_serializer_round_trip(serializer: str):
+    """Test that each state serializer can round trip a state and its field values.
+
+    Args:
+        serializer: The name of the state serializer.
+    """
+    state_manager = StateManagerRedis(
+        state=TestState, redis=Redis(), serializer=serializer
+    )
+    state_serializer = state_manager._get_serializer()
+    assert state_serializer is STATE_SERIALIZERS[serializer]
+
+    test_state = TestState(_reflex_internal_init=True)  # type: ignore
+    child_state = test_state.get_substate([ChildState.get_name()])
+    child_state.value = "value"
+    child_state.count = 42
+    test_state._clean()
+
+    new_child_state = state_manager._deserialize_state(
+        ChildState, state_serializer.dumps_state(child_state)
+    )
+    assert isinstance(new_child_state, ChildState)
+    assert new_child_state is not child_state
+    assert new_child_state.value == "value"
+    assert new_child_state.count == 42
+
+    value = {"a": [1, 2, 3], "dt": datetime.datetime(2024, 1, 1)}
+    assert _loads_state_payload(state_serializer.dumps(value)) == value
+
+
+def test_state_serializer_pickle_fallback():
+    """Test that values stdlib pickle cannot handle are serialized with dill."""
+    payload = STATE_SERIALIZERS["pickle"].dumps(lambda x: x + 1)
+    assert payload[:1] == STATE_SERIALIZERS["dill"].header
+    assert _loads_state_payload(payload)(1) == 2
+
+    payload = STATE_SERIALIZERS["pickle"].dumps([1, 2])
+    assert payload[:1] == STATE_SERIALIZERS["pickle"].header
+
+
+def test_state_serializer_unknown():
+    """Test that an unknown state serializer name raises an error."""
+    state_manager = StateManagerRedis(state=TestState, redis=Redis(), serializer="nope")
+    with pytest.raises(StateValueError):
+        state_manager._get_serializer()
+
+
+def test_compress_state_payload():
+    """Test that only large compressible payloads are compressed, and can be read back."""
+    small = STATE_SERIALIZERS["pickle"].dumps("x" * 10)
+    assert _compress_state_payload(small, None) == small
+    assert _compress_state_payload(small, 1024) == small
+
+    large = STATE_SERIALIZERS["pickle"].dumps("x" * 10000)
+    assert _compress_state_payload(large, None) == large
+    compressed = _compress_state_payload(large, 1024)
+    assert compressed[:1] in STATE_COMPRESSORS
+    assert len(compressed) < len(large)
+    assert _loads_state_payload(compressed) == "x" * 10000
+
+    # Incompressible payloads are not compressed.
+    incompressible = STATE_SERIALIZERS["pickle"].dumps(os.urandom(10000))
+    assert _compress_state_payload(incompressible, 1024) == incompressible
+
+
+@pytest.mark.parametrize("header", sorted(STATE_COMPRESSORS))
+def test_state_compressors(header: bytes):
+    """Test that each available compression codec can be read back.
+
+    Args:
+        header: The header byte of the compression codec.
+    """
+    payload = STATE_SERIALIZERS["pickle"].dumps(list(range(1000)))
+    compress, _ = STATE_COMPRESSORS[header]
+    assert _loads_state_payload(header + compress(payload)) == list(range(1000))
+
+
+@pytest.mark.asyncio
+async def test_state_manager_compress_threshold(
+    state_manager: StateManager, substate_token: str
+):
+    """Test that large states are compressed in redis and read back transparently.
+
+    Args:
+        state_manager: A state manager instance.
+        substate_token: A token + substate name for looking up in state manager.
+    """
+    if not isinstance(state_manager, StateManagerRedis):
+        pytest.skip("Test requires redis")
+    state_manager.compress_threshold = 1024
+
+    async with state_manager.modify_state(substate_token) as state:
+        state.array = [1.5] * 10000
+    if state_manager.persist_fields:
+        payload = await state_manager.redis.hget(substate_token, "array")
+    else:
+        payload = await state_manager.redis.get(substate_token)
+    assert payload[:1] in STATE_COMPRESSORS
+
+    state = await state_manager.get_state(substate_token)
+    assert state.array == [1.5] * 10000
+
+
+@pytest.mark.asyncio
+async def test_state_manager_serializer_migration(
+    state_manager_redis: StateManagerRedis, token: str, substate_token_redis: str
+):
+    """Test that states persisted with dill are read after switching serializer.
+
+    Args:
+        state_manager_redis: A state manager instance.
+        token: A token.
+        substate_token_redis: A token + substate name for looking up in state manager.
+    """
+    state_manager_redis.serializer = "dill"
+    async with state_manager_redis.modify_state(substate_token_redis) as state:
+        state.num1 = 7
+
+    state_manager_redis.serializer = "pickle"
+    async with state_manager_redis.modify_state(substate_token_redis) as state:
+        assert state.num1 == 7
+        state.num2 = 2.5
+    payload = await state_manager_redis.redis.get(substate_token_redis)
+    assert payload[:1] == STATE_SERIALIZERS["pickle"].header
+
+    state = await state_manager_redis.get_state(substate_token_redis)
+    assert state.num1 == 7
+    assert state.num2 == 2.5
+
+
+@pytest.mark.parametrize(
+    "state_cls, kwargs, expected",
+    [
+        (
+            GrandchildState,
+            {},
+            {TestState, ChildState, ChildState3, GrandchildState, GrandchildState3},
+        ),
+        (GrandchildState, {"get_parent_states": False}, {GrandchildState}),
+        (
+            ChildState2,
+            {"get_substates": False, "get_parent_states": False},
+            {ChildState2, GrandchildState2},
+        ),
+        (
+            TestState,
+            {"get_substates": False},
+            {TestState, ChildState3, GrandchildState3},
+        ),
+        (
+            TestState,
+            {},
+            {
+                TestState,
+                ChildState,
+                ChildState2,
+                ChildState3,
+                GrandchildState,
+                GrandchildState2,
+                GrandchildState3,
+            },
+        ),
+    ],
+)
+def test_get_required_state_classes(state_cls, kwargs, expected):
+    """Test that the required states include parents, substates and dependent states.
+
+    Args:
+        state_cls: The requested state class.
+        kwargs: Extra kwargs for _get_required_state_classes.
+        expected: The expected set of required state classes.
+    """
+    assert (
+        StateManagerRedis._get_required_state_classes(state_cls, **kwargs) == expected
+    )
+
+
+@pytest.mark.asyncio
+async def test_state_manager_get_state_single_round_trip(
+    state_manager_redis: StateManagerRedis, token: str, mocker
+):
+    """Test that get_state fetches all required substates in a single pipeline.
+
+    Args:
+        state_manager_redis: A state manager instance.
+        token: A token.
+        mocker: pytest mock object.
+    """
+    grandchild_token = _substate_key(token, GrandchildState)
+    async with state_manager_redis.modify_state(grandchild_token) as state:
+        state.get_substate(GrandchildState.get_full_name().split(".")).value2 = "v2"
+
+    pipeline_spy = mocker.spy(state_manager_redis.redis, "pipeline")
+    get_spy = mocker.spy(state_manager_redis.redis, "get")
+    state = await state_manager_redis.get_state(grandchild_token)
+    assert pipeline_spy.call_count == 1
+    assert get_spy.call_count == 0
+
+    assert isinstance(state, TestState)
+    assert set(state.substates) == {ChildState.get_name(), ChildState3.get_name()}
+    grandchild_state = state.get_substate(GrandchildState.get_full_name().split("."))
+    assert grandchild_state.value2 == "v2"
+    assert grandchild_state.parent_state is state.substates[ChildState.get_name()]
+
+
+@pytest.mark.asyncio
+async def test_state_manager_local_cache(
+    state_manager_redis: StateManagerRedis, token: str, mocker
+):
+    """Test that modify_state reuses cached substates while their version is current.
+
+    Args:
+        state_manager_redis: A state manager instance.
+        token: A token.
+        mocker: pytest mock object.
+    """
+    state_manager_redis.local_cache_size = 10
+    grandchild_token = _substate_key(token, GrandchildState)
+    grandchild_path = GrandchildState.get_full_name().split(".")
+    async with state_manager_redis.modify_state(grandchild_token) as state:
+        state.get_substate(grandchild_path).value2 = "v2"
+    cached_state = state
+    assert token in state_manager_redis._local_cache
+
+    load_spy = mocker.spy(state_manager_redis, "_load_states")
+    async with state_manager_redis.modify_state(grandchild_token) as state:
+        assert state is cached_state
+        assert state.get_substate(grandchild_path).value2 == "v2"
+        state.get_substate(grandchild_path).value2 = "v3"
+    assert load_spy.call_count == 0
+
+    # Another worker modifies the state, so the cached grandchild is outdated.
+    other_state_manager = StateManagerRedis(
+        state=TestState, redis=state_manager_redis.redis
+    )
+    async with other_state_manager.modify_state(grandchild_token) as other_state:
+        assert other_state.get_substate(grandchild_path).value2 == "v3"
+        other_state.get_substate(grandchild_path).value2 = "v4"
+
+    async with state_manager_redis.modify_state(grandchild_token) as state:
+        assert state is cached_state
+        assert state.get_substate(grandchild_path).value2 == "v4"
+    assert load_spy.call_count == 1
+    assert load_spy.call_args.args[1] == [GrandchildState]
+
+
+@pytest.mark.asyncio
+async def test_state_manager_local_cache_invalidated_on_error(
+    state_manager_redis: StateManagerRedis, token: str
+):
+    """Test that the cached substates are dropped when an event fails.
+
+    Args:
+        state_manager_redis: A state manager instance.
+        token: A token.
+    """
+    state_manager_redis.local_cache_size = 10
+    substate_token = _substate_key(token, TestState)
+    async with state_manager_redis.modify_state(substate_token) as state:
+        state.num1 = 1
+    assert token in state_manager_redis._local_cache
+
+    with pytest.raises(ValueError):
+        async with state_manager_redis.modify_state(substate_token) as state:
+            state.num1 = 2
+            raise ValueError("event failed")
+    assert token not in state_manager_redis._local_cache
+
+    async with state_manager_redis.modify_state(substate_token) as state:
+        assert state.num1 == 1
+
+
+@pytest.mark.asyncio
+async def test_state_manager_local_cache_eviction(
+    state_manager_redis: StateManagerRedis,
+):
+    """Test that only the most recently used tokens are cached.
+
+    Args:
+        state_manager_redis: A state manager instance.
+    """
+    state_manager_redis.local_cache_size = 2
+    tokens = [str(uuid.uuid4()) for _ in range(3)]
+    for client_token in tokens:
+        async with state_manager_redis.modify_state(
+            _substate_key(client_token, TestState)
+        ) as state:
+            state.num1 = 1
+    assert list(state_manager_redis._local_cache) == tokens[1:]
+
+    async with state_manager_redis.modify_state(
+        _substate_key(tokens[1], TestState)
+    ) as state:
+        assert state.num1 == 1
+    assert list(state_manager_redis._local_cache) == [tokens[2], tokens[1]]
+
+
 @pytest.fixture(scope="function")
 def mock_app(monkeypatch, state_manager: StateManager) -> rx.App:
     """Mock app fixture.
@@ -2317,6 +3396,266 @@ def test_mutable_dict(mutable_state: MutableTestState):
     assert_hashmap_dirty()
 
 
+class PatchState(BaseState):
+    """A state with list and dict vars sent as JSON patches."""
+
+    items: List[Any] = list(range(10))
+    mapping: Dict[str, Any] = {str(i): i for i in range(10)}
+    _backend_items: List[int] = list(range(10))
+
+
+def _apply_json_patch(value: Any, patch: List[Dict[str, Any]]) -> Any:
+    """Apply JSON patch operations like applyPatch in state.js.
+
+    Args:
+        value: The value to patch.
+        patch: The operations.
+
+    Returns:
+        The patched copy of the value.
+    """
+    patched = copy.copy(value)
+    for operation in patch:
+        key = operation["path"][1:].replace("~1", "/").replace("~0", "~")
+        if isinstance(patched, dict):
+            if operation["op"] == "remove":
+                patched.pop(key, None)
+            else:
+                patched[key] = operation["value"]
+        elif operation["op"] == "remove":
+            del patched[int(key)]
+        elif operation["op"] == "replace":
+            patched[int(key)] = operation["value"]
+        elif key == "-":
+            patched.append(operation["value"])
+        else:
+            patched.insert(int(key), operation["value"])
+    return patched
+
+
+@pytest.mark.parametrize(
+    "var_name,mutate",
+    [
+        ("items", lambda items: items.append(10)),
+        ("items", lambda items: items.extend([10, [11]])),
+        ("items", lambda items: (items.insert(-2, "a"), items.insert(100, "b"))),
+        ("items", lambda items: (items.pop(), items.pop(0), items.pop(-3))),
+        ("items", lambda items: (items.remove(3), items.__delitem__(-1))),
+        ("items", lambda items: items.__setitem__(-1, {"k": "v"})),
+        ("mapping", lambda mapping: mapping.update({"a/b": 1}, c=[2])),
+        ("mapping", lambda mapping: mapping.__setitem__("0", "zero")),
+        ("mapping", lambda mapping: (mapping.pop("1"), mapping.pop("x", None))),
+        ("mapping", lambda mapping: (mapping.setdefault("~"), mapping.setdefault("2"))),
+        ("mapping", lambda mapping: mapping.__delitem__("9")),
+    ],
+)
+def test_mutable_json_patch(var_name: str, mutate: Callable, monkeypatch):
+    """Test that mutations of list and dict vars are sent as JSON patches.
+
+    Args:
+        var_name: The name of the mutated var.
+        mutate: A function mutating the var.
+        monkeypatch: Pytest monkeypatch object.
+    """
+    monkeypatch.setattr(PatchState, "_send_json_patches", True)
+    state = PatchState(_reflex_internal_init=True)  # type: ignore
+    value = copy.deepcopy(state.get_value(var_name))
+    mutate(getattr(state, var_name))
+    delta = state.get_delta()[PatchState.get_full_name()]
+    assert var_name not in delta
+    patch = delta[CompileVars.DELTA_PATCH][var_name]
+    assert _apply_json_patch(value, patch) == state.get_value(var_name)
+    state._clean()
+    assert state._var_patches is None
+
+
+def test_mutable_json_patch_disabled(monkeypatch):
+    """Test that JSON patches are only sent when enabled in the config.
+
+    Args:
+        monkeypatch: Pytest monkeypatch object.
+    """
+    monkeypatch.setattr(PatchState, "_send_json_patches", False)
+    state = PatchState(_reflex_internal_init=True)  # type: ignore
+    state.items.append(10)
+    assert state.get_delta() == {PatchState.get_full_name(): {"items": [*range(11)]}}
+
+    monkeypatch.setenv("STATE_JSON_PATCHES", "true")
+    # Creating a state manager does not change the options of the state tree.
+    StateManagerMemory(state=PatchState)
+    assert not PatchState._send_json_patches
+    PatchState._init_state_options()
+    assert PatchState._send_json_patches
+
+
+def test_mutable_json_patch_fallback(monkeypatch):
+    """Test that the whole value is sent when a mutation cannot be patched.
+
+    Args:
+        monkeypatch: Pytest monkeypatch object.
+    """
+    monkeypatch.setattr(PatchState, "_send_json_patches", True)
+    state = PatchState(_reflex_internal_init=True)  # type: ignore
+    full_name = PatchState.get_full_name()
+
+    # Patches which are not much shorter than the value are not sent.
+    for i in range(10):
+        state.items.append(i)
+    assert state.get_delta() == {full_name: {"items": [*range(10), *range(10)]}}
+    state._clean()
+
+    # Assigning the var discards the recorded patch, also for later mutations.
+    state.items.append(0)
+    state.items = [1, 2, 3, 4, 5, 6, 7]
+    state.items.append(8)
+    assert state.get_delta() == {full_name: {"items": [1, 2, 3, 4, 5, 6, 7, 8]}}
+    state._clean()
+
+    # Nested values, unsupported methods and non string keys are sent whole.
+    state.items[1] = []
+    state._clean()
+    state.items[1].append(1)
+    assert state._var_patches is None
+    state._clean()
+    state.items.reverse()
+    state.mapping[1] = "one"  # type: ignore
+    assert not state._var_patches
+    assert set(state.get_delta()[full_name]) == {"items", "mapping"}
+    state._clean()
+
+    # Backend vars are not sent, so no patch is recorded.
+    state._backend_items.append(10)
+    assert state._var_patches is None
+
+    # Patches are not persisted with the state.
+    state._clean()
+    state.items.append(10)
+    assert state._var_patches
+    assert "_var_patches" not in state.__getstate__()["__dict__"]
+
+
+class DiffState(BaseState):
+    """A state with vars sent as changes since they were last sent."""
+
+    rows: List[int] = pydantic.Field(list(range(10)), diff=True)
+    label: str = pydantic.Field("a", diff=True)
+    plain: List[int] = [1]
+
+    @rx.var(diff=True)
+    def table(self) -> Dict[str, int]:
+        """The rows by name.
+
+        Returns:
+            A dict of the rows.
+        """
+        return {str(row): row for row in self.rows}
+
+
+def test_diff_vars():
+    """Test that diff vars are only sent when they changed since they were last sent."""
+    assert DiffState._diff_var_names == {"rows", "label", "table"}
+    state = DiffState(_reflex_internal_init=True)  # type: ignore
+    full_name = DiffState.get_full_name()
+
+    # Initially the whole values are sent.
+    state.rows = list(range(10))
+    state.label = "a"
+    assert state.get_delta() == {
+        full_name: {
+            "rows": list(range(10)),
+            "label": "a",
+            "table": {str(i): i for i in range(10)},
+        }
+    }
+    state._clean()
+
+    # Reassigning equal values sends nothing, unlike for other vars.
+    state.rows = list(range(10))
+    state.label = "a"
+    state.plain = [1]
+    assert state.get_delta() == {full_name: {"plain": [1]}}
+    state._clean()
+
+    # Changed lists and dicts are sent as patches, other values whole.
+    state.rows = [0, 1, 2, 3, 30, 5, 6, 7, 8]
+    state.label = "b"
+    assert state.get_delta() == {
+        full_name: {
+            "label": "b",
+            CompileVars.DELTA_PATCH: {
+                "rows": [
+                    {"op": "replace", "path": "/4", "value": 30},
+                    {"op": "remove", "path": "/9"},
+                ],
+                "table": [
+                    {"op": "remove", "path": "/4"},
+                    {"op": "remove", "path": "/9"},
+                    {"op": "add", "path": "/30", "value": 30},
+                ],
+            },
+        }
+    }
+    state._clean()
+
+    # Large changes and values sent after hydrating are sent whole.
+    state.rows = [1, 2, 3]
+    assert state.get_delta()[full_name]["rows"] == [1, 2, 3]
+    state._clean()
+    state._reset_sent_snapshots()
+    state.rows = [1, 2, 3]
+    assert state.get_delta()[full_name]["rows"] == [1, 2, 3]
+
+
+# The data read by DiffExternalState, changed outside of the state.
+DIFF_EXTERNAL_DATA = [0]
+
+
+class DiffExternalState(BaseState):
+    """A state with a diff var reading data from outside of the state."""
+
+    count: int = 0
+
+    @rx.var(cache=False, diff=True)
+    def external(self) -> int:
+        """The external data.
+
+        Returns:
+            The external data.
+        """
+        return DIFF_EXTERNAL_DATA[0]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("persist_fields", [False, True])
+async def test_diff_vars_persisted_snapshots(
+    state_manager_redis: StateManagerRedis, token: str, persist_fields: bool
+):
+    """Test that the values last sent are persisted, even by untouched states.
+
+    Args:
+        state_manager_redis: A state manager instance.
+        token: A token.
+        persist_fields: Whether the state is persisted as a hash of fields.
+    """
+    state_manager = StateManagerRedis(
+        state=DiffExternalState,
+        redis=state_manager_redis.redis,
+        persist_fields=persist_fields,
+    )
+    token = _substate_key(token, DiffExternalState)
+    sent = []
+    for value in (5, 6, 5):
+        DIFF_EXTERNAL_DATA[0] = value
+        async with state_manager.modify_state(token) as state:
+            if not sent:
+                # Only the first event modifies a var of the state.
+                state.count += 1
+            delta = state.get_delta()
+            state._clean()
+        sent.append(delta[DiffExternalState.get_full_name()].get("external"))
+    assert sent == [5, 6, 5]
+
+
 def test_mutable_set(mutable_state: MutableTestState):
     """Test that mutable sets are tracked correctly.
 
@@ -2430,6 +3769,76 @@ def test_mutable_backend(mutable_state: MutableTestState):
     assert_custom_dirty()
 
 
+def test_mutable_proxy_reuse(mutable_state: MutableTestState):
+    """Test that the proxies of nested mutable objects are reused until the var is mutated.
+
+    Args:
+        mutable_state: A test state.
+    """
+    nested_list = mutable_state.array[1]
+    assert isinstance(nested_list, MutableProxy)
+    assert mutable_state.array[1] is nested_list
+    assert list(mutable_state.array)[1] is nested_list
+
+    # Mutating a nested object keeps the proxies.
+    nested_list.append(4)
+    assert mutable_state.dirty_vars == {"array"}
+    assert mutable_state.array[1] is nested_list
+
+    # Mutating the var itself drops them.
+    mutable_state.array.insert(0, "first")
+    assert mutable_state.array[2] is not nested_list
+    assert mutable_state.array[2].__wrapped__ is nested_list.__wrapped__
+
+    # Cleaning the state drops them.
+    nested_list = mutable_state.array[2]
+    mutable_state._clean()
+    assert mutable_state.array[2] is not nested_list
+    mutable_state.array[2].append(5)
+    assert mutable_state.dirty_vars == {"array"}
+
+
+def test_state_update_json(mutable_state: MutableTestState):
+    """Test that the vars in a delta are formatted when the state update is encoded.
+
+    Args:
+        mutable_state: A test state.
+    """
+    mutable_state.array[2]["key"] = "new_value"
+    mutable_state.test_set.add(5)
+    delta = mutable_state._get_delta()
+    subdelta = delta[mutable_state.get_full_name()]
+    assert isinstance(subdelta["array"], MutableProxy)
+
+    update = json.loads(StateUpdate(delta=delta).json())
+    assert update["delta"][mutable_state.get_full_name()] == {
+        "array": ["value", [1, 2, 3], {"key": "new_value"}],
+        "test_set": list(mutable_state.test_set),
+    }
+    assert update["events"] == []
+    assert update["final"] is True
+
+
+def test_get_delta_detached(mutable_state: MutableTestState):
+    """Test that a delta is not changed by later mutations of the state.
+
+    Args:
+        mutable_state: A test state.
+    """
+    mutable_state.array[2]["key"] = "new_value"
+    update = StateUpdate(delta=mutable_state.get_delta(), final=False)
+    mutable_state._clean()
+    json_update = update.json()
+
+    mutable_state.array[2]["key"] = "newer_value"
+    mutable_state.array.append(4)
+    delta = update.delta[mutable_state.get_full_name()]
+    assert delta == {"array": ["value", [1, 2, 3], {"key": "new_value"}]}
+    assert not isinstance(delta["array"], MutableProxy)
+    assert not isinstance(delta["array"][2], MutableProxy)
+    assert update.json() == json_update
+
+
 @pytest.mark.parametrize(
     ("copy_func",),
     [
@@ -2653,10 +4062,13 @@ def test_set_base_field_via_setter():
     assert isinstance(mp, MutableProxy)
     mp2 = mp.set()
     assert mp is mp2
+    # The proxy of a field is reused while its value is unchanged
     mp3 = bfss.c1.set()
-    assert mp is not mp3
+    assert mp is mp3
     # Since none of these set calls had values, the state should not be dirty
     assert not bfss.dirty_vars
+    bfss.c1 = Custom1(foo="")
+    assert bfss.c1 is not mp
 
     # Chained Mutating function, dirty
     bfss.c2.set_c1r_foo("baz")
@@ -2831,7 +4243,7 @@ async def test_get_state(mock_app: rx.App, token: str):
         _substate_key(token, ChildState2)
     )
     assert isinstance(test_state, TestState)
-    if isinstance(mock_app.state_manager, StateManagerMemory):
+    if not isinstance(mock_app.state_manager, StateManagerRedis):
         # All substates are available
         assert tuple(sorted(test_state.substates)) == (
             ChildState.get_name(),
@@ -2910,6 +4322,14 @@ async def test_get_state(mock_app: rx.App, token: str):
             ChildState2.get_name(),
             ChildState3.get_name(),
         )
+    elif isinstance(mock_app.state_manager, StateManagerSQLite):
+        # With sqlite, we get a whole new instance with all substates
+        assert new_test_state is not test_state
+        assert tuple(sorted(new_test_state.substates)) == (
+            ChildState.get_name(),
+            ChildState2.get_name(),
+            ChildState3.get_name(),
+        )
     else:
         # With redis, we get a whole new instance
         assert new_test_state is not test_state
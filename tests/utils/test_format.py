@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import datetime
+import json
 from typing import Any, List
 
 import plotly.graph_objects as go
@@ -742,6 +743,90 @@ def test_format_state(input, output):
     assert format.format_state(input) == output
 
 
+@pytest.mark.parametrize(
+    "input",
+    [
+        TestState(_reflex_internal_init=True).dict(),  # type: ignore
+        DateTimeState(_reflex_internal_init=True).dict(),  # type: ignore
+        {
+            "set": {1, 2},
+            "tuple": (1, "a"),
+            "large_int": 2**70,
+            "unicode": "héllo",
+            "nested": [{"dt": datetime.date(1989, 11, 9)}, None, [True, 1.5]],
+        },
+    ],
+)
+def test_json_dumps_state(input):
+    """Test that state values are encoded like formatting them and dumping them to JSON.
+
+    Args:
+        input: The state values to encode.
+    """
+    encoded = format.json_dumps_state(input)
+    assert json.loads(encoded) == json.loads(
+        format.json_dumps(format.format_state(input))
+    )
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_json_dumps_state_non_finite_floats(monkeypatch, use_orjson: bool):
+    """Test that NaN and infinite floats are encoded the same with both encoders.
+
+    Args:
+        monkeypatch: Pytest monkeypatch object.
+        use_orjson: Whether to encode with orjson.
+    """
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(format, "orjson", None)
+    encoded = format.json_dumps_state(
+        {"nan": float("nan"), "inf": (float("inf"), -float("inf")), "none": None}
+    )
+    assert encoded == '{"nan": NaN, "inf": [Infinity, -Infinity], "none": null}'
+
+
+def test_json_dumps_state_no_serializer():
+    """Test that encoding a value without serializer raises a TypeError."""
+    with pytest.raises(TypeError):
+        format.json_dumps_state({"key": [object()]})
+
+
+@pytest.mark.parametrize(
+    "input",
+    [
+        TestState(_reflex_internal_init=True).dict(),  # type: ignore
+        DateTimeState(_reflex_internal_init=True).dict(),  # type: ignore
+        {
+            "set": {1, 2},
+            "tuple": (1, "a"),
+            "unicode": "héllo",
+            "nested": [{"dt": datetime.date(1989, 11, 9)}, None, [True, 1.5]],
+        },
+    ],
+)
+def test_msgpack_dumps_state(input):
+    """Test that state values are encoded to MessagePack like they are to JSON.
+
+    Args:
+        input: The state values to encode.
+    """
+    msgpack = pytest.importorskip("msgpack")
+    encoded = format.msgpack_dumps_state(input)
+    assert encoded is not None
+    # Unlike JSON objects, MessagePack maps keep keys which are not strings.
+    decoded = json.loads(json.dumps(msgpack.unpackb(encoded, strict_map_key=False)))
+    assert decoded == json.loads(format.json_dumps_state(input))
+
+
+def test_msgpack_dumps_state_large_int():
+    """Test that integers larger than 64 bits can only be encoded to JSON."""
+    pytest.importorskip("msgpack")
+    assert format.msgpack_dumps_state({"large_int": 2**70}) is None
+    assert format.msgpack_dumps_state({"int": 2**62}) is not None
+
+
 @pytest.mark.parametrize(
     "input,output",
     [
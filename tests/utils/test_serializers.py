@@ -3,6 +3,8 @@ from enum import Enum
 from pathlib import Path
 from typing import Any, Dict, List, Type
 
+import numpy as np
+import pandas as pd
 import pytest
 
 from reflex.base import Base
@@ -187,6 +189,14 @@ class BaseSubclass(Base):
         (Color(color="slate", shade=1), "var(--slate-1)"),
         (Color(color="orange", shade=1, alpha=True), "var(--orange-a1)"),
         (Color(color="accent", shade=1, alpha=True), "var(--accent-a1)"),
+        (np.array([[1, 2], [3, 4]]), [[1, 2], [3, 4]]),
+        (np.array([True, False]), [True, False]),
+        (np.int64(1), 1),
+        (np.float64(1.5), 1.5),
+        (
+            pd.DataFrame({"c": [1, [2]], "d": ["a", (1, 2)]}),
+            {"columns": ["c", "d"], "data": [[1, "a"], ["[2]", "(1, 2)"]]},
+        ),
     ],
 )
 def test_serialize(value: Any, expected: str):